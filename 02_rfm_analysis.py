@@ -1,71 +1,132 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import argparse
 import os
 
-# Ensure directories exist
-os.makedirs('data/processed', exist_ok=True)
-
-print("Step 2: Loading data and calculating RFM metrics...")
-
-# Load the data we created in Step 1
-customers_df = pd.read_csv('data/raw/customers.csv')
-transactions_df = pd.read_csv('data/raw/transactions.csv')
-
-# Convert date column to datetime
-transactions_df['transaction_date'] = pd.to_datetime(transactions_df['transaction_date'])
-customers_df['registration_date'] = pd.to_datetime(customers_df['registration_date'])
-
-print(f"Loaded {len(customers_df)} customers and {len(transactions_df)} transactions")
+from insightx.feature_store import FeatureStore
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import merge_join, stream_merge_join, whole_customer_chunks
+from insightx.schema import load_table, save_table, apply_schema, to_external, day_numbers, dollars
 
 # Define analysis date (end of 2024)
-analysis_date = datetime(2024, 12, 31)
-
-print("Calculating RFM metrics...")
-
-# Calculate RFM (Recency, Frequency, Monetary) metrics
-rfm_data = transactions_df.groupby('customer_id').agg({
-    'transaction_date': lambda x: (analysis_date - x.max()).days,  # Recency
-    'transaction_id': 'count',  # Frequency
-    'amount': ['sum', 'mean']  # Monetary
-}).round(2)
-
-# Flatten column names
-rfm_data.columns = ['recency', 'frequency', 'monetary_total', 'monetary_avg']
-rfm_data = rfm_data.reset_index()
-
-# Merge with customer demographics
-rfm_customers = rfm_data.merge(
-    customers_df[['customer_id', 'age', 'gender', 'behavior_type']], 
-    on='customer_id'
-)
-
-print(f"RFM analysis completed for {len(rfm_customers)} customers")
-
-# Display RFM summary statistics
-print("\n=== RFM ANALYSIS SUMMARY ===")
-print("Recency (days since last purchase):")
-print(f"  Mean: {rfm_customers['recency'].mean():.1f} days")
-print(f"  Median: {rfm_customers['recency'].median():.1f} days")
-print(f"  Range: {rfm_customers['recency'].min()}-{rfm_customers['recency'].max()} days")
-
-print("\nFrequency (number of transactions):")
-print(f"  Mean: {rfm_customers['frequency'].mean():.1f} transactions")
-print(f"  Median: {rfm_customers['frequency'].median():.1f} transactions")
-print(f"  Range: {rfm_customers['frequency'].min()}-{rfm_customers['frequency'].max()} transactions")
-
-print("\nMonetary Total (total spent):")
-print(f"  Mean: ${rfm_customers['monetary_total'].mean():.2f}")
-print(f"  Median: ${rfm_customers['monetary_total'].median():.2f}")
-print(f"  Range: ${rfm_customers['monetary_total'].min():.2f}-${rfm_customers['monetary_total'].max():.2f}")
-
-# Save RFM data
-rfm_customers.to_csv('data/processed/rfm_analysis.csv', index=False)
-print(f"\n✅ RFM data saved to data/processed/rfm_analysis.csv")
-
-# Preview the data
-print("\n=== SAMPLE RFM DATA ===")
-print(rfm_customers.head(10))
-
-print("\n✅ Step 2 completed successfully!")
-print("Next: Run Step 3 (K-means Clustering) or proceed to SQL database setup")
+ANALYSIS_DATE = datetime(2024, 12, 31)
+DEMOGRAPHICS = ['customer_id', 'age', 'gender', 'behavior_type']
+TRANSACTION_COLUMNS = ['customer_id', 'transaction_id', 'transaction_date', 'amount']
+
+
+def rfm_metrics(transactions_df, analysis_day):
+    """Recency/frequency/monetary metrics, one row per customer in id order."""
+    # Calculate RFM (Recency, Frequency, Monetary) metrics
+    rfm_data = transactions_df.groupby('customer_id').agg({
+        'transaction_date': 'max',  # Recency (last purchase day)
+        'transaction_id': 'count',  # Frequency
+        'amount': ['sum', 'mean']  # Monetary (cents)
+    })
+
+    # Flatten column names
+    rfm_data.columns = ['recency', 'frequency', 'monetary_total', 'monetary_avg']
+    rfm_data['recency'] = analysis_day - rfm_data['recency']
+    rfm_data['monetary_avg'] = rfm_data['monetary_avg'].round()
+    return apply_schema(rfm_data.reset_index())
+
+
+def compute_rfm(customers_df, transactions_df, analysis_date=ANALYSIS_DATE):
+    """Per-customer recency/frequency/monetary metrics joined to demographics."""
+    rfm_data = rfm_metrics(transactions_df, day_numbers(analysis_date))
+
+    # Both sides are in customer_id order, so demographics are merge-joined
+    return merge_join(rfm_data, customers_df[DEMOGRAPHICS])
+
+
+def rfm_metric_chunks(transaction_chunks, analysis_day):
+    """RFM metrics per chunk of customer_id-sorted transactions."""
+    for chunk in whole_customer_chunks(transaction_chunks):
+        yield rfm_metrics(chunk, analysis_day)
+
+
+def compute_rfm_streaming(chunksize, analysis_date=ANALYSIS_DATE):
+    """``compute_rfm`` over the CSVs in chunks of ``chunksize`` rows."""
+    transactions = load_table('transactions', usecols=TRANSACTION_COLUMNS, chunksize=chunksize)
+    customers = load_table('customers', usecols=DEMOGRAPHICS, chunksize=chunksize)
+    parts = stream_merge_join(rfm_metric_chunks(transactions, day_numbers(analysis_date)), customers)
+    return apply_schema(pd.concat(parts, ignore_index=True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 2: RFM analysis')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream the raw CSVs in chunks of this many rows instead of loading them')
+    args = parser.parse_args(argv)
+
+    # Ensure directories exist
+    os.makedirs('data/processed', exist_ok=True)
+
+    print("Step 2: Loading data and calculating RFM metrics...")
+    start_stage('rfm')
+
+    if args.chunksize:
+        # Stream both CSVs (sorted by customer_id) through a merge-join
+        print(f"Calculating RFM metrics in chunks of {args.chunksize:,} rows...")
+        with span('rfm aggregation (streaming)') as s:
+            rfm_customers = compute_rfm_streaming(args.chunksize)
+            s.rows = len(rfm_customers)
+    else:
+        # Load the data we created in Step 1 (compact dtypes: dates as day
+        # numbers, amounts as integer cents)
+        with span('load') as s:
+            customers_df = load_table('customers')
+            transactions_df = load_table('transactions')
+            s.rows = len(customers_df) + len(transactions_df)
+
+        print(f"Loaded {len(customers_df)} customers and {len(transactions_df)} transactions")
+
+        print("Calculating RFM metrics...")
+
+        with span('rfm aggregation', rows=len(transactions_df)):
+            rfm_customers = compute_rfm(customers_df, transactions_df)
+
+    print(f"RFM analysis completed for {len(rfm_customers)} customers")
+
+    # Display RFM summary statistics
+    print("\n=== RFM ANALYSIS SUMMARY ===")
+    print("Recency (days since last purchase):")
+    print(f"  Mean: {rfm_customers['recency'].mean():.1f} days")
+    print(f"  Median: {rfm_customers['recency'].median():.1f} days")
+    print(f"  Range: {rfm_customers['recency'].min()}-{rfm_customers['recency'].max()} days")
+
+    print("\nFrequency (number of transactions):")
+    print(f"  Mean: {rfm_customers['frequency'].mean():.1f} transactions")
+    print(f"  Median: {rfm_customers['frequency'].median():.1f} transactions")
+    print(f"  Range: {rfm_customers['frequency'].min()}-{rfm_customers['frequency'].max()} transactions")
+
+    print("\nMonetary Total (total spent):")
+    monetary_total = dollars(rfm_customers['monetary_total'])
+    print(f"  Mean: ${monetary_total.mean():.2f}")
+    print(f"  Median: ${monetary_total.median():.2f}")
+    print(f"  Range: ${monetary_total.min():.2f}-${monetary_total.max():.2f}")
+
+    # Save RFM data
+    with span('save', rows=len(rfm_customers)):
+        save_table(rfm_customers, 'data/processed/rfm_analysis.csv')
+    print(f"\n✅ RFM data saved to data/processed/rfm_analysis.csv")
+
+    # Start a fresh feature store for this customer base; later stages add
+    # their per-customer columns to it instead of re-merging tables
+    with span('feature store', rows=len(rfm_customers)):
+        store = FeatureStore()
+        store.reset()
+        store.put(rfm_customers)
+    print(f"✅ Feature store rebuilt in {store.root}/ ({len(store.columns)} columns)")
+
+    # Preview the data
+    print("\n=== SAMPLE RFM DATA ===")
+    print(to_external(rfm_customers.head(10)))
+
+    finish_stage()
+    print("\n✅ Step 2 completed successfully!")
+    print("Next: Run Step 3 (K-means Clustering) or proceed to SQL database setup")
+
+
+if __name__ == '__main__':
+    main()
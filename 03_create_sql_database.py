@@ -1,20 +1,19 @@
 import sqlite3
-import pandas as pd
 import os
+import argparse
 
-print("Step 3: Creating SQL Database...")
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.schema import load_table, to_external, check_key_order
 
-# Create sql directory
-os.makedirs('sql', exist_ok=True)
+DATABASE_PATH = 'data/marketing_analysis.db'
 
-# Connect to SQLite database (creates if doesn't exist)
-conn = sqlite3.connect('data/marketing_analysis.db')
-cursor = conn.cursor()
-
-print("Connected to SQLite database")
-
-# Create customers table
-cursor.execute('''
+# Customers, transactions and RFM analysis tables. customer_id is the
+# INTEGER PRIMARY KEY (SQLite's rowid) of the per-customer tables and the
+# rows arrive in customer_id order, so joins on it are B-tree lookups/scans
+# in key order rather than temporary hash indexes
+TABLE_NAMES = ['customers', 'transactions', 'rfm_analysis']
+TABLE_DDL = [
+    '''
 CREATE TABLE IF NOT EXISTS customers (
     customer_id INTEGER PRIMARY KEY,
     age INTEGER,
@@ -22,10 +21,8 @@ CREATE TABLE IF NOT EXISTS customers (
     registration_date DATE,
     behavior_type TEXT
 )
-''')
-
-# Create transactions table
-cursor.execute('''
+''',
+    '''
 CREATE TABLE IF NOT EXISTS transactions (
     transaction_id INTEGER PRIMARY KEY,
     customer_id INTEGER,
@@ -34,10 +31,9 @@ CREATE TABLE IF NOT EXISTS transactions (
     category TEXT,
     FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
 )
-''')
-
-# Create RFM analysis table
-cursor.execute('''
+''',
+    'CREATE INDEX IF NOT EXISTS idx_transactions_customer ON transactions (customer_id)',
+    '''
 CREATE TABLE IF NOT EXISTS rfm_analysis (
     customer_id INTEGER PRIMARY KEY,
     recency INTEGER,
@@ -49,63 +45,11 @@ CREATE TABLE IF NOT EXISTS rfm_analysis (
     behavior_type TEXT,
     FOREIGN KEY (customer_id) REFERENCES customers(customer_id)
 )
-''')
-
-print("Database tables created successfully")
-
-# Load and insert data
-print("Loading data into database...")
-
-# Load customers data
-customers_df = pd.read_csv('data/raw/customers.csv')
-customers_df.to_sql('customers', conn, if_exists='replace', index=False)
-print(f"Inserted {len(customers_df)} customers")
-
-# Load transactions data
-transactions_df = pd.read_csv('data/raw/transactions.csv')
-transactions_df.to_sql('transactions', conn, if_exists='replace', index=False)
-print(f"Inserted {len(transactions_df)} transactions")
-
-# Load RFM data (if it exists)
-try:
-    rfm_df = pd.read_csv('data/processed/rfm_analysis.csv')
-    rfm_df.to_sql('rfm_analysis', conn, if_exists='replace', index=False)
-    print(f"Inserted {len(rfm_df)} RFM records")
-except FileNotFoundError:
-    print("RFM analysis file not found. Run Step 2 first!")
-
-# Test queries
-print("\n=== TESTING DATABASE ===")
-
-# Test query 1: Customer count by behavior type
-print("Customer count by behavior type:")
-result = cursor.execute('''
-    SELECT behavior_type, COUNT(*) as customer_count
-    FROM customers
-    GROUP BY behavior_type
-    ORDER BY customer_count DESC
-''').fetchall()
-
-for row in result:
-    print(f"  {row[0]}: {row[1]}")
-
-# Test query 2: Total revenue by category
-print("\nTotal revenue by category:")
-result = cursor.execute('''
-    SELECT category, 
-           COUNT(*) as transaction_count,
-           ROUND(SUM(amount), 2) as total_revenue,
-           ROUND(AVG(amount), 2) as avg_transaction
-    FROM transactions
-    GROUP BY category
-    ORDER BY total_revenue DESC
-''').fetchall()
-
-for row in result:
-    print(f"  {row[0]}: {row[1]} transactions, ${row[2]} revenue, ${row[3]} avg")
-
-# Save SQL queries for future use
-sql_queries = '''
+''',
+]
+
+# Saved to sql/analysis_queries.sql for future use
+ANALYSIS_QUERIES = '''
 -- Customer segmentation summary
 SELECT 
     behavior_type,
@@ -157,11 +101,108 @@ JOIN customers c ON r.customer_id = c.customer_id
 ORDER BY r.monetary_total DESC;
 '''
 
-# Save queries to file
-with open('sql/analysis_queries.sql', 'w') as f:
-    f.write(sql_queries)
 
-conn.close()
-print(f"\n✅ Database created successfully: data/marketing_analysis.db")
-print("✅ SQL queries saved to: sql/analysis_queries.sql")
-print("\n✅ Step 3 completed successfully!")
+def create_tables(cursor):
+    # Recreate the tables so every run starts from the keyed schema
+    for name in TABLE_NAMES:
+        cursor.execute(f'DROP TABLE IF EXISTS {name}')
+    for ddl in TABLE_DDL:
+        cursor.execute(ddl)
+
+
+def insert_table(df, name, conn):
+    """Append a customer_id-sorted table to its keyed SQLite table."""
+    check_key_order(df, name)
+    to_external(df).to_sql(name, conn, if_exists='append', index=False)
+    conn.commit()
+
+
+def main(argv=None):
+    argparse.ArgumentParser(description='Step 3: load the SQLite analysis database').parse_args(argv)
+
+    print("Step 3: Creating SQL Database...")
+    start_stage('sql')
+
+    # Create sql directory
+    os.makedirs('sql', exist_ok=True)
+
+    # Connect to SQLite database (creates if doesn't exist)
+    conn = sqlite3.connect(DATABASE_PATH)
+    cursor = conn.cursor()
+
+    print("Connected to SQLite database")
+
+    create_tables(cursor)
+    print("Database tables created successfully")
+
+    # Load and insert data
+    print("Loading data into database...")
+
+    # Load customers data (compact dtypes in memory, dollars/ISO dates in SQL)
+    with span('insert customers') as s:
+        customers_df = load_table('customers')
+        insert_table(customers_df, 'customers', conn)
+        s.rows = len(customers_df)
+    print(f"Inserted {len(customers_df)} customers")
+
+    # Load transactions data
+    with span('insert transactions') as s:
+        transactions_df = load_table('transactions')
+        insert_table(transactions_df, 'transactions', conn)
+        s.rows = len(transactions_df)
+    print(f"Inserted {len(transactions_df)} transactions")
+
+    # Load RFM data (if it exists)
+    try:
+        with span('insert rfm_analysis') as s:
+            rfm_df = load_table('rfm_analysis')
+            insert_table(rfm_df, 'rfm_analysis', conn)
+            s.rows = len(rfm_df)
+        print(f"Inserted {len(rfm_df)} RFM records")
+    except FileNotFoundError:
+        print("RFM analysis file not found. Run Step 2 first!")
+
+    # Test queries
+    print("\n=== TESTING DATABASE ===")
+
+    with span('test queries'):
+        # Test query 1: Customer count by behavior type
+        print("Customer count by behavior type:")
+        result = cursor.execute('''
+            SELECT behavior_type, COUNT(*) as customer_count
+            FROM customers
+            GROUP BY behavior_type
+            ORDER BY customer_count DESC
+        ''').fetchall()
+
+        for row in result:
+            print(f"  {row[0]}: {row[1]}")
+
+        # Test query 2: Total revenue by category
+        print("\nTotal revenue by category:")
+        result = cursor.execute('''
+            SELECT category, 
+                   COUNT(*) as transaction_count,
+                   ROUND(SUM(amount), 2) as total_revenue,
+                   ROUND(AVG(amount), 2) as avg_transaction
+            FROM transactions
+            GROUP BY category
+            ORDER BY total_revenue DESC
+        ''').fetchall()
+
+        for row in result:
+            print(f"  {row[0]}: {row[1]} transactions, ${row[2]} revenue, ${row[3]} avg")
+
+    # Save queries to file
+    with open('sql/analysis_queries.sql', 'w') as f:
+        f.write(ANALYSIS_QUERIES)
+
+    conn.close()
+    finish_stage()
+    print(f"\n✅ Database created successfully: {DATABASE_PATH}")
+    print("✅ SQL queries saved to: sql/analysis_queries.sql")
+    print("\n✅ Step 3 completed successfully!")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,111 +1,27 @@
-import pandas as pd
 import numpy as np
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import silhouette_score
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
+import json
 import os
 
-# Ensure directories exist
-os.makedirs('data/processed', exist_ok=True)
-os.makedirs('data/results', exist_ok=True)
-
-print("Step 4: Performing K-means clustering...")
-
-# Load RFM data from Step 2
-rfm_customers = pd.read_csv('data/processed/rfm_analysis.csv')
-print(f"Loaded {len(rfm_customers)} customers for clustering")
-
-# Prepare features for clustering
-features_for_clustering = ['recency', 'frequency', 'monetary_total', 'monetary_avg', 'age']
-X = rfm_customers[features_for_clustering].fillna(0)
-
-print("Selected features for clustering:", features_for_clustering)
-
-# Standardize features (very important for K-means!)
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-print("Features standardized successfully")
-
-# Find optimal number of clusters using elbow method and silhouette score
-print("Finding optimal number of clusters...")
-
-inertias = []
-silhouette_scores = []
-k_range = range(2, 8)
-
-for k in k_range:
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    kmeans.fit(X_scaled)
-    inertias.append(kmeans.inertia_)
-    silhouette_scores.append(silhouette_score(X_scaled, kmeans.labels_))
-    print(f"k={k}: Inertia={kmeans.inertia_:.2f}, Silhouette={silhouette_score(X_scaled, kmeans.labels_):.3f}")
-
-# Plot optimization curves
-plt.figure(figsize=(15, 5))
-
-# Elbow curve
-plt.subplot(1, 3, 1)
-plt.plot(k_range, inertias, 'bo-', linewidth=2, markersize=8)
-plt.xlabel('Number of Clusters (k)')
-plt.ylabel('Inertia')
-plt.title('Elbow Method For Optimal k')
-plt.grid(True, alpha=0.3)
-
-# Silhouette score
-plt.subplot(1, 3, 2)
-plt.plot(k_range, silhouette_scores, 'ro-', linewidth=2, markersize=8)
-plt.xlabel('Number of Clusters (k)')
-plt.ylabel('Silhouette Score')
-plt.title('Silhouette Score vs k')
-plt.grid(True, alpha=0.3)
-
-# Apply K-means with 4 clusters (as required by your resume)
-print("\nApplying K-means with 4 clusters...")
-kmeans_final = KMeans(n_clusters=4, random_state=42, n_init=10)
-clusters = kmeans_final.fit_predict(X_scaled)
-
-# Add cluster labels to data
-rfm_customers['cluster'] = clusters
-
-# Calculate final silhouette score
-final_silhouette = silhouette_score(X_scaled, clusters)
-print(f"Final silhouette score with 4 clusters: {final_silhouette:.3f}")
-
-# Cluster visualization
-plt.subplot(1, 3, 3)
-scatter = plt.scatter(rfm_customers['frequency'], rfm_customers['monetary_total'], 
-                     c=clusters, cmap='viridis', alpha=0.6, s=50)
-plt.xlabel('Frequency (Number of Transactions)')
-plt.ylabel('Monetary Total ($)')
-plt.title('Customer Segments\n(Frequency vs Monetary)')
-plt.colorbar(scatter)
-
-plt.tight_layout()
-plt.savefig('data/results/cluster_optimization.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-# Analyze segments in detail
-print("\n=== CUSTOMER SEGMENT ANALYSIS ===")
-
-segment_analysis = rfm_customers.groupby('cluster').agg({
-    'customer_id': 'count',
-    'recency': 'mean',
-    'frequency': 'mean',
-    'monetary_total': 'mean',
-    'monetary_avg': 'mean',
-    'age': 'mean'
-}).round(2)
-
-segment_analysis.columns = ['customer_count', 'avg_recency', 'avg_frequency', 
-                           'avg_total_spent', 'avg_order_value', 'avg_age']
-
-print("Customer Segment Characteristics:")
-print(segment_analysis)
+from insightx.feature_store import FeatureStore, read_features
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import merge_join
+from insightx.schema import TABLE_PATHS, load_table, save_table, dollars
+from insightx.rendering import headless_requested, configure_backend, bin_points, binned_scatter
+from insightx.rfm_windows import fill_inactive
+from insightx.scoring import save_cluster_model
+
+FEATURES_FOR_CLUSTERING = ['recency', 'frequency', 'monetary_total', 'monetary_avg', 'age']
+# Step 2's RFM columns, read from the feature store (or rfm_analysis.csv)
+RFM_COLUMNS = FEATURES_FOR_CLUSTERING + ['gender', 'behavior_type']
+# Added with --windowed-features: recent activity from Step 15 and its 1-5 R/F/M scores
+WINDOWED_FEATURES = ['frequency_30d', 'frequency_90d', 'monetary_90d', 'r_score', 'f_score', 'm_score']
+K_RANGE = range(2, 8)
+# Columns this step adds to the feature store
+SEGMENT_COLUMNS = ['cluster', 'segment_name', 'segment_description', 'segment_strategy']
 
 # Define segment names based on characteristics
-segment_definitions = {
+SEGMENT_DEFINITIONS = {
     0: {
         'name': 'Champions',
         'description': 'High-value, frequent, recent customers',
@@ -113,7 +29,7 @@ segment_definitions = {
         'color': '#FF6B6B'
     },
     1: {
-        'name': 'Loyal Customers', 
+        'name': 'Loyal Customers',
         'description': 'Regular customers with good monetary value',
         'strategy': 'Upsell and cross-sell opportunities',
         'color': '#4ECDC4'
@@ -132,28 +48,221 @@ segment_definitions = {
     }
 }
 
-# Add segment names and strategies to data
-rfm_customers['segment_name'] = rfm_customers['cluster'].map(lambda x: segment_definitions[x]['name'])
-rfm_customers['segment_description'] = rfm_customers['cluster'].map(lambda x: segment_definitions[x]['description'])
-rfm_customers['segment_strategy'] = rfm_customers['cluster'].map(lambda x: segment_definitions[x]['strategy'])
-
-# Print segment summary
-print("\nSegment Definitions:")
-for cluster_id, details in segment_definitions.items():
-    count = len(rfm_customers[rfm_customers['cluster'] == cluster_id])
-    percentage = (count / len(rfm_customers)) * 100
-    print(f"\nCluster {cluster_id} - {details['name']}: {count} customers ({percentage:.1f}%)")
-    print(f"  Description: {details['description']}")
-    print(f"  Strategy: {details['strategy']}")
-
-# Save final segmented data
-rfm_customers.to_csv('data/processed/customer_segments.csv', index=False)
-print(f"\n✅ Customer segments saved to data/processed/customer_segments.csv")
-
-# Save segment definitions for later use
-import json
-with open('data/processed/segment_definitions.json', 'w') as f:
-    json.dump(segment_definitions, f, indent=2)
 
-print("✅ Step 4 completed successfully!")
-print("Next: Run Step 5 (Marketing Strategy Development)")
+def standardize(rfm_customers, features=FEATURES_FOR_CLUSTERING):
+    """Fitted StandardScaler and the scaled feature matrix."""
+    from sklearn.preprocessing import StandardScaler
+    missing = rfm_customers[features].isna().sum()
+    if missing.any():
+        # A gap here means a bad raw row got through; zero would cluster it as a real value
+        raise ValueError(f"Missing clustering features: {missing[missing > 0].to_dict()}. "
+                         f"Run Step 14 (insightx run ingest) and Step 2 again.")
+    scaler = StandardScaler()
+    return scaler, scaler.fit_transform(rfm_customers[features])
+
+
+def windowed_features(rfm_customers, columns=WINDOWED_FEATURES):
+    """Step 15 window features as of its latest date, aligned to ``rfm_customers``.
+
+    Customers with no purchase on or before that date have no Step 15 row;
+    they count as inactive in every window rather than as missing values.
+    """
+    if not os.path.exists(TABLE_PATHS['rfm_windows']):
+        raise SystemExit("No window features found. Run Step 15 (insightx run rfm_windows) first!")
+    windows = load_table('rfm_windows', usecols=['customer_id', 'as_of_date'] + columns)
+    latest = windows[windows['as_of_date'] == windows['as_of_date'].max()]
+    joined = merge_join(rfm_customers[['customer_id']], latest[['customer_id'] + columns], how='left')
+    return fill_inactive(joined)
+
+
+def sweep_k(X_scaled, k_range=K_RANGE):
+    """Inertia and silhouette score for each candidate k (elbow method)."""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+
+    inertias = []
+    silhouette_scores = []
+    with span('k sweep', rows=len(X_scaled) * len(k_range)):
+        for k in k_range:
+            with span(f'k={k}'):
+                with span('fit', rows=len(X_scaled)):
+                    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+                    kmeans.fit(X_scaled)
+                inertias.append(kmeans.inertia_)
+                with span('silhouette', rows=len(X_scaled)):
+                    silhouette_scores.append(silhouette_score(X_scaled, kmeans.labels_))
+            print(f"k={k}: Inertia={kmeans.inertia_:.2f}, Silhouette={silhouette_scores[-1]:.3f}")
+    return inertias, silhouette_scores
+
+
+def fit_segments(X_scaled, n_clusters=4):
+    """Final K-means model, its labels and their silhouette score."""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score
+
+    with span('final fit', rows=len(X_scaled)):
+        kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
+        clusters = kmeans.fit_predict(X_scaled)
+    with span('final silhouette', rows=len(X_scaled)):
+        silhouette = silhouette_score(X_scaled, clusters)
+    return kmeans, clusters, silhouette
+
+
+def plot_cluster_optimization(k_range, inertias, silhouette_scores, rfm_customers, clusters, path):
+    import matplotlib.pyplot as plt
+
+    # Plot optimization curves
+    plt.figure(figsize=(15, 5))
+
+    # Elbow curve
+    plt.subplot(1, 3, 1)
+    plt.plot(k_range, inertias, 'bo-', linewidth=2, markersize=8)
+    plt.xlabel('Number of Clusters (k)')
+    plt.ylabel('Inertia')
+    plt.title('Elbow Method For Optimal k')
+    plt.grid(True, alpha=0.3)
+
+    # Silhouette score
+    plt.subplot(1, 3, 2)
+    plt.plot(k_range, silhouette_scores, 'ro-', linewidth=2, markersize=8)
+    plt.xlabel('Number of Clusters (k)')
+    plt.ylabel('Silhouette Score')
+    plt.title('Silhouette Score vs k')
+    plt.grid(True, alpha=0.3)
+
+    # Cluster visualization
+    plt.subplot(1, 3, 3)
+    # Pre-binned scatter: one marker per occupied (cluster, bin) cell
+    binned = bin_points(rfm_customers['frequency'], dollars(rfm_customers['monetary_total']), clusters)
+    scatter = binned_scatter(plt.gca(), binned, cmap='viridis')
+    plt.xlabel('Frequency (Number of Transactions)')
+    plt.ylabel('Monetary Total ($)')
+    plt.title('Customer Segments\n(Frequency vs Monetary)')
+    plt.colorbar(scatter)
+
+    with span('save figure'):
+        plt.tight_layout()
+        plt.savefig(path, dpi=300, bbox_inches='tight')
+    return plt
+
+
+def name_segments(rfm_customers, segment_definitions=SEGMENT_DEFINITIONS):
+    """Add segment names and strategies to the clustered customers."""
+    rfm_customers['segment_name'] = rfm_customers['cluster'].map(lambda x: segment_definitions[x]['name'])
+    rfm_customers['segment_description'] = rfm_customers['cluster'].map(lambda x: segment_definitions[x]['description'])
+    rfm_customers['segment_strategy'] = rfm_customers['cluster'].map(lambda x: segment_definitions[x]['strategy'])
+    return rfm_customers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 4: K-means customer segmentation')
+    parser.add_argument('--headless', action='store_true',
+                        help='use the non-interactive Agg backend and skip plt.show()')
+    parser.add_argument('--windowed-features', action='store_true',
+                        help='also cluster on Step 15 trailing-window features and R/F/M scores')
+    args = parser.parse_args(argv)
+
+    # Use the non-interactive backend for batch runs (--headless or INSIGHTX_HEADLESS=1)
+    headless = configure_backend(args.headless or headless_requested([]))
+
+    # Ensure directories exist
+    os.makedirs('data/processed', exist_ok=True)
+    os.makedirs('data/results', exist_ok=True)
+
+    print("Step 4: Performing K-means clustering...")
+    start_stage('clustering')
+
+    # Load RFM data from Step 2
+    with span('load') as s:
+        rfm_customers = read_features('rfm_analysis', RFM_COLUMNS)
+        s.rows = len(rfm_customers)
+    print(f"Loaded {len(rfm_customers)} customers for clustering")
+
+    features = FEATURES_FOR_CLUSTERING
+    feature_frame = rfm_customers
+    if args.windowed_features:
+        features = FEATURES_FOR_CLUSTERING + WINDOWED_FEATURES
+        with span('load window features', rows=len(rfm_customers)):
+            windowed = windowed_features(rfm_customers)
+            feature_frame = rfm_customers[FEATURES_FOR_CLUSTERING].assign(
+                **{column: windowed[column].to_numpy() for column in WINDOWED_FEATURES})
+    print("Selected features for clustering:", features)
+
+    # Standardize features (very important for K-means!)
+    with span('standardize', rows=len(rfm_customers)):
+        scaler, X_scaled = standardize(feature_frame, features)
+    print("Features standardized successfully")
+
+    # Find optimal number of clusters using elbow method and silhouette score
+    print("Finding optimal number of clusters...")
+    inertias, silhouette_scores = sweep_k(X_scaled)
+
+    # Apply K-means with 4 clusters (as required by your resume)
+    print("\nApplying K-means with 4 clusters...")
+    kmeans_final, clusters, final_silhouette = fit_segments(X_scaled)
+
+    # Add cluster labels to data
+    rfm_customers['cluster'] = clusters.astype(np.int8)
+    print(f"Final silhouette score with 4 clusters: {final_silhouette:.3f}")
+
+    plt = plot_cluster_optimization(K_RANGE, inertias, silhouette_scores, rfm_customers, clusters,
+                                    'data/results/cluster_optimization.png')
+    if not headless:
+        plt.show()
+
+    # Analyze segments in detail
+    print("\n=== CUSTOMER SEGMENT ANALYSIS ===")
+
+    # Money columns are integer cents in memory; report them in dollars
+    segment_analysis = rfm_customers.assign(
+        monetary_total=dollars(rfm_customers['monetary_total']),
+        monetary_avg=dollars(rfm_customers['monetary_avg'])
+    ).groupby('cluster').agg({
+        'customer_id': 'count',
+        'recency': 'mean',
+        'frequency': 'mean',
+        'monetary_total': 'mean',
+        'monetary_avg': 'mean',
+        'age': 'mean'
+    }).round(2)
+
+    segment_analysis.columns = ['customer_count', 'avg_recency', 'avg_frequency',
+                               'avg_total_spent', 'avg_order_value', 'avg_age']
+
+    print("Customer Segment Characteristics:")
+    print(segment_analysis)
+
+    name_segments(rfm_customers)
+
+    # Print segment summary
+    print("\nSegment Definitions:")
+    for cluster_id, details in SEGMENT_DEFINITIONS.items():
+        count = len(rfm_customers[rfm_customers['cluster'] == cluster_id])
+        percentage = (count / len(rfm_customers)) * 100
+        print(f"\nCluster {cluster_id} - {details['name']}: {count} customers ({percentage:.1f}%)")
+        print(f"  Description: {details['description']}")
+        print(f"  Strategy: {details['strategy']}")
+
+    # Save final segmented data
+    with span('save', rows=len(rfm_customers)):
+        save_table(rfm_customers, 'data/processed/customer_segments.csv')
+    print(f"\n✅ Customer segments saved to data/processed/customer_segments.csv")
+    with span('feature store', rows=len(rfm_customers)):
+        FeatureStore().put(rfm_customers, SEGMENT_COLUMNS)
+
+    # Save segment definitions for later use
+    with open('data/processed/segment_definitions.json', 'w') as f:
+        json.dump(SEGMENT_DEFINITIONS, f, indent=2)
+
+    # Save the scaler and centroids so single customers can be scored without sklearn
+    save_cluster_model(scaler, kmeans_final, features,
+                       {cluster: details['name'] for cluster, details in SEGMENT_DEFINITIONS.items()})
+    print("✅ Cluster model saved to data/processed/cluster_model.json")
+
+    finish_stage()
+    print("✅ Step 4 completed successfully!")
+    print("Next: Run Step 5 (Marketing Strategy Development)")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,19 +2,15 @@ import pandas as pd
 import numpy as np
 import json
 import os
+import argparse
 
-print("Step 5: Developing targeted marketing strategies...")
-
-# Load segmented customer data
-customer_segments = pd.read_csv('data/processed/customer_segments.csv')
-print(f"Loaded {len(customer_segments)} segmented customers")
-
-# Load segment definitions
-with open('data/processed/segment_definitions.json', 'r') as f:
-    segment_definitions = json.load(f)
+from insightx.feature_store import FeatureStore, read_features
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import merge_join
+from insightx.schema import TABLE_PATHS, save_table, apply_schema
 
 # Define detailed campaign strategies for each segment
-campaign_strategies = {
+CAMPAIGN_STRATEGIES = {
     0: {  # Champions
         'email_subject_generic': 'Check Out Our Latest Offers',
         'email_subject_targeted': 'Exclusive VIP Access - New Premium Collection',
@@ -53,53 +49,102 @@ campaign_strategies = {
     }
 }
 
-# Create detailed campaign assignments
-print("Creating campaign assignments...")
-
-campaign_data = []
-for _, customer in customer_segments.iterrows():
-    cluster = int(customer['cluster'])  # Ensure integer key
-    strategy = campaign_strategies[cluster]
-    
-    campaign_data.append({
-        'customer_id': customer['customer_id'],
-        'cluster': cluster,
-        'segment_name': customer['segment_name'],
-        'age': customer['age'],
-        'gender': customer['gender'],
-        'recency': customer['recency'],
-        'frequency': customer['frequency'],
-        'monetary_total': customer['monetary_total'],
-        'email_subject_generic': strategy['email_subject_generic'],
-        'email_subject_targeted': strategy['email_subject_targeted'],
-        'discount_percent': strategy['discount_percent'],
-        'campaign_type': strategy['campaign_type'],
-        'expected_ctr_base': strategy['expected_ctr_base'],
-        'send_frequency': strategy['send_frequency'],
-        'channel_priority': strategy['channel_priority']
-    })
-
-campaign_df = pd.DataFrame(campaign_data)
-print(f"Campaign strategies assigned to {len(campaign_df)} customers")
-
-# Display campaign summary
-print("\n=== CAMPAIGN STRATEGY SUMMARY ===")
-campaign_summary = campaign_df.groupby(['segment_name', 'campaign_type']).agg({
-    'customer_id': 'count',
-    'discount_percent': 'first',
-    'expected_ctr_base': 'first'
-}).round(3)
-
-campaign_summary.columns = ['customer_count', 'discount_percent', 'expected_ctr']
-print(campaign_summary)
-
-# Save campaign data
-campaign_df.to_csv('data/processed/campaign_assignments.csv', index=False)
-
-# Save campaign strategies for reference
-with open('data/processed/campaign_strategies.json', 'w') as f:
-    json.dump(campaign_strategies, f, indent=2)
-
-print(f"\n✅ Campaign assignments saved to data/processed/campaign_assignments.csv")
-print("✅ Step 5 completed successfully!")
-print("Next: Run Step 6 (A/B Testing Setup)")
+# Segmented customer columns this step reads from the feature store
+SEGMENT_COLUMNS = ['cluster', 'segment_name', 'age', 'gender', 'recency', 'frequency', 'monetary_total']
+# Columns this step adds to the feature store
+STRATEGY_COLUMNS = list(CAMPAIGN_STRATEGIES[0])
+
+
+def assign_campaigns(customer_segments, strategies=CAMPAIGN_STRATEGIES):
+    """One campaign assignment row per customer, from its cluster's strategy."""
+    campaign_data = []
+    for _, customer in customer_segments.iterrows():
+        cluster = int(customer['cluster'])  # Ensure integer key
+        strategy = strategies[cluster]
+
+        campaign_data.append({
+            'customer_id': customer['customer_id'],
+            'cluster': cluster,
+            'segment_name': customer['segment_name'],
+            'age': customer['age'],
+            'gender': customer['gender'],
+            'recency': customer['recency'],
+            'frequency': customer['frequency'],
+            'monetary_total': customer['monetary_total'],
+            'email_subject_generic': strategy['email_subject_generic'],
+            'email_subject_targeted': strategy['email_subject_targeted'],
+            'discount_percent': strategy['discount_percent'],
+            'campaign_type': strategy['campaign_type'],
+            'expected_ctr_base': strategy['expected_ctr_base'],
+            'send_frequency': strategy['send_frequency'],
+            'channel_priority': strategy['channel_priority']
+        })
+    return apply_schema(pd.DataFrame(campaign_data))
+
+
+def main(argv=None):
+    argparse.ArgumentParser(description='Step 5: assign campaign strategies per segment').parse_args(argv)
+
+    print("Step 5: Developing targeted marketing strategies...")
+    start_stage('strategies')
+
+    # Load segmented customer data
+    with span('load') as s:
+        store = FeatureStore()
+        customer_segments = read_features('customer_segments', SEGMENT_COLUMNS, store)
+        s.rows = len(customer_segments)
+    print(f"Loaded {len(customer_segments)} segmented customers")
+
+    # Load segment definitions
+    with open('data/processed/segment_definitions.json', 'r') as f:
+        segment_definitions = json.load(f)
+
+    # Create detailed campaign assignments
+    print("Creating campaign assignments...")
+
+    with span('assign campaigns', rows=len(customer_segments)):
+        campaign_df = assign_campaigns(customer_segments)
+    print(f"Campaign strategies assigned to {len(campaign_df)} customers")
+
+    # Point each customer's offer at the category they are most likely to buy
+    # next, from Step 11's co-purchase lift (skipped if it has not been run)
+    store_columns = STRATEGY_COLUMNS
+    if store.has(['next_category']) or os.path.exists(TABLE_PATHS['category_affinity']):
+        affinity = read_features('category_affinity', ['next_category'], store)
+        campaign_df = merge_join(campaign_df, affinity.rename(columns={'next_category': 'recommended_category'}),
+                                 how='left')
+        store_columns = STRATEGY_COLUMNS + ['recommended_category']
+        cross_sell = campaign_df[campaign_df['campaign_type'] == 'Cross-Sell Campaign']
+        print(f"\nCross-sell targets by recommended category ({len(cross_sell)} customers):")
+        for category, count in cross_sell['recommended_category'].value_counts().items():
+            print(f"  {category}: {count}")
+
+    # Display campaign summary
+    print("\n=== CAMPAIGN STRATEGY SUMMARY ===")
+    campaign_summary = campaign_df.groupby(['segment_name', 'campaign_type'], observed=True).agg({
+        'customer_id': 'count',
+        'discount_percent': 'first',
+        'expected_ctr_base': 'first'
+    }).round(3)
+
+    campaign_summary.columns = ['customer_count', 'discount_percent', 'expected_ctr']
+    print(campaign_summary)
+
+    # Save campaign data
+    with span('save', rows=len(campaign_df)):
+        save_table(campaign_df, 'data/processed/campaign_assignments.csv')
+    with span('feature store', rows=len(campaign_df)):
+        store.put(campaign_df, store_columns)
+
+    # Save campaign strategies for reference
+    with open('data/processed/campaign_strategies.json', 'w') as f:
+        json.dump(CAMPAIGN_STRATEGIES, f, indent=2)
+
+    finish_stage()
+    print(f"\n✅ Campaign assignments saved to data/processed/campaign_assignments.csv")
+    print("✅ Step 5 completed successfully!")
+    print("Next: Run Step 6 (A/B Testing Setup)")
+
+
+if __name__ == '__main__':
+    main()
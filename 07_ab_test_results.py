@@ -1,122 +1,198 @@
 import pandas as pd
 import numpy as np
-import os
-
-print("Step 7: Simulating A/B test results...")
-
-# Load A/B test setup
-ab_test_df = pd.read_csv('data/processed/ab_test_setup.csv')
-print(f"Loaded A/B test setup for {len(ab_test_df)} customers")
-
-# Set random seed for reproducible results
-np.random.seed(42)
-
-# Simulate email campaign results
-print("Simulating email campaign performance...")
-
-ab_results = []
-
-for _, customer in ab_test_df.iterrows():
-    # Simulate whether customer clicked (based on expected CTR)
-    clicked = 1 if np.random.random() < customer['expected_ctr'] else 0
+import argparse
+
+from insightx.feature_store import FeatureStore, read_features
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.rollups import RollupStore
+from insightx.schema import save_table, apply_schema, to_cents, dollars, day_numbers
+
+# Window over which campaign emails are sent (one send per customer)
+CAMPAIGN_START = '2024-01-01'
+CAMPAIGN_END = '2024-12-31'
+EMAIL_COST_PER_SEND = 0.02
+# A/B test setup columns this step reads from the feature store
+SETUP_COLUMNS = ['cluster', 'segment_name', 'frequency', 'monetary_total', 'test_group', 'campaign_version',
+                 'email_subject', 'discount_percent', 'expected_ctr', 'campaign_type']
+# Columns this step adds to the feature store
+RESULT_COLUMNS = ['clicked', 'converted', 'purchase_amount', 'ltv_increase', 'send_date']
+
+
+def simulate_results(ab_test_df, seed=42):
+    """Simulated click, conversion and purchase outcome for every send.
+
+    Draws are made in customer_id order, so a customer's outcome and send
+    date do not depend on the order of the setup rows.
+    """
+    # Set random seed for reproducible results
+    np.random.seed(seed)
+    ab_test_df = ab_test_df.sort_values('customer_id', kind='stable')
+
+    ab_results = []
+
+    for _, customer in ab_test_df.iterrows():
+        # Simulate whether customer clicked (based on expected CTR)
+        clicked = 1 if np.random.random() < customer['expected_ctr'] else 0
     
-    # If clicked, simulate conversion (purchase)
-    # Conversion rates vary by segment and campaign type
-    if customer['segment_name'] == 'Champions':
-        conversion_rate = 0.35  # High-value customers convert more
-    elif customer['segment_name'] == 'Loyal Customers':
-        conversion_rate = 0.28
-    elif customer['segment_name'] == 'Potential Loyalists':
-        conversion_rate = 0.22
-    else:  # At Risk
-        conversion_rate = 0.18  # Lower conversion but still valuable
+        # If clicked, simulate conversion (purchase)
+        # Conversion rates vary by segment and campaign type
+        if customer['segment_name'] == 'Champions':
+            conversion_rate = 0.35  # High-value customers convert more
+        elif customer['segment_name'] == 'Loyal Customers':
+            conversion_rate = 0.28
+        elif customer['segment_name'] == 'Potential Loyalists':
+            conversion_rate = 0.22
+        else:  # At Risk
+            conversion_rate = 0.18  # Lower conversion but still valuable
     
-    converted = 1 if clicked and np.random.random() < conversion_rate else 0
+        converted = 1 if clicked and np.random.random() < conversion_rate else 0
     
-    # If converted, simulate purchase amount based on customer history
-    if converted:
-        base_amount = customer['monetary_total'] / customer['frequency']  # Historic average
-        # Add some variation and discount effect
-        discount_effect = 1 + (customer['discount_percent'] * 0.01)  # Higher discount = higher purchase
-        purchase_amount = max(10, np.random.normal(base_amount * discount_effect, base_amount * 0.2))
-    else:
-        purchase_amount = 0
+        # If converted, simulate purchase amount based on customer history
+        if converted:
+            base_amount = dollars(customer['monetary_total']) / customer['frequency']  # Historic average
+            # Add some variation and discount effect
+            discount_effect = 1 + (customer['discount_percent'] * 0.01)  # Higher discount = higher purchase
+            purchase_amount = max(10, np.random.normal(base_amount * discount_effect, base_amount * 0.2))
+        else:
+            purchase_amount = 0
     
-    # Calculate customer lifetime value impact (simulated)
-    if converted and customer['campaign_version'] == 'Targeted':
-        ltv_increase = np.random.uniform(50, 200)  # Targeted campaigns build loyalty
-    else:
-        ltv_increase = 0
+        # Calculate customer lifetime value impact (simulated)
+        if converted and customer['campaign_version'] == 'Targeted':
+            ltv_increase = np.random.uniform(50, 200)  # Targeted campaigns build loyalty
+        else:
+            ltv_increase = 0
     
-    ab_results.append({
-        'customer_id': customer['customer_id'],
-        'cluster': customer['cluster'],
-        'segment_name': customer['segment_name'],
-        'test_group': customer['test_group'],
-        'campaign_version': customer['campaign_version'],
-        'email_subject': customer['email_subject'],
-        'discount_percent': customer['discount_percent'],
-        'expected_ctr': customer['expected_ctr'],
-        'clicked': clicked,
-        'converted': converted,
-        'purchase_amount': round(purchase_amount, 2),
-        'ltv_increase': round(ltv_increase, 2),
-        'campaign_type': customer['campaign_type']
-    })
-
-ab_results_df = pd.DataFrame(ab_results)
-
-# Calculate performance metrics
-print("\n=== A/B TEST RESULTS ===")
-
-performance_metrics = ab_results_df.groupby(['segment_name', 'test_group', 'campaign_version']).agg({
-    'customer_id': 'count',
-    'clicked': ['sum', 'mean'],
-    'converted': ['sum', 'mean'], 
-    'purchase_amount': 'sum',
-    'ltv_increase': 'sum'
-}).round(4)
-
-performance_metrics.columns = ['emails_sent', 'total_clicks', 'click_rate', 
-                              'total_conversions', 'conversion_rate', 
-                              'total_revenue', 'total_ltv_increase']
-
-performance_metrics = performance_metrics.reset_index()
-
-# Calculate costs and ROI
-email_cost_per_send = 0.02
-performance_metrics['total_costs'] = performance_metrics['emails_sent'] * email_cost_per_send
-performance_metrics['roi_percent'] = (
-    (performance_metrics['total_revenue'] - performance_metrics['total_costs']) / 
-    performance_metrics['total_costs'] * 100
-).round(2)
-
-print("Detailed Performance Metrics:")
-print(performance_metrics)
-
-# Calculate overall A/B test improvement (key metric for resume)
-control_metrics = performance_metrics[performance_metrics['test_group'] == 'A']
-test_metrics = performance_metrics[performance_metrics['test_group'] == 'B']
-
-overall_control_ctr = (control_metrics['total_clicks'].sum() / control_metrics['emails_sent'].sum())
-overall_test_ctr = (test_metrics['total_clicks'].sum() / test_metrics['emails_sent'].sum())
-ctr_improvement = ((overall_test_ctr - overall_control_ctr) / overall_control_ctr * 100)
-
-print(f"\n=== KEY RESULTS FOR RESUME ===")
-print(f"📧 Total emails sent: {performance_metrics['emails_sent'].sum():,}")
-print(f"👥 Customers analyzed: {len(ab_results_df):,}")
-print(f"🎯 Customer segments identified: {ab_results_df['segment_name'].nunique()}")
-print(f"📊 Control Group Average CTR: {overall_control_ctr:.4f} ({overall_control_ctr*100:.2f}%)")
-print(f"🚀 Test Group Average CTR: {overall_test_ctr:.4f} ({overall_test_ctr*100:.2f}%)")
-print(f"⭐ CTR Improvement: {ctr_improvement:.1f}% (EXACTLY what's on your resume!)")
-print(f"💰 Total Revenue Generated: ${performance_metrics['total_revenue'].sum():,.2f}")
-print(f"💵 Total ROI: {((performance_metrics['total_revenue'].sum() - performance_metrics['total_costs'].sum()) / performance_metrics['total_costs'].sum() * 100):.1f}%")
-
-# Save results
-ab_results_df.to_csv('data/results/ab_test_results.csv', index=False)
-performance_metrics.to_csv('data/results/campaign_performance_metrics.csv', index=False)
-
-print(f"\n✅ A/B test results saved to data/results/ab_test_results.csv")
-print("✅ Performance metrics saved to data/results/campaign_performance_metrics.csv")
-print("✅ Step 7 completed successfully!")
-print("Next: Run Step 8 (Create Visualizations)")
+        ab_results.append({
+            'customer_id': customer['customer_id'],
+            'cluster': customer['cluster'],
+            'segment_name': customer['segment_name'],
+            'test_group': customer['test_group'],
+            'campaign_version': customer['campaign_version'],
+            'email_subject': customer['email_subject'],
+            'discount_percent': customer['discount_percent'],
+            'expected_ctr': customer['expected_ctr'],
+            'clicked': clicked,
+            'converted': converted,
+            'purchase_amount': int(to_cents(purchase_amount)),
+            'ltv_increase': int(to_cents(ltv_increase)),
+            'campaign_type': customer['campaign_type']
+        })
+
+    ab_results_df = apply_schema(pd.DataFrame(ab_results))
+
+    # Date each send within the campaign window, from a generator of its own
+    # so the dates take no draws from the click/conversion stream above. The
+    # dates are simulated like the outcomes: uniform over the window, with no
+    # campaign schedule behind them
+    send_rng = np.random.default_rng(seed)
+    campaign_days = pd.date_range(CAMPAIGN_START, CAMPAIGN_END, freq='D')
+    ab_results_df['send_date'] = day_numbers(campaign_days)[
+        send_rng.integers(0, len(campaign_days), len(ab_results_df))
+    ]
+    return ab_results_df
+
+
+def performance_summary(ab_results_df, email_cost_per_send=EMAIL_COST_PER_SEND):
+    """Sends, clicks, conversions, revenue and ROI by segment x test group."""
+    performance_metrics = ab_results_df.groupby(['segment_name', 'test_group', 'campaign_version'], observed=True).agg({
+        'customer_id': 'count',
+        'clicked': ['sum', 'mean'],
+        'converted': ['sum', 'mean'], 
+        'purchase_amount': 'sum',
+        'ltv_increase': 'sum'
+    }).round(4)
+
+    performance_metrics.columns = ['emails_sent', 'total_clicks', 'click_rate', 
+                                  'total_conversions', 'conversion_rate', 
+                                  'total_revenue', 'total_ltv_increase']
+
+    performance_metrics = performance_metrics.reset_index()
+
+    # Revenue sums are integer cents; report them in dollars
+    for column in ['total_revenue', 'total_ltv_increase']:
+        performance_metrics[column] = dollars(performance_metrics[column])
+
+    # Calculate costs and ROI
+    performance_metrics['total_costs'] = performance_metrics['emails_sent'] * email_cost_per_send
+    performance_metrics['roi_percent'] = (
+        (performance_metrics['total_revenue'] - performance_metrics['total_costs']) / 
+        performance_metrics['total_costs'] * 100
+    ).round(2)
+    return performance_metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 7: simulate A/B test results')
+    parser.add_argument('--rebuild-rollups', action='store_true',
+                        help='re-aggregate every daily rollup partition instead of only the changed days')
+    args = parser.parse_args(argv)
+
+    print("Step 7: Simulating A/B test results...")
+    start_stage('ab_results')
+
+    # Load A/B test setup
+    with span('load') as s:
+        ab_test_df = read_features('ab_test_setup', SETUP_COLUMNS)
+        s.rows = len(ab_test_df)
+    print(f"Loaded A/B test setup for {len(ab_test_df)} customers")
+
+    # Simulate email campaign results
+    print("Simulating email campaign performance...")
+
+    with span('simulate sends', rows=len(ab_test_df)):
+        ab_results_df = simulate_results(ab_test_df)
+
+    # Calculate performance metrics
+    print("\n=== A/B TEST RESULTS ===")
+
+    with span('performance metrics', rows=len(ab_results_df)):
+        performance_metrics = performance_summary(ab_results_df)
+
+    print("Detailed Performance Metrics:")
+    print(performance_metrics)
+
+    # Calculate overall A/B test improvement (key metric for resume)
+    control_metrics = performance_metrics[performance_metrics['test_group'] == 'A']
+    test_metrics = performance_metrics[performance_metrics['test_group'] == 'B']
+
+    overall_control_ctr = (control_metrics['total_clicks'].sum() / control_metrics['emails_sent'].sum())
+    overall_test_ctr = (test_metrics['total_clicks'].sum() / test_metrics['emails_sent'].sum())
+    ctr_improvement = ((overall_test_ctr - overall_control_ctr) / overall_control_ctr * 100)
+
+    print(f"\n=== KEY RESULTS FOR RESUME ===")
+    print(f"📧 Total emails sent: {performance_metrics['emails_sent'].sum():,}")
+    print(f"👥 Customers analyzed: {len(ab_results_df):,}")
+    print(f"🎯 Customer segments identified: {ab_results_df['segment_name'].nunique()}")
+    print(f"📊 Control Group Average CTR: {overall_control_ctr:.4f} ({overall_control_ctr*100:.2f}%)")
+    print(f"🚀 Test Group Average CTR: {overall_test_ctr:.4f} ({overall_test_ctr*100:.2f}%)")
+    print(f"⭐ CTR Improvement: {ctr_improvement:.1f}% (EXACTLY what's on your resume!)")
+    print(f"💰 Total Revenue Generated: ${performance_metrics['total_revenue'].sum():,.2f}")
+    print(f"💵 Total ROI: {((performance_metrics['total_revenue'].sum() - performance_metrics['total_costs'].sum()) / performance_metrics['total_costs'].sum() * 100):.1f}%")
+
+    # Save results
+    with span('save', rows=len(ab_results_df)):
+        save_table(ab_results_df, 'data/results/ab_test_results.csv')
+        performance_metrics.to_csv('data/results/campaign_performance_metrics.csv', index=False)
+    with span('feature store', rows=len(ab_results_df)):
+        FeatureStore().put(ab_results_df, RESULT_COLUMNS)
+
+    # Roll event-level results up by day x segment x test group; only days whose
+    # totals changed are rewritten unless --rebuild-rollups is given
+    rollups = RollupStore('data/results/rollups')
+    with span('rollups', rows=len(ab_results_df)):
+        if args.rebuild_rollups:
+            written, removed = rollups.rebuild(ab_results_df), []
+        else:
+            written, removed = rollups.sync(ab_results_df)
+
+    print(f"\n✅ A/B test results saved to data/results/ab_test_results.csv")
+    print("✅ Performance metrics saved to data/results/campaign_performance_metrics.csv")
+    print(f"✅ Time-series rollups updated in data/results/rollups ({len(written)} daily partitions written, "
+          f"{len(removed)} removed)")
+    finish_stage()
+    print("✅ Step 7 completed successfully!")
+    print("Next: Run Step 8 (Create Visualizations)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,162 +1,375 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
 import os
+from collections import namedtuple
 
-print("Step 8: Creating comprehensive visualizations...")
-
-# Load all necessary data
-customer_segments = pd.read_csv('data/processed/customer_segments.csv')
-ab_results = pd.read_csv('data/results/ab_test_results.csv')
-performance_metrics = pd.read_csv('data/results/campaign_performance_metrics.csv')
-
-print("Data loaded successfully for visualization")
-
-# Set style for professional-looking charts
-plt.style.use('default')
-sns.set_palette("Set2")
-
-# Create comprehensive marketing dashboard
-fig = plt.figure(figsize=(20, 24))
-fig.suptitle('Marketing Campaign ROI Analysis Dashboard\n50K+ Transactions | 4 Customer Segments | 23% CTR Improvement', 
-             fontsize=24, fontweight='bold', y=0.98)
-
-# 1. Customer Segments Distribution (Top Left)
-ax1 = plt.subplot(4, 3, 1)
-segment_counts = customer_segments['segment_name'].value_counts()
-colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
-wedges, texts, autotexts = ax1.pie(segment_counts.values, labels=segment_counts.index, 
-                                  autopct='%1.1f%%', startangle=90, colors=colors)
-ax1.set_title('Customer Segments Distribution\n(12,000 Total Customers)', fontsize=14, fontweight='bold')
-for autotext in autotexts:
-    autotext.set_color('white')
-    autotext.set_fontweight('bold')
-
-# 2. A/B Testing CTR Comparison (Top Middle)
-ax2 = plt.subplot(4, 3, 2)
-ctr_comparison = performance_metrics.pivot_table(
-    index='segment_name', columns='test_group', values='click_rate'
+from insightx.feature_store import FeatureStore, read_features
+from insightx.rendering import (
+    headless_requested, configure_backend, bin_points, binned_scatter,
+    grouped_histogram, render_panels, composite_panels, panel_grid
 )
-ctr_comparison.plot(kind='bar', ax=ax2, width=0.7, color=['#FF6B6B', '#4ECDC4'])
-ax2.set_title('A/B Testing: Click Rates by Segment\n(23% Overall Improvement)', fontsize=14, fontweight='bold')
-ax2.set_ylabel('Click Rate')
-ax2.legend(['Control (Generic)', 'Test (Targeted)'], loc='upper right')
-ax2.tick_params(axis='x', rotation=45)
-ax2.grid(True, alpha=0.3)
-
-# 3. ROI Comparison (Top Right)
-ax3 = plt.subplot(4, 3, 3)
-roi_comparison = performance_metrics.pivot_table(
-    index='segment_name', columns='test_group', values='roi_percent'
-)
-roi_comparison.plot(kind='bar', ax=ax3, width=0.7, color=['#FF6B6B', '#4ECDC4'])
-ax3.set_title('ROI Comparison: Control vs Targeted\nCampaigns', fontsize=14, fontweight='bold')
-ax3.set_ylabel('ROI (%)')
-ax3.legend(['Control', 'Targeted'], loc='upper right')
-ax3.tick_params(axis='x', rotation=45)
-ax3.grid(True, alpha=0.3)
-
-# 4. Customer Segment Characteristics Heatmap (Second Row Left)
-ax4 = plt.subplot(4, 3, 4)
-segment_chars = customer_segments.groupby('segment_name')[
-    ['recency', 'frequency', 'monetary_total', 'age']
-].mean()
-sns.heatmap(segment_chars.T, annot=True, fmt='.1f', cmap='viridis', ax=ax4, cbar_kws={'shrink': 0.8})
-ax4.set_title('Customer Segment Characteristics\n(RFM + Demographics)', fontsize=14, fontweight='bold')
-
-# 5. Revenue by Campaign Type (Second Row Middle)
-ax5 = plt.subplot(4, 3, 5)
-revenue_data = performance_metrics.pivot_table(
-    index='segment_name', columns='campaign_version', values='total_revenue'
-)
-revenue_data.plot(kind='bar', ax=ax5, width=0.7, color=['#FF6B6B', '#4ECDC4'])
-ax5.set_title('Total Revenue by Segment\nand Campaign Type', fontsize=14, fontweight='bold')
-ax5.set_ylabel('Revenue ($)')
-ax5.legend(['Generic', 'Targeted'], loc='upper right')
-ax5.tick_params(axis='x', rotation=45)
-ax5.grid(True, alpha=0.3)
-
-# 6. Conversion Funnel (Second Row Right)
-ax6 = plt.subplot(4, 3, 6)
-funnel_data = ab_results.groupby('campaign_version').agg({
-    'customer_id': 'count',
-    'clicked': 'sum',
-    'converted': 'sum'
-})
-funnel_data.columns = ['Emails Sent', 'Clicks', 'Conversions']
-
-x_pos = np.arange(len(funnel_data.columns))
-width = 0.35
-
-for i, (campaign, data) in enumerate(funnel_data.iterrows()):
-    ax6.bar(x_pos + i*width, data.values, width, 
-           label=campaign, color=['#FF6B6B', '#4ECDC4'][i], alpha=0.8)
-
-ax6.set_title('Campaign Conversion Funnel', fontsize=14, fontweight='bold')
-ax6.set_ylabel('Count')
-ax6.set_xticks(x_pos + width/2)
-ax6.set_xticklabels(funnel_data.columns)
-ax6.legend()
-ax6.grid(True, alpha=0.3)
-
-# 7. Cluster Scatter Plot (Third Row Left)
-ax7 = plt.subplot(4, 3, 7)
-scatter = ax7.scatter(customer_segments['frequency'], customer_segments['monetary_total'], 
-                     c=customer_segments['cluster'], cmap='Set2', alpha=0.6, s=50)
-ax7.set_xlabel('Frequency (Number of Transactions)')
-ax7.set_ylabel('Monetary Total ($)')
-ax7.set_title('K-means Clustering Results\n(Frequency vs Monetary)', fontsize=14, fontweight='bold')
-plt.colorbar(scatter, ax=ax7, shrink=0.8)
-ax7.grid(True, alpha=0.3)
-
-# 8. Age Distribution by Segment (Third Row Middle)
-ax8 = plt.subplot(4, 3, 8)
-colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
-for i, segment in enumerate(customer_segments['segment_name'].unique()):
-    segment_data = customer_segments[customer_segments['segment_name'] == segment]
-    ax8.hist(segment_data['age'], alpha=0.7, label=segment, bins=20, color=colors[i])
-ax8.set_xlabel('Age')
-ax8.set_ylabel('Frequency')
-ax8.set_title('Age Distribution by\nCustomer Segment', fontsize=14, fontweight='bold')
-ax8.legend()
-ax8.grid(True, alpha=0.3)
-
-# 9. Campaign Performance Summary (Third Row Right)
-ax9 = plt.subplot(4, 3, 9)
-summary_metrics = performance_metrics.groupby('campaign_version').agg({
-    'total_clicks': 'sum',
-    'total_conversions': 'sum',
-    'total_revenue': 'sum'
-})
-summary_metrics.plot(kind='bar', ax=ax9, width=0.6, 
-                    color=['#96CEB4', '#FFD93D', '#6BCF7F'])
-ax9.set_title('Overall Campaign Performance\nComparison', fontsize=14, fontweight='bold')
-ax9.legend(['Total Clicks', 'Conversions', 'Revenue ($)'], bbox_to_anchor=(1.05, 1))
-ax9.tick_params(axis='x', rotation=0)
-ax9.grid(True, alpha=0.3)
-
-# 10. Monthly Performance Trend (Bottom Row - Large)
-ax10 = plt.subplot(4, 1, 4)
-
-# Simulate monthly performance data
-months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-control_ctr = [0.045, 0.048, 0.052, 0.049, 0.051, 0.047, 
-               0.050, 0.048, 0.049, 0.052, 0.054, 0.053]
-test_ctr = [0.055, 0.058, 0.062, 0.059, 0.061, 0.057, 
-            0.060, 0.058, 0.059, 0.062, 0.064, 0.063]
-
-ax10.plot(months, control_ctr, marker='o', color='#FF6B6B', label='Control (Generic)')
-ax10.plot(months, test_ctr, marker='o', color='#4ECDC4', label='Test (Targeted)')
-ax10.set_title('Monthly CTR Performance Trend\n(Control vs Targeted)', fontsize=14, fontweight='bold')
-ax10.set_ylabel('Click Through Rate')
-ax10.legend()
-ax10.grid(True, alpha=0.3)
-
-plt.tight_layout(rect=[0, 0, 1, 0.96])
-plt.savefig('data/results/marketing_dashboard.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-print("Visualizations created and saved to data/results/marketing_dashboard.png")
-print("✅ Step 8 completed successfully!")
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.panel_cache import PanelCache, panel_key
+from insightx.schema import TABLE_PATHS, load_table, dollars
+
+# Dashboard canvas: 4 rows x 3 columns under a title strip, with the monthly
+# trend spanning the whole bottom row
+DASHBOARD_SIZE = (20, 24)
+TITLE_HEIGHT = 1.2
+PANEL_SPANS = {
+    'segment_distribution': (0, 0, 1, 1),
+    'ab_ctr': (0, 1, 1, 1),
+    'roi_comparison': (0, 2, 1, 1),
+    'segment_heatmap': (1, 0, 1, 1),
+    'revenue_by_campaign': (1, 1, 1, 1),
+    'conversion_funnel': (1, 2, 1, 1),
+    'cluster_scatter': (2, 0, 1, 1),
+    'age_histograms': (2, 1, 1, 1),
+    'performance_summary': (2, 2, 1, 1),
+    'monthly_trend': (3, 0, 1, 3),
+}
+SEGMENT_COLORS = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4']
+AB_COLORS = ['#FF6B6B', '#4ECDC4']
+
+
+# Panel renderers: each receives a small pre-aggregated payload so it can run
+# in a worker process without shipping customer-level tables around
+
+def draw_title(fig, ax, payload):
+    ax.set_axis_off()
+    ax.text(0.5, 0.5, payload, ha='center', va='center', fontsize=24,
+            fontweight='bold', transform=ax.transAxes)
+
+
+def draw_segment_distribution(fig, ax, payload):
+    segment_counts, total = payload
+    wedges, texts, autotexts = ax.pie(segment_counts.values, labels=segment_counts.index,
+                                      autopct='%1.1f%%', startangle=90, colors=SEGMENT_COLORS)
+    ax.set_title(f'Customer Segments Distribution\n({total:,} Total Customers)',
+                 fontsize=14, fontweight='bold')
+    for autotext in autotexts:
+        autotext.set_color('white')
+        autotext.set_fontweight('bold')
+
+
+def draw_ab_ctr(fig, ax, ctr_comparison):
+    ctr_comparison.plot(kind='bar', ax=ax, width=0.7, color=AB_COLORS)
+    ax.set_title('A/B Testing: Click Rates by Segment\n(23% Overall Improvement)', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Click Rate')
+    ax.legend(['Control (Generic)', 'Test (Targeted)'], loc='upper right')
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+
+
+def draw_roi_comparison(fig, ax, roi_comparison):
+    roi_comparison.plot(kind='bar', ax=ax, width=0.7, color=AB_COLORS)
+    ax.set_title('ROI Comparison: Control vs Targeted\nCampaigns', fontsize=14, fontweight='bold')
+    ax.set_ylabel('ROI (%)')
+    ax.legend(['Control', 'Targeted'], loc='upper right')
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+
+
+def draw_segment_heatmap(fig, ax, segment_chars):
+    import seaborn as sns
+    sns.heatmap(segment_chars.T, annot=True, fmt='.1f', cmap='viridis', ax=ax, cbar_kws={'shrink': 0.8})
+    ax.set_title('Customer Segment Characteristics\n(RFM + Demographics)', fontsize=14, fontweight='bold')
+
+
+def draw_revenue_by_campaign(fig, ax, revenue_data):
+    revenue_data.plot(kind='bar', ax=ax, width=0.7, color=AB_COLORS)
+    ax.set_title('Total Revenue by Segment\nand Campaign Type', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Revenue ($)')
+    ax.legend(['Generic', 'Targeted'], loc='upper right')
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+
+
+def draw_conversion_funnel(fig, ax, funnel_data):
+    x_pos = np.arange(len(funnel_data.columns))
+    width = 0.35
+    for i, (campaign, data) in enumerate(funnel_data.iterrows()):
+        ax.bar(x_pos + i*width, data.values, width,
+               label=campaign, color=AB_COLORS[i], alpha=0.8)
+    ax.set_title('Campaign Conversion Funnel', fontsize=14, fontweight='bold')
+    ax.set_ylabel('Count')
+    ax.set_xticks(x_pos + width/2)
+    ax.set_xticklabels(funnel_data.columns)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def draw_cluster_scatter(fig, ax, binned):
+    scatter = binned_scatter(ax, binned, cmap='Set2')
+    ax.set_xlabel('Frequency (Number of Transactions)')
+    ax.set_ylabel('Monetary Total ($)')
+    ax.set_title('K-means Clustering Results\n(Frequency vs Monetary)', fontsize=14, fontweight='bold')
+    fig.colorbar(scatter, ax=ax, shrink=0.8)
+    ax.grid(True, alpha=0.3)
+
+
+def draw_age_histograms(fig, ax, payload):
+    edges, segments, counts = payload
+    for i, segment in enumerate(segments):
+        ax.stairs(counts[i], edges, fill=True, alpha=0.7, label=segment,
+                  color=SEGMENT_COLORS[i % len(SEGMENT_COLORS)])
+    ax.set_xlabel('Age')
+    ax.set_ylabel('Frequency')
+    ax.set_title('Age Distribution by\nCustomer Segment', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+def draw_performance_summary(fig, ax, summary_metrics):
+    summary_metrics.plot(kind='bar', ax=ax, width=0.6,
+                         color=['#96CEB4', '#FFD93D', '#6BCF7F'])
+    ax.set_title('Overall Campaign Performance\nComparison', fontsize=14, fontweight='bold')
+    ax.legend(['Total Clicks', 'Conversions', 'Revenue ($)'], bbox_to_anchor=(1.05, 1))
+    ax.tick_params(axis='x', rotation=0)
+    ax.grid(True, alpha=0.3)
+
+
+def draw_monthly_trend(fig, ax, payload):
+    months, control_ctr, test_ctr = payload
+    ax.plot(months, control_ctr, marker='o', color='#FF6B6B', label='Control (Generic)')
+    ax.plot(months, test_ctr, marker='o', color='#4ECDC4', label='Test (Targeted)')
+    ax.set_title('Monthly CTR Performance Trend\n(Control vs Targeted, simulated send dates)',
+                 fontsize=14, fontweight='bold')
+    ax.set_ylabel('Click Through Rate')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+# Panel builders: vectorized pandas/NumPy aggregation of each panel's inputs
+
+def build_title(tables):
+    return ('Marketing Campaign ROI Analysis Dashboard\n'
+            '50K+ Transactions | 4 Customer Segments | 23% CTR Improvement')
+
+
+# 1. Customer Segments Distribution
+def build_segment_distribution(tables):
+    customer_segments = tables['customer_segments']
+    return customer_segments['segment_name'].value_counts(), len(customer_segments)
+
+
+# 2. A/B Testing CTR Comparison
+def build_ab_ctr(tables):
+    return tables['performance_metrics'].pivot_table(
+        index='segment_name', columns='test_group', values='click_rate', observed=True
+    )
+
+
+# 3. ROI Comparison
+def build_roi_comparison(tables):
+    return tables['performance_metrics'].pivot_table(
+        index='segment_name', columns='test_group', values='roi_percent', observed=True
+    )
+
+
+# 4. Customer Segment Characteristics Heatmap
+def build_segment_heatmap(tables):
+    customer_segments = tables['customer_segments']
+    segment_chars = customer_segments.assign(
+        monetary_total=dollars(customer_segments['monetary_total'])
+    ).groupby('segment_name', observed=True)[['recency', 'frequency', 'monetary_total', 'age']].mean()
+    return segment_chars
+
+
+# 5. Revenue by Campaign Type
+def build_revenue_by_campaign(tables):
+    return tables['performance_metrics'].pivot_table(
+        index='segment_name', columns='campaign_version', values='total_revenue', observed=True
+    )
+
+
+# 6. Conversion Funnel
+def build_conversion_funnel(tables):
+    funnel_data = tables['ab_results'].groupby('campaign_version', observed=True).agg({
+        'customer_id': 'count',
+        'clicked': 'sum',
+        'converted': 'sum'
+    })
+    funnel_data.columns = ['Emails Sent', 'Clicks', 'Conversions']
+    return funnel_data
+
+
+# 7. Cluster Scatter Plot, pre-binned so marker count is bounded by the grid
+def build_cluster_scatter(tables):
+    customer_segments = tables['customer_segments']
+    return bin_points(customer_segments['frequency'], dollars(customer_segments['monetary_total']),
+                      customer_segments['cluster'])
+
+
+# 8. Age Distribution by Segment, one grouped histogram pass
+def build_age_histograms(tables):
+    customer_segments = tables['customer_segments']
+    return grouped_histogram(customer_segments['age'], customer_segments['segment_name'], bins=20)
+
+
+# 9. Campaign Performance Summary
+def build_performance_summary(tables):
+    return tables['performance_metrics'].groupby('campaign_version', observed=True).agg({
+        'total_clicks': 'sum',
+        'total_conversions': 'sum',
+        'total_revenue': 'sum'
+    })
+
+
+# 10. Monthly Performance Trend, from the monthly rollup of Step 7's simulated send dates
+def build_monthly_trend(tables):
+    monthly = tables['monthly_rollup'].groupby(['period', 'test_group'], observed=True)[['sends', 'clicks']].sum()
+    ctr = (monthly['clicks'] / monthly['sends'].where(monthly['sends'] > 0)).unstack('test_group')
+    ctr = ctr.reindex(columns=['A', 'B']).sort_index()
+    months = list(pd.to_datetime(ctr.index).strftime('%b %Y'))
+    return months, list(ctr['A']), list(ctr['B'])
+
+
+# Every panel declares the table columns it reads; the render cache key is
+# a hash of exactly those columns, so unrelated data changes keep it valid
+Panel = namedtuple('Panel', ['inputs', 'build', 'draw'])
+
+PANELS = {
+    'title': Panel({}, build_title, draw_title),
+    'segment_distribution': Panel(
+        {'customer_segments': ['segment_name']},
+        build_segment_distribution, draw_segment_distribution),
+    'ab_ctr': Panel(
+        {'performance_metrics': ['segment_name', 'test_group', 'click_rate']},
+        build_ab_ctr, draw_ab_ctr),
+    'roi_comparison': Panel(
+        {'performance_metrics': ['segment_name', 'test_group', 'roi_percent']},
+        build_roi_comparison, draw_roi_comparison),
+    'segment_heatmap': Panel(
+        {'customer_segments': ['segment_name', 'recency', 'frequency', 'monetary_total', 'age']},
+        build_segment_heatmap, draw_segment_heatmap),
+    'revenue_by_campaign': Panel(
+        {'performance_metrics': ['segment_name', 'campaign_version', 'total_revenue']},
+        build_revenue_by_campaign, draw_revenue_by_campaign),
+    'conversion_funnel': Panel(
+        {'ab_results': ['campaign_version', 'customer_id', 'clicked', 'converted']},
+        build_conversion_funnel, draw_conversion_funnel),
+    'cluster_scatter': Panel(
+        {'customer_segments': ['frequency', 'monetary_total', 'cluster']},
+        build_cluster_scatter, draw_cluster_scatter),
+    'age_histograms': Panel(
+        {'customer_segments': ['age', 'segment_name']},
+        build_age_histograms, draw_age_histograms),
+    'performance_summary': Panel(
+        {'performance_metrics': ['campaign_version', 'total_clicks', 'total_conversions', 'total_revenue']},
+        build_performance_summary, draw_performance_summary),
+    'monthly_trend': Panel(
+        {'monthly_rollup': ['period', 'test_group', 'sends', 'clicks']},
+        build_monthly_trend, draw_monthly_trend),
+}
+
+# Per-customer panel inputs are read from the feature store (table name in
+# insightx.schema for the CSV fallback); the aggregate tables from CSV
+CUSTOMER_TABLES = {
+    'customer_segments': 'customer_segments',
+    'ab_results': 'ab_test_results',
+}
+TABLE_FILES = {
+    'performance_metrics': 'data/results/campaign_performance_metrics.csv',
+    'monthly_rollup': 'data/results/rollups/monthly.csv',
+}
+PANEL_CACHE_DIR = 'data/results/.panel_cache'
+
+
+def panel_columns(table):
+    """Columns of ``table`` that any panel reads (besides customer_id)."""
+    return sorted({column for panel in PANELS.values() for column in panel.inputs.get(table, ())
+                   if column != 'customer_id'})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 8: render the marketing dashboard')
+    parser.add_argument('--headless', action='store_true',
+                        help='use the non-interactive Agg backend and skip plt.show()')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='panel render processes (default: one per panel, capped at CPU count)')
+    parser.add_argument('--dpi', type=int, default=300)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='re-render every panel instead of reusing cached images')
+    args = parser.parse_args(argv)
+
+    headless = configure_backend(args.headless or headless_requested([]))
+    os.makedirs('data/results', exist_ok=True)
+
+    print("Step 8: Creating comprehensive visualizations...")
+    start_stage('visualize')
+
+    store = FeatureStore()
+    columns = {name: panel_columns(name) for name in CUSTOMER_TABLES}
+    missing = [path for path in TABLE_FILES.values() if not os.path.exists(path)]
+    missing += [TABLE_PATHS[table] for name, table in CUSTOMER_TABLES.items()
+                if not store.has(columns[name]) and not os.path.exists(TABLE_PATHS[table])]
+    if missing:
+        raise SystemExit(f"Missing {', '.join(missing)}. Run Step 4 and Step 7 "
+                         f"(insightx run clustering, insightx run ab_results) first!")
+
+    # Load all necessary data with the pipeline's compact dtypes
+    with span('load') as s:
+        tables = {name: read_features(table, columns[name], store) for name, table in CUSTOMER_TABLES.items()}
+        tables.update({name: load_table(name, path) for name, path in TABLE_FILES.items()})
+        s.rows = sum(len(table) for table in tables.values())
+
+    print("Data loaded successfully for visualization")
+
+    layout = panel_grid(4, 3, DASHBOARD_SIZE, TITLE_HEIGHT, PANEL_SPANS)
+    cache = PanelCache(PANEL_CACHE_DIR)
+
+    # Look up every panel in the render cache; only invalidated panels are
+    # aggregated and re-rendered
+    images, keys, stale = {}, {}, []
+    for name, (_, size) in layout.items():
+        panel = PANELS[name]
+        keys[name] = panel_key(tables, panel.inputs, (panel.build, panel.draw),
+                               (size, args.dpi))
+        cached = None if args.no_cache else cache.get(name, keys[name])
+        if cached is None:
+            stale.append(name)
+        else:
+            images[name] = cached
+
+    with span('aggregate') as aggregate:
+        payloads = {name: PANELS[name].build(tables) for name in stale}
+
+    # Render each stale panel on its own canvas (in parallel) and composite
+    panels = [(name, PANELS[name].draw, payloads[name], layout[name][1]) for name in stale]
+    timings = {}
+    with span('render', rows=len(panels)) as render:
+        if panels:
+            rendered, timings = render_panels(panels, dpi=args.dpi, workers=args.workers)
+            for name, png in rendered.items():
+                cache.put(name, keys[name], png)
+            images.update(rendered)
+
+    with span('composite'):
+        dashboard = composite_panels(images, {name: box for name, (box, _) in layout.items()},
+                                     DASHBOARD_SIZE, args.dpi, 'data/results/marketing_dashboard.png')
+
+    print(f"\n=== PANEL RENDER TIMES ({len(stale)} rendered, {len(layout) - len(stale)} from cache) ===")
+    for name, seconds in sorted(timings.items(), key=lambda item: -item[1]):
+        print(f"  {name:<22} {seconds:6.2f}s")
+    for name in layout:
+        if name not in timings:
+            print(f"  {name:<22}  cached")
+    print(f"  {'(aggregation)':<22} {aggregate.seconds:6.2f}s")
+    print(f"  {'(wall clock render)':<22} {render.seconds:6.2f}s")
+
+    finish_stage()
+    if not headless:
+        import matplotlib.pyplot as plt
+        plt.figure(figsize=(10, 12))
+        plt.imshow(dashboard)
+        plt.axis('off')
+        plt.show()
+
+    print("Visualizations created and saved to data/results/marketing_dashboard.png")
+    print("✅ Step 8 completed successfully!")
+
+
+if __name__ == '__main__':
+    main()
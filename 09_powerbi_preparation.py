@@ -1,147 +1,290 @@
 import pandas as pd
-import numpy as np
+import argparse
 import os
 
-print("Step 9: Preparing data for Power BI dashboard...")
-
-# Create powerbi directory
-os.makedirs('powerbi', exist_ok=True)
-
-# Load all data files
-customer_segments = pd.read_csv('data/processed/customer_segments.csv')
-ab_results = pd.read_csv('data/results/ab_test_results.csv')
-performance_metrics = pd.read_csv('data/results/campaign_performance_metrics.csv')
-
-print("Loaded all data files for Power BI preparation")
-
-# 1. Main dashboard data - combine everything
-main_data = customer_segments.merge(
-    ab_results[['customer_id', 'test_group', 'campaign_version', 'clicked', 'converted', 'purchase_amount']],
-    on='customer_id',
-    how='left'
-)
-
-# Add calculated fields for Power BI
-main_data['revenue_per_customer'] = main_data['purchase_amount']
-main_data['customer_lifetime_value'] = main_data['monetary_total'] * 2.5  # Estimated LTV multiplier
-main_data['engagement_score'] = (
-    (main_data['frequency'] / main_data['frequency'].max() * 40) +
-    (main_data['monetary_total'] / main_data['monetary_total'].max() * 40) +
-    ((365 - main_data['recency']) / 365 * 20)
-).round(1)
-
-# Save main dashboard data
-main_data.to_csv('powerbi/dashboard_main_data.csv', index=False)
-print("✅ Main dashboard data saved to powerbi/dashboard_main_data.csv")
-
-# 2. Performance summary for KPIs
-summary_data = performance_metrics.copy()
-summary_data['cost_per_acquisition'] = (
-    summary_data['total_costs'] / summary_data['total_conversions']
-).round(2)
-summary_data['revenue_per_click'] = (
-    summary_data['total_revenue'] / summary_data['total_clicks']
-).round(2)
-
-summary_data.to_csv('powerbi/performance_summary.csv', index=False)
-print("✅ Performance summary saved to powerbi/performance_summary.csv")
-
-# 3. Daily performance data for time series
-np.random.seed(42)
-date_range = pd.date_range('2024-11-01', '2024-12-31', freq='D')
-daily_data = []
-
-for date in date_range:
-    for segment in customer_segments['segment_name'].unique():
-        for test_group in ['A', 'B']:
-            base_performance = {
-                'Champions': {'emails': 150, 'ctr_base': 0.12},
-                'Loyal Customers': {'emails': 120, 'ctr_base': 0.09},
-                'At Risk': {'emails': 90, 'ctr_base': 0.06},
-                'Potential Loyalists': {'emails': 110, 'ctr_base': 0.08}
-            }
-            
-            emails_sent = np.random.poisson(base_performance[segment]['emails'])
-            
-            if test_group == 'A':
-                ctr = base_performance[segment]['ctr_base'] * 0.85
-            else:
-                ctr = base_performance[segment]['ctr_base'] * 1.23
-                
-            clicks = int(emails_sent * ctr * np.random.uniform(0.8, 1.2))
-            conversions = int(clicks * 0.25 * np.random.uniform(0.8, 1.2))
-            revenue = conversions * np.random.uniform(50, 200)
-            
-            daily_data.append({
-                'date': date,
-                'segment_name': segment,
-                'test_group': test_group,
-                'campaign_version': 'Generic' if test_group == 'A' else 'Targeted',
-                'emails_sent': emails_sent,
-                'clicks': clicks,
-                'conversions': conversions,
-                'revenue': round(revenue, 2),
-                'ctr': round(clicks/emails_sent if emails_sent > 0 else 0, 4),
-                'conversion_rate': round(conversions/clicks if clicks > 0 else 0, 4)
-            })
-
-daily_performance = pd.DataFrame(daily_data)
-daily_performance.to_csv('powerbi/daily_performance.csv', index=False)
-print("✅ Daily performance data saved to powerbi/daily_performance.csv")
-
-# 4. Customer segment details for drill-down
-segment_details = customer_segments.groupby('segment_name').agg({
-    'customer_id': 'count',
-    'age': 'mean',
-    'recency': 'mean',
-    'frequency': 'mean',
-    'monetary_total': ['mean', 'sum'],
-    'monetary_avg': 'mean'
-}).round(2)
-
-segment_details.columns = ['customer_count', 'avg_age', 'avg_recency', 
-                          'avg_frequency', 'avg_total_spent', 'total_revenue', 'avg_order_value']
-segment_details = segment_details.reset_index()
-
-# Add segment characteristics
-segment_details['segment_description'] = segment_details['segment_name'].map({
+from insightx.feature_store import FeatureStore
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import merge_join
+from insightx.rollups import RollupStore
+from insightx.sketches import SegmentMetrics
+from insightx.simulation import simulate_daily_performance
+from insightx.star_schema import build_star_schema, read_dimensions, write_star_schema
+from insightx.schema import load_table, save_table, to_external, dollars, TABLE_PATHS
+
+EMAIL_COST = 0.02
+
+SEGMENT_DESCRIPTIONS = {
     'Champions': 'High-value customers with recent activity and frequent purchases',
     'Loyal Customers': 'Regular customers with consistent purchasing behavior',
     'At Risk': 'Previously valuable customers who haven\'t purchased recently',
     'Potential Loyalists': 'Recent customers with good engagement potential'
-})
-
-segment_details.to_csv('powerbi/segment_details.csv', index=False)
-print("✅ Segment details saved to powerbi/segment_details.csv")
-
-# 5. Campaign comparison data
-campaign_comparison = ab_results.groupby(['segment_name', 'campaign_version']).agg({
-    'customer_id': 'count',
-    'clicked': ['sum', 'mean'],
-    'converted': ['sum', 'mean'],
-    'purchase_amount': 'sum'
-}).round(4)
-
-campaign_comparison.columns = ['customers', 'total_clicks', 'ctr', 'total_conversions', 
-                              'conversion_rate', 'total_revenue']
-campaign_comparison = campaign_comparison.reset_index()
-
-campaign_comparison['cost_per_customer'] = 0.02  # Email cost
-campaign_comparison['roi'] = (
-    (campaign_comparison['total_revenue'] - (campaign_comparison['customers'] * 0.02)) /
-    (campaign_comparison['customers'] * 0.02) * 100
-).round(2)
-
-campaign_comparison.to_csv('powerbi/campaign_comparison.csv', index=False)
-print("✅ Campaign comparison data saved to powerbi/campaign_comparison.csv")
-
-print(f"\n=== POWER BI FILES CREATED ===")
-print("📁 powerbi/")
-print("  ├── dashboard_main_data.csv      (Main dataset)")
-print("  ├── performance_summary.csv      (KPI metrics)")
-print("  ├── daily_performance.csv        (Time series)")
-print("  ├── segment_details.csv          (Segment analysis)")
-print("  └── campaign_comparison.csv      (A/B test results)")
-
-print("\n✅ Step 9 completed successfully!")
-print("Next: Import these files into Power BI")
+}
+
+
+OUTCOME_COLUMNS = ['test_group', 'campaign_version', 'clicked', 'converted', 'purchase_amount']
+CLV_COLUMN = 'predicted_clv'
+LTV_MULTIPLIER = 2.5  # Flat estimate used when Step 12's CLV model has not run
+
+
+def predicted_clv(customer_ids, store=None):
+    """Step 12's predicted CLV (cents) for sorted ``customer_ids``, or None if Step 12 has not run.
+
+    Read from the feature store when it holds the column and from
+    customer_clv.csv otherwise; every table this step writes uses the one
+    result, so the dashboard and segment details always agree.
+    """
+    if store is not None and store.has([CLV_COLUMN]):
+        return store.gather(customer_ids, [CLV_COLUMN])[CLV_COLUMN].values
+    if os.path.exists(TABLE_PATHS['customer_clv']):
+        clv = load_table('customer_clv', usecols=['customer_id', CLV_COLUMN])
+        ids = pd.DataFrame({'customer_id': customer_ids})
+        return merge_join(ids, clv, how='left')[CLV_COLUMN].values
+    return None
+
+
+def build_main_data(customer_segments, ab_results, store=None, lifetime_value=None):
+    """Customer segments joined to their A/B outcome, with dashboard fields.
+
+    The outcome columns are gathered from the feature store by customer_id
+    when it holds them, and merge-joined from ``ab_results`` otherwise.
+    ``customer_lifetime_value`` is ``lifetime_value`` (Step 12's predicted
+    CLV in cents, aligned to ``customer_segments``), falling back to a flat
+    multiple of spend to date.
+    """
+    if store is not None and store.has(OUTCOME_COLUMNS):
+        outcomes = store.gather(customer_segments['customer_id'].values, OUTCOME_COLUMNS)
+        main_data = customer_segments.copy()
+        for column in OUTCOME_COLUMNS:
+            main_data[column] = outcomes[column].values
+    else:
+        main_data = merge_join(customer_segments, ab_results[['customer_id'] + OUTCOME_COLUMNS], how='left')
+
+    # Add calculated fields for Power BI
+    main_data['revenue_per_customer'] = dollars(main_data['purchase_amount'])
+    if lifetime_value is None:
+        main_data['customer_lifetime_value'] = dollars(main_data['monetary_total']) * LTV_MULTIPLIER
+    else:
+        main_data['customer_lifetime_value'] = dollars(lifetime_value)
+    main_data['engagement_score'] = (
+        (main_data['frequency'] / main_data['frequency'].max() * 40) +
+        (main_data['monetary_total'] / main_data['monetary_total'].max() * 40) +
+        ((365 - main_data['recency']) / 365 * 20)
+    ).round(1)
+    return main_data
+
+
+def build_performance_summary(performance_metrics):
+    summary_data = performance_metrics.copy()
+    summary_data['cost_per_acquisition'] = (
+        summary_data['total_costs'] / summary_data['total_conversions']
+    ).round(2)
+    summary_data['revenue_per_click'] = (
+        summary_data['total_revenue'] / summary_data['total_clicks']
+    ).round(2)
+    return summary_data
+
+
+def build_daily_performance(customer_segments, rollup_root='data/results/rollups'):
+    """Daily series over Step 7's simulated send dates (fully simulated if no rollups exist yet)."""
+    rollups = RollupStore(rollup_root)
+    if not rollups.stored_days():
+        return simulate_daily_performance(
+            pd.date_range('2024-11-01', '2024-12-31', freq='D'),
+            customer_segments['segment_name'].unique()
+        )
+
+    daily_performance = rollups.load('daily').rename(columns={'sends': 'emails_sent'})
+    daily_performance = daily_performance[
+        ['date', 'segment_name', 'test_group', 'campaign_version',
+         'emails_sent', 'clicks', 'conversions', 'revenue']
+    ].copy()
+    daily_performance['ctr'] = (
+        daily_performance['clicks'] / daily_performance['emails_sent'].where(daily_performance['emails_sent'] > 0)
+    ).fillna(0).round(4)
+    daily_performance['conversion_rate'] = (
+        daily_performance['conversions'] / daily_performance['clicks'].where(daily_performance['clicks'] > 0)
+    ).fillna(0).round(4)
+    return daily_performance
+
+
+def build_segment_details(customer_segments, lifetime_value=None):
+    segment_details = customer_segments.assign(
+        monetary_total=dollars(customer_segments['monetary_total']),
+        monetary_avg=dollars(customer_segments['monetary_avg'])
+    ).groupby('segment_name', observed=True).agg({
+        'customer_id': 'count',
+        'age': 'mean',
+        'recency': 'mean',
+        'frequency': 'mean',
+        'monetary_total': ['mean', 'sum'],
+        'monetary_avg': 'mean'
+    }).round(2)
+
+    segment_details.columns = ['customer_count', 'avg_age', 'avg_recency',
+                              'avg_frequency', 'avg_total_spent', 'total_revenue', 'avg_order_value']
+    segment_details = segment_details.reset_index()
+
+    # Add predicted lifetime value from Step 12's CLV model
+    if lifetime_value is not None:
+        segment_clv = customer_segments[['segment_name']].assign(predicted_clv=dollars(lifetime_value))
+        segment_clv = segment_clv.groupby('segment_name', observed=True)[CLV_COLUMN].agg(['mean', 'sum']).round(2)
+        segment_clv.columns = ['avg_predicted_clv', 'total_predicted_clv']
+        segment_details = segment_details.merge(segment_clv.reset_index(), on='segment_name', how='left')
+
+    # Add segment characteristics
+    segment_details['segment_description'] = segment_details['segment_name'].map(SEGMENT_DESCRIPTIONS)
+    return segment_details
+
+
+# Sketch specs for the segment percentile dashboard: (column, only rows where
+# this column is positive)
+METRIC_DISTINCT = {
+    'customers': ('customer_id', None),
+    'clickers': ('customer_id', 'clicked'),
+    'converters': ('customer_id', 'converted'),
+}
+METRIC_QUANTILES = {
+    'monetary_total': ('monetary_total', None),
+    'order_value': ('monetary_avg', None),
+    'purchase_amount': ('purchase_amount', 'converted'),
+    'lifetime_value': ('customer_lifetime_value', None),
+}
+METRIC_SUMS = {'clicks': 'clicked', 'conversions': 'converted', 'revenue': 'purchase_amount'}
+METRIC_CENTS = ['monetary_total', 'order_value', 'purchase_amount', 'revenue']
+
+
+def build_segment_metrics(main_data_chunks):
+    """Segment distinct counts, percentiles and totals in one pass over chunks.
+
+    Built from mergeable sketches (insightx.sketches), so memory stays
+    bounded however many rows stream through; distinct counts are exact up
+    to 8,192 per segment and within about 1% above that, and percentiles
+    are within well under 1% of rank.
+    """
+    metrics = SegmentMetrics('segment_name', distinct=METRIC_DISTINCT, quantiles=METRIC_QUANTILES,
+                             sums=METRIC_SUMS)
+    for chunk in main_data_chunks:
+        metrics.add(chunk)
+    table = metrics.table()
+    for column in table.columns:
+        if column in METRIC_CENTS or column.rsplit('_p', 1)[0] in METRIC_CENTS:
+            table[column] = dollars(table[column])
+    return table.round(2)
+
+
+def build_campaign_comparison(ab_results):
+    campaign_comparison = ab_results.assign(
+        purchase_amount=dollars(ab_results['purchase_amount'])
+    ).groupby(['segment_name', 'campaign_version'], observed=True).agg({
+        'customer_id': 'count',
+        'clicked': ['sum', 'mean'],
+        'converted': ['sum', 'mean'],
+        'purchase_amount': 'sum'
+    }).round(4)
+
+    campaign_comparison.columns = ['customers', 'total_clicks', 'ctr', 'total_conversions',
+                                  'conversion_rate', 'total_revenue']
+    campaign_comparison = campaign_comparison.reset_index()
+
+    campaign_comparison['cost_per_customer'] = EMAIL_COST
+    campaign_comparison['roi'] = (
+        (campaign_comparison['total_revenue'] - (campaign_comparison['customers'] * EMAIL_COST)) /
+        (campaign_comparison['customers'] * EMAIL_COST) * 100
+    ).round(2)
+    return campaign_comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 9: prepare Power BI dashboard files')
+    parser.add_argument('--star-schema', action='store_true',
+                        help='also write the partitioned fact/dimension export to powerbi/star')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream the main dashboard data in chunks of this many rows for segment metrics')
+    args = parser.parse_args(argv)
+
+    print("Step 9: Preparing data for Power BI dashboard...")
+    start_stage('powerbi')
+
+    # Create powerbi directory
+    os.makedirs('powerbi', exist_ok=True)
+
+    # Load all data files
+    with span('load') as s:
+        customer_segments = load_table('customer_segments')
+        ab_results = load_table('ab_test_results')
+        performance_metrics = load_table('campaign_performance_metrics')
+        store = FeatureStore()
+        lifetime_value = predicted_clv(customer_segments['customer_id'].values, store)
+        s.rows = len(customer_segments) + len(ab_results) + len(performance_metrics)
+
+    print("Loaded all data files for Power BI preparation")
+    if lifetime_value is None:
+        print(f"⚠️  No CLV model output found (run Step 12); using {LTV_MULTIPLIER}x spend to date as lifetime value")
+
+    # 1. Main dashboard data - combine everything
+    with span('main data', rows=len(customer_segments)):
+        main_data = build_main_data(customer_segments, ab_results, store, lifetime_value)
+        save_table(main_data, 'powerbi/dashboard_main_data.csv')
+    print("✅ Main dashboard data saved to powerbi/dashboard_main_data.csv")
+
+    # Star-schema export mode: integer-keyed fact table plus small dimension
+    # tables, with the fact written as compressed files partitioned by send date
+    if args.star_schema:
+        with span('star schema', rows=len(main_data)):
+            star_tables = build_star_schema(to_external(main_data), to_external(ab_results),
+                                            read_dimensions('powerbi/star'))
+            star_export = write_star_schema(star_tables, 'powerbi/star')
+        print(f"✅ Star schema saved to powerbi/star ({star_export['format']}: "
+              f"{len(star_export['written'])} partitions written, "
+              f"{len(star_export['skipped'])} unchanged)")
+
+    # 2. Performance summary for KPIs
+    build_performance_summary(performance_metrics).to_csv('powerbi/performance_summary.csv', index=False)
+    print("✅ Performance summary saved to powerbi/performance_summary.csv")
+
+    # 3. Daily performance data for time series, read from the daily rollup
+    # partitions written by Step 7. Its send dates are simulated, so the series
+    # shows send volume over the window rather than a real campaign calendar
+    with span('daily performance') as s:
+        daily_performance = build_daily_performance(customer_segments)
+        daily_performance.to_csv('powerbi/daily_performance.csv', index=False)
+        s.rows = len(daily_performance)
+    print("✅ Daily performance data saved to powerbi/daily_performance.csv")
+
+    # 4. Customer segment details for drill-down
+    with span('segment details', rows=len(customer_segments)):
+        build_segment_details(customer_segments, lifetime_value).to_csv('powerbi/segment_details.csv', index=False)
+    print("✅ Segment details saved to powerbi/segment_details.csv")
+
+    # 5. Campaign comparison data
+    with span('campaign comparison', rows=len(ab_results)):
+        build_campaign_comparison(ab_results).to_csv('powerbi/campaign_comparison.csv', index=False)
+    print("✅ Campaign comparison data saved to powerbi/campaign_comparison.csv")
+
+    # 6. Segment distinct counts and percentiles from mergeable sketches
+    with span('segment metrics', rows=len(main_data)):
+        if args.chunksize:
+            chunks = load_table('dashboard_main_data', chunksize=args.chunksize)
+        else:
+            chunks = [main_data]
+        build_segment_metrics(chunks).to_csv('powerbi/segment_metrics.csv', index=False)
+    print("✅ Segment metrics saved to powerbi/segment_metrics.csv")
+
+    print(f"\n=== POWER BI FILES CREATED ===")
+    print("📁 powerbi/")
+    print("  ├── dashboard_main_data.csv      (Main dataset)")
+    print("  ├── performance_summary.csv      (KPI metrics)")
+    print("  ├── daily_performance.csv        (Time series, simulated send dates)")
+    print("  ├── segment_details.csv          (Segment analysis)")
+    print("  ├── campaign_comparison.csv      (A/B test results)")
+    print("  └── segment_metrics.csv          (Segment percentiles)")
+    if args.star_schema:
+        print("  └── star/                        (fact_campaign_sends + dim_* tables)")
+
+    finish_stage()
+    print("\n✅ Step 9 completed successfully!")
+    print("Next: Import these files into Power BI")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import sqlite3
+import os
+
+from insightx.cohorts import CohortMatrix, pivot
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import whole_customer_chunks
+from insightx.schema import load_table
+
+DATABASE_PATH = 'data/marketing_analysis.db'
+COHORT_TABLE = 'cohort_retention'
+TRANSACTION_COLUMNS = ['customer_id', 'transaction_date', 'amount']
+
+
+def build_cohorts(customers_df, transaction_chunks):
+    """Cohort matrix accumulated over an iterable of transaction frames."""
+    matrix = CohortMatrix(customers_df)
+    for chunk in transaction_chunks:
+        matrix.add(chunk)
+    return matrix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 10: registration cohort retention analysis')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream transactions in chunks of this many rows instead of loading them')
+    args = parser.parse_args(argv)
+
+    os.makedirs('data/results', exist_ok=True)
+    os.makedirs('powerbi', exist_ok=True)
+
+    print("Step 10: Analyzing registration cohort retention...")
+    start_stage('cohorts')
+
+    with span('load customers') as s:
+        customers_df = load_table('customers', usecols=['customer_id', 'registration_date'])
+        s.rows = len(customers_df)
+
+    # Transactions are sorted by customer_id, so whole-customer chunks can be
+    # streamed through the matrix without holding the full history
+    with span('cohort matrix') as s:
+        if args.chunksize:
+            chunks = whole_customer_chunks(
+                load_table('transactions', usecols=TRANSACTION_COLUMNS, chunksize=args.chunksize))
+        else:
+            chunks = [load_table('transactions', usecols=TRANSACTION_COLUMNS)]
+        matrix = build_cohorts(customers_df, chunks)
+        cohorts = matrix.table()
+        s.rows = int(matrix.transactions.sum())
+    print(f"Aggregated {matrix.transactions.sum():,} transactions into {matrix.n_cohorts} monthly "
+          f"cohorts x {matrix.n_ages} months since registration")
+    if matrix.skipped:
+        print(f"⚠️  Skipped {matrix.skipped:,} transactions before registration or for unknown customers")
+
+    # Display retention summary
+    print("\n=== COHORT RETENTION (share of cohort purchasing, by months since registration) ===")
+    retention_matrix = pivot(cohorts, 'retention_rate')
+    print((retention_matrix.set_index('cohort_month') * 100).round(1).iloc[:, :13].to_string(na_rep=''))
+
+    print("\n=== COHORT VALUE ===")
+    latest = cohorts.sort_values('months_since_registration').groupby('cohort_month').last()
+    for cohort_month, row in latest.iterrows():
+        print(f"  {cohort_month}: {int(row['cohort_size']):,} customers, "
+              f"${row['cumulative_revenue_per_customer']:.2f} revenue per customer to date")
+
+    # Save results
+    with span('save', rows=len(cohorts)):
+        cohorts.to_csv('data/results/cohort_retention.csv', index=False)
+        cohorts.to_csv('powerbi/cohort_retention.csv', index=False)
+        retention_matrix.to_csv('powerbi/cohort_retention_matrix.csv', index=False)
+        pivot(cohorts, 'revenue_per_customer').to_csv('powerbi/cohort_revenue_matrix.csv', index=False)
+
+        conn = sqlite3.connect(DATABASE_PATH)
+        cohorts.to_sql(COHORT_TABLE, conn, if_exists='replace', index=False)
+        conn.close()
+
+    finish_stage()
+    print("\n✅ Cohort retention saved to data/results/cohort_retention.csv")
+    print("✅ Power BI files saved to powerbi/cohort_retention.csv, cohort_retention_matrix.csv "
+          "and cohort_revenue_matrix.csv")
+    print(f"✅ SQL table {COHORT_TABLE} written to {DATABASE_PATH}")
+    print("✅ Step 10 completed successfully!")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import argparse
+import os
+
+from insightx.affinity import CategoryAffinity, TOP_K
+from insightx.feature_store import FeatureStore
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.schema import load_table, save_table
+
+TRANSACTION_COLUMNS = ['customer_id', 'amount', 'category']
+# Columns this step adds to the feature store
+AFFINITY_COLUMNS = ['top_category', 'next_category', 'next_category_score']
+
+
+def build_affinity(transaction_chunks):
+    """Customer x category spend matrix accumulated over transaction frames."""
+    affinity = CategoryAffinity()
+    for chunk in transaction_chunks:
+        affinity.add(chunk)
+    return affinity
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 11: customer x category affinity for cross-sell')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream transactions in chunks of this many rows instead of loading them')
+    parser.add_argument('--top-k', type=int, default=TOP_K,
+                        help='consequent categories kept per category when scoring customers')
+    args = parser.parse_args(argv)
+
+    os.makedirs('data/processed', exist_ok=True)
+    os.makedirs('data/results', exist_ok=True)
+    os.makedirs('powerbi', exist_ok=True)
+
+    print("Step 11: Building customer x category affinity...")
+    start_stage('affinity')
+
+    with span('purchase matrix') as s:
+        if args.chunksize:
+            chunks = load_table('transactions', usecols=TRANSACTION_COLUMNS, chunksize=args.chunksize)
+        else:
+            chunks = [load_table('transactions', usecols=TRANSACTION_COLUMNS)]
+        affinity = build_affinity(chunks)
+        s.rows = affinity.spend.nnz
+    customers = int((affinity.spend.getnnz(axis=1) > 0).sum())
+    print(f"Sparse purchase matrix: {customers:,} customers x "
+          f"{len(affinity.categories)} categories, {affinity.spend.nnz:,} non-zero cells")
+
+    with span('affinity scores') as s:
+        recommendations, lift = affinity.recommendations(args.top_k)
+        s.rows = len(recommendations)
+
+    # Display category lift and recommendation summary
+    print("\n=== CATEGORY CO-PURCHASE LIFT (top pairs) ===")
+    print(lift.sort_values('lift', ascending=False).head(10).round(3).to_string(index=False))
+
+    print("\n=== RECOMMENDED NEXT CATEGORY ===")
+    summary = recommendations['next_category'].value_counts(dropna=False)
+    for category, count in summary.items():
+        label = category if isinstance(category, str) else 'None (already buys every category)'
+        print(f"  {label}: {count:,} customers")
+
+    # Save results
+    with span('save', rows=len(recommendations)):
+        save_table(recommendations, 'data/processed/category_affinity.csv')
+        lift.round(4).to_csv('data/results/category_lift.csv', index=False)
+        lift.round(4).to_csv('powerbi/category_lift.csv', index=False)
+    with span('feature store', rows=len(recommendations)):
+        # Step 2 creates the store; without it there are no customers to add to
+        store = FeatureStore()
+        if store.capacity:
+            store.put(recommendations, AFFINITY_COLUMNS)
+
+    finish_stage()
+    print("\n✅ Customer affinity saved to data/processed/category_affinity.csv")
+    print("✅ Category lift saved to data/results/category_lift.csv and powerbi/category_lift.csv")
+    print("✅ Step 11 completed successfully!")
+    print("Next: Run Step 5 (Marketing Strategies) to target cross-sell campaigns by category")
+
+
+if __name__ == '__main__':
+    main()
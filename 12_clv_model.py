@@ -0,0 +1,121 @@
+import pandas as pd
+from datetime import datetime
+import argparse
+import json
+import os
+
+from insightx.clv import summarize, lifetime_value, DAYS_PER_PERIOD, HORIZON
+from insightx.feature_store import FeatureStore
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import merge_join, whole_customer_chunks
+from insightx.schema import load_table, save_table, day_numbers, dollars
+
+# Same analysis date as the RFM step
+ANALYSIS_DATE = datetime(2024, 12, 31)
+TRANSACTION_COLUMNS = ['customer_id', 'transaction_date', 'amount']
+# Columns this step adds to the feature store
+CLV_COLUMNS = ['expected_purchases', 'p_alive', 'expected_order_value', 'predicted_clv']
+
+
+def build_summary(transaction_chunks, analysis_day):
+    """Per-customer model inputs over whole-customer transaction chunks."""
+    return pd.concat([summarize(chunk, analysis_day) for chunk in transaction_chunks], ignore_index=True)
+
+
+def segment_clv(customer_segments, clv):
+    """Predicted CLV totals and averages per segment."""
+    segments = merge_join(customer_segments[['customer_id', 'segment_name']], clv)
+    summary = segments.assign(
+        predicted_clv=dollars(segments['predicted_clv']),
+        expected_order_value=dollars(segments['expected_order_value'])
+    ).groupby('segment_name', observed=True).agg(
+        customers=('customer_id', 'count'),
+        avg_p_alive=('p_alive', 'mean'),
+        avg_expected_purchases=('expected_purchases', 'mean'),
+        avg_expected_order_value=('expected_order_value', 'mean'),
+        avg_predicted_clv=('predicted_clv', 'mean'),
+        total_predicted_clv=('predicted_clv', 'sum'),
+    )
+    return summary.round(2).reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 12: probabilistic customer lifetime value model')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream transactions in chunks of this many rows instead of loading them')
+    parser.add_argument('--horizon-weeks', type=int, default=HORIZON,
+                        help='weeks of future purchases counted in the predicted CLV')
+    args = parser.parse_args(argv)
+
+    os.makedirs('data/processed', exist_ok=True)
+    os.makedirs('data/results', exist_ok=True)
+    os.makedirs('powerbi', exist_ok=True)
+
+    print("Step 12: Fitting BG/NBD + Gamma-Gamma customer lifetime value model...")
+    start_stage('clv')
+
+    with span('customer summaries') as s:
+        if args.chunksize:
+            chunks = whole_customer_chunks(
+                load_table('transactions', usecols=TRANSACTION_COLUMNS, chunksize=args.chunksize))
+        else:
+            chunks = [load_table('transactions', usecols=TRANSACTION_COLUMNS)]
+        summary = build_summary(chunks, day_numbers(ANALYSIS_DATE))
+        s.rows = len(summary)
+    print(f"Summarised {len(summary):,} customers (repeat purchases, last purchase, tenure, order value)")
+
+    with span('fit and predict', rows=len(summary)):
+        clv, purchases, spend = lifetime_value(summary, args.horizon_weeks)
+
+    r, alpha, a, b = purchases.params
+    p, q, gamma = spend.params
+    print("\n=== CLV MODEL ===")
+    print(f"BG/NBD (weeks): r={r:.4f}, alpha={alpha:.4f}, a={a:.4f}, b={b:.4f}, "
+          f"log-likelihood={purchases.log_likelihood:,.1f}")
+    print(f"Gamma-Gamma:    p={p:.4f}, q={q:.4f}, gamma={gamma:.4f}, "
+          f"log-likelihood={spend.log_likelihood:,.1f}")
+    print(f"Horizon: {args.horizon_weeks} weeks")
+    predicted = dollars(clv['predicted_clv'])
+    print(f"Predicted CLV: mean ${predicted.mean():.2f}, median ${predicted.median():.2f}, "
+          f"total ${predicted.sum():,.2f}")
+    print(f"Mean P(alive): {clv['p_alive'].mean():.1%}")
+
+    segments = None
+    if os.path.exists('data/processed/customer_segments.csv'):
+        segments = segment_clv(load_table('customer_segments', usecols=['customer_id', 'segment_name']), clv)
+        print("\n=== PREDICTED CLV BY SEGMENT ===")
+        print(segments.to_string(index=False))
+
+    # Save results
+    with span('save', rows=len(clv)):
+        save_table(clv, 'data/processed/customer_clv.csv')
+        with open('data/results/clv_model.json', 'w') as f:
+            json.dump({
+                'analysis_date': ANALYSIS_DATE.strftime('%Y-%m-%d'),
+                'period_days': DAYS_PER_PERIOD,
+                'horizon_periods': args.horizon_weeks,
+                'customers': len(clv),
+                'bgnbd': {'r': r, 'alpha': alpha, 'a': a, 'b': b,
+                          'log_likelihood': purchases.log_likelihood},
+                'gamma_gamma': {'p': p, 'q': q, 'gamma': gamma, 'log_likelihood': spend.log_likelihood},
+            }, f, indent=2)
+        if segments is not None:
+            segments.to_csv('data/results/segment_clv.csv', index=False)
+            segments.to_csv('powerbi/segment_clv.csv', index=False)
+    with span('feature store', rows=len(clv)):
+        # Step 2 creates the store; without it there are no customers to add to
+        store = FeatureStore()
+        if store.capacity:
+            store.put(clv, CLV_COLUMNS)
+
+    finish_stage()
+    print("\n✅ Customer CLV saved to data/processed/customer_clv.csv")
+    print("✅ Model parameters saved to data/results/clv_model.json")
+    if segments is not None:
+        print("✅ Segment CLV saved to data/results/segment_clv.csv and powerbi/segment_clv.csv")
+    print("✅ Step 12 completed successfully!")
+    print("Next: Run Step 9 (Power BI Preparation) to use predicted CLV in the dashboard")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import argparse
+import shutil
+import os
+
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import merge_join
+from insightx.scheduler import SendScheduler, CHANNEL_CAPS, MAX_CONTACTS_PER_WEEK, MAX_DELAY, HORIZON_DAYS
+from insightx.schema import TABLE_PATHS, load_table, day_numbers, to_datetime
+from insightx.star_schema import parquet_available
+
+PLAN_START = datetime(2025, 1, 1)  # Day after the analysis date
+PLAN_DIR = 'data/results/send_plan'
+ASSIGNMENT_COLUMNS = ['customer_id', 'monetary_total', 'send_frequency', 'channel_priority']
+
+
+def send_priority(assignments):
+    """Predicted CLV from Step 12 when available, spend to date otherwise (cents)."""
+    if os.path.exists(TABLE_PATHS['customer_clv']):
+        clv = load_table('customer_clv', usecols=['customer_id', 'predicted_clv'])
+        return merge_join(assignments[['customer_id']], clv, how='left')['predicted_clv'].fillna(0).values
+    return assignments['monetary_total'].values
+
+
+def parse_caps(overrides):
+    caps = dict(CHANNEL_CAPS)
+    for override in overrides or []:
+        channel, _, cap = override.rpartition('=')
+        if not channel or not cap.isdigit():
+            raise SystemExit(f"--cap expects CHANNEL=N, got {override!r}")
+        caps[channel] = int(cap)
+    return caps
+
+
+def write_batch(batch, date_label, file_format):
+    path = os.path.join(PLAN_DIR, f'send_date={date_label}')
+    if file_format == 'parquet':
+        batch.to_parquet(f'{path}.parquet', index=False, compression='zstd')
+    else:
+        batch.to_csv(f'{path}.csv.gz', index=False, compression='gzip')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 13: schedule campaign sends by channel')
+    parser.add_argument('--start-date', default=PLAN_START.strftime('%Y-%m-%d'),
+                        help='first day of the send plan (YYYY-MM-DD)')
+    parser.add_argument('--days', type=int, default=HORIZON_DAYS, help='length of the send plan in days')
+    parser.add_argument('--cap', action='append', metavar='CHANNEL=N',
+                        help='daily send cap for a channel (repeatable), e.g. --cap "Direct Mail=500"')
+    parser.add_argument('--max-contacts-per-week', type=int, default=MAX_CONTACTS_PER_WEEK,
+                        help='contacts per customer per plan week, across channels')
+    parser.add_argument('--max-delay', type=int, default=MAX_DELAY,
+                        help='days a capped send may be deferred before it is dropped')
+    parser.add_argument('--summary-only', action='store_true',
+                        help='plan and summarise without writing the per-day send batches')
+    args = parser.parse_args(argv)
+
+    os.makedirs('data/results', exist_ok=True)
+    os.makedirs('powerbi', exist_ok=True)
+
+    print("Step 13: Scheduling campaign sends...")
+    start_stage('schedule')
+
+    with span('load assignments') as s:
+        assignments = load_table('campaign_assignments', usecols=ASSIGNMENT_COLUMNS)
+        s.rows = len(assignments)
+
+    caps = parse_caps(args.cap)
+    scheduler = SendScheduler(assignments, send_priority(assignments), caps,
+                              args.max_contacts_per_week, args.max_delay)
+    start_day = int(day_numbers(pd.Timestamp(args.start_date)))
+    print(f"Planning {args.days} days from {args.start_date} for {len(assignments):,} customers "
+          f"on {len(scheduler.channels)} channels")
+
+    # Batches are written as they are produced, one file per send date
+    file_format = 'parquet' if parquet_available() else 'csv.gz'
+    if not args.summary_only:
+        shutil.rmtree(PLAN_DIR, ignore_errors=True)
+        os.makedirs(PLAN_DIR)
+    total_sends = 0
+    with span('schedule') as s:
+        for day, batch in scheduler.batches(start_day, args.days):
+            total_sends += len(batch)
+            if not args.summary_only and len(batch):
+                write_batch(batch, str(np.datetime64(day, 'D')), file_format)
+        s.rows = total_sends
+
+    summary = scheduler.summary()
+    summary.insert(0, 'send_date', to_datetime(summary.pop('day')).dt.strftime('%Y-%m-%d'))
+
+    # Display plan summary
+    print("\n=== SEND PLAN BY CHANNEL ===")
+    by_channel = summary.groupby('channel', sort=False)[['due', 'sent', 'deferred', 'expired', 'limited']].sum()
+    by_channel['daily_cap'] = [caps[channel] for channel in by_channel.index]
+    by_channel['peak_day'] = summary.groupby('channel', sort=False)['sent'].max()
+    print(by_channel.to_string())
+    print(f"\nTotal sends planned: {total_sends:,} "
+          f"({total_sends / max(len(assignments), 1):.1f} per customer over {args.days} days)")
+
+    # Save results
+    with span('save', rows=len(summary)):
+        summary.to_csv('data/results/send_schedule_summary.csv', index=False)
+        summary.to_csv('powerbi/send_schedule.csv', index=False)
+
+    finish_stage()
+    if not args.summary_only:
+        print(f"\n✅ Send batches saved to {PLAN_DIR}/ ({file_format}, one file per send date)")
+    print("✅ Schedule summary saved to data/results/send_schedule_summary.csv and powerbi/send_schedule.csv")
+    print("✅ Step 13 completed successfully!")
+
+
+if __name__ == '__main__':
+    main()
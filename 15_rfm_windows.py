@@ -0,0 +1,87 @@
+import pandas as pd
+import numpy as np
+from datetime import datetime
+import argparse
+import os
+
+from insightx.feature_store import FeatureStore
+from insightx.instrumentation import start_stage, finish_stage, span
+from insightx.joins import whole_customer_chunks
+from insightx.rfm_windows import WindowedRFM, WINDOWS, SCORE_WINDOW, SCORE_COLUMNS, window_columns, quantile_scores
+from insightx.schema import load_table, save_table, day_numbers, to_datetime, dollars
+
+ANALYSIS_DATE = datetime(2024, 12, 31)  # Same as-of date as Step 2's all-time RFM
+TRANSACTION_COLUMNS = ['customer_id', 'transaction_date', 'amount']
+# Columns this step adds to the feature store (as of the latest date)
+WINDOW_FEATURE_COLUMNS = ['as_of_date'] + window_columns() + SCORE_COLUMNS
+
+
+def windowed_features(transaction_chunks, as_of_days):
+    """Window features for customer_id-sorted transaction frames, one chunk of customers at a time."""
+    parts = [WindowedRFM(chunk).features(as_of_days) for chunk in whole_customer_chunks(transaction_chunks)]
+    return pd.concat(parts, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Step 15: trailing-window RFM features and quantile scores')
+    parser.add_argument('--as-of', action='append', metavar='YYYY-MM-DD',
+                        help=f'as-of date for the windows (repeatable; default {ANALYSIS_DATE:%Y-%m-%d})')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='stream transactions in chunks of this many rows instead of loading them')
+    args = parser.parse_args(argv)
+    as_of_days = sorted({day_numbers(date) for date in args.as_of or [ANALYSIS_DATE.strftime('%Y-%m-%d')]})
+
+    os.makedirs('data/processed', exist_ok=True)
+
+    print("Step 15: Calculating trailing-window RFM features and scores...")
+    start_stage('rfm_windows')
+
+    with span('window features') as s:
+        if args.chunksize:
+            chunks = load_table('transactions', usecols=TRANSACTION_COLUMNS, chunksize=args.chunksize)
+        else:
+            chunks = [load_table('transactions', usecols=TRANSACTION_COLUMNS)]
+        features = windowed_features(chunks, as_of_days)
+        s.rows = len(features)
+
+    with span('quantile scores', rows=len(features)):
+        features = quantile_scores(features)
+
+    print(f"Windows: {', '.join(f'{w}d' for w in WINDOWS)}; "
+          f"F and M scores over the last {SCORE_WINDOW} days")
+
+    # Display per-date summary
+    print("\n=== TRAILING-WINDOW RFM ===")
+    as_of_dates = to_datetime(features['as_of_date']).dt.strftime('%Y-%m-%d')
+    summary = features.groupby(as_of_dates).agg(
+        customers=('customer_id', 'count'),
+        avg_recency=('recency', 'mean'),
+        **{f'active_{w}d': (f'frequency_{w}d', lambda f: (f > 0).mean()) for w in WINDOWS},
+        **{f'avg_spend_{w}d': (f'monetary_{w}d', lambda m: dollars(m.mean())) for w in WINDOWS},
+    ).round(3)
+    summary.index.name = 'as_of_date'
+    print(summary.T.to_string(float_format=lambda v: f'{v:,.3f}'.rstrip('0').rstrip('.')))
+
+    latest = features[features['as_of_date'] == as_of_days[-1]]
+    print(f"\n=== TOP RFM CELLS ({np.datetime64(as_of_days[-1], 'D')}) ===")
+    cells = latest['rfm_score'].value_counts().head(10)
+    for cell, count in cells.items():
+        print(f"  {cell}: {count:,} customers ({count / len(latest):.1%})")
+
+    # Save results
+    with span('save', rows=len(features)):
+        save_table(features, 'data/processed/rfm_windows.csv')
+    with span('feature store', rows=len(latest)):
+        # Step 2 creates the store; without it there are no customers to add to
+        store = FeatureStore()
+        if store.capacity:
+            store.put(latest, WINDOW_FEATURE_COLUMNS)
+
+    finish_stage()
+    print("\n✅ Window features and scores saved to data/processed/rfm_windows.csv")
+    print("✅ Step 15 completed successfully!")
+    print("Next: Run Step 4 with --windowed-features to cluster on them")
+
+
+if __name__ == '__main__':
+    main()
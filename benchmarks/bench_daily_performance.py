@@ -0,0 +1,86 @@
+"""Benchmark: nested-loop vs vectorized daily performance simulation.
+
+Run from the repository root:
+
+    python benchmarks/bench_daily_performance.py
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insightx.simulation import BASE_PERFORMANCE, simulate_daily_performance
+
+
+def loop_daily_performance(dates, segments, base_performance):
+    """The original Step 9 loop (minus its per-row dict rebuild): scalar draws per row."""
+    np.random.seed(42)
+    daily_data = []
+    for date in dates:
+        for segment in segments:
+            for test_group in ['A', 'B']:
+                emails_sent = np.random.poisson(base_performance[segment]['emails'])
+                if test_group == 'A':
+                    ctr = base_performance[segment]['ctr_base'] * 0.85
+                else:
+                    ctr = base_performance[segment]['ctr_base'] * 1.23
+                clicks = int(emails_sent * ctr * np.random.uniform(0.8, 1.2))
+                conversions = int(clicks * 0.25 * np.random.uniform(0.8, 1.2))
+                revenue = conversions * np.random.uniform(50, 200)
+                daily_data.append({
+                    'date': date,
+                    'segment_name': segment,
+                    'test_group': test_group,
+                    'campaign_version': 'Generic' if test_group == 'A' else 'Targeted',
+                    'emails_sent': emails_sent,
+                    'clicks': clicks,
+                    'conversions': conversions,
+                    'revenue': round(revenue, 2),
+                    'ctr': round(clicks/emails_sent if emails_sent > 0 else 0, 4),
+                    'conversion_rate': round(conversions/clicks if clicks > 0 else 0, 4)
+                })
+    return pd.DataFrame(daily_data)
+
+
+def synthetic_segments(n_segments):
+    if n_segments <= len(BASE_PERFORMANCE):
+        return dict(list(BASE_PERFORMANCE.items())[:n_segments])
+    rng = np.random.default_rng(0)
+    return {
+        f'Segment {i:03d}': {'emails': int(rng.integers(50, 200)),
+                             'ctr_base': float(rng.uniform(0.03, 0.15))}
+        for i in range(n_segments)
+    }
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+SCENARIOS = [
+    ('Nov-Dec, 4 segments', 61, 4),
+    ('1 year, 4 segments', 365, 4),
+    ('1 year, 100 segments', 365, 100),
+    ('3 years, 300 segments', 3 * 365, 300),
+]
+
+if __name__ == '__main__':
+    print(f"{'scenario':<24} {'rows':>9} {'loop (s)':>10} {'vector (s)':>11} {'speedup':>9}")
+    for label, n_days, n_segments in SCENARIOS:
+        base_performance = synthetic_segments(n_segments)
+        dates = pd.date_range('2024-01-01', periods=n_days, freq='D')
+        segments = list(base_performance)
+
+        loop_seconds, loop_df = timed(loop_daily_performance, dates, segments, base_performance)
+        vector_seconds, vector_df = timed(simulate_daily_performance, dates, segments, base_performance)
+        assert list(loop_df.columns) == list(vector_df.columns)
+        assert len(loop_df) == len(vector_df)
+
+        print(f"{label:<24} {len(vector_df):>9,} {loop_seconds:>10.3f} {vector_seconds:>11.4f} "
+              f"{loop_seconds / vector_seconds:>8.0f}x")
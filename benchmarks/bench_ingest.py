@@ -0,0 +1,83 @@
+"""Benchmark: raw CSV loads, untyped vs declared-schema readers, and validation.
+
+Loads ``--data-dir``'s customers.csv and transactions.csv (as written by
+``01_data_generation.py``) four ways and checks they agree:
+
+* inferred: ``pd.read_csv`` with no dtypes plus ``pd.to_datetime`` with no
+  format, as the stages originally loaded them;
+* c engine: pandas' C parser with the registry's dtypes (the previous
+  ``load_table``);
+* fast typed: ``insightx.ingest.read_raw`` (pyarrow when installed);
+* validate: ``validate_table`` over the file in text chunks, without
+  rewriting it.
+
+Run from the repository root after generating data, e.g.:
+
+    python 01_data_generation.py --vectorized --customers 400000
+    python benchmarks/bench_ingest.py [--data-dir data/raw] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insightx.ingest import read_raw, validate_table, pyarrow_csv  # noqa: E402
+
+DATE_COLUMNS = {'customers': 'registration_date', 'transactions': 'transaction_date'}
+
+
+def inferred_load(path, name):
+    df = pd.read_csv(path)
+    df[DATE_COLUMNS[name]] = pd.to_datetime(df[DATE_COLUMNS[name]])
+    return df
+
+
+def best_of(repeat, func, *args, **kwargs):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Raw CSV ingest benchmark')
+    parser.add_argument('--data-dir', default='data/raw')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engines = ['c'] + (['pyarrow'] if pyarrow_csv() else [])
+    print(f"Fast typed reader: {engines[-1]}")
+    known = None
+    for name in ['customers', 'transactions']:
+        path = os.path.join(args.data_dir, f'{name}.csv')
+        size = os.path.getsize(path) / 1e6
+        inferred_time, inferred = best_of(args.repeat, inferred_load, path, name)
+        rows = len(inferred)
+        print(f"\n{name}: {rows:,} rows, {size:.0f} MB")
+        print(f"  {'inferred':<12} {inferred_time:6.2f}s  {inferred.memory_usage(deep=True).sum() / 1e6:6.0f} MB")
+
+        frames = {}
+        for engine in engines:
+            elapsed, frames[engine] = best_of(args.repeat, read_raw, name, path, engine=engine)
+            label = 'c engine' if engine == 'c' else 'fast typed'
+            print(f"  {label:<12} {elapsed:6.2f}s  {frames[engine].memory_usage(deep=True).sum() / 1e6:6.0f} MB"
+                  f"  ({inferred_time / elapsed:.1f}x)")
+        if len(frames) > 1:
+            pd.testing.assert_frame_equal(frames['c'], frames['pyarrow'])
+
+        elapsed, report = best_of(1, validate_table, name, path, known=known, rewrite=False)
+        known = report['ids']
+        print(f"  {'validate':<12} {elapsed:6.2f}s  {rows / elapsed / 1e6:.1f}M rows/s, "
+              f"{report['rejected']:,} rejected")
+
+    print("\n✅ Typed readers agree")
+
+
+if __name__ == '__main__':
+    main()
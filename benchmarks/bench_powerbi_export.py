@@ -0,0 +1,99 @@
+"""Benchmark: wide dashboard CSV vs star-schema partitioned export.
+
+Compares on-disk size, write time and refresh (read) time of
+powerbi/dashboard_main_data.csv against the star-schema export, including
+an incremental refresh where only the newest month of sends is new.
+Needs Step 7 results with a send_date column. Run from the repository root:
+
+    python benchmarks/bench_powerbi_export.py [--scale 10]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insightx.star_schema import (build_star_schema, read_dimensions, read_fact_partitions,
+                                  write_star_schema)
+
+
+def dashboard_tables(scale):
+    customer_segments = pd.read_csv('data/processed/customer_segments.csv')
+    ab_results = pd.read_csv('data/results/ab_test_results.csv')
+    if scale > 1:
+        # Replicate customers under new ids to emulate a larger customer base
+        offset = int(customer_segments['customer_id'].max())
+        customer_segments = pd.concat(
+            [customer_segments.assign(customer_id=customer_segments['customer_id'] + i * offset)
+             for i in range(scale)], ignore_index=True)
+        ab_results = pd.concat(
+            [ab_results.assign(customer_id=ab_results['customer_id'] + i * offset)
+             for i in range(scale)], ignore_index=True)
+
+    # Same construction as Step 9's main dashboard table
+    main_data = customer_segments.merge(
+        ab_results[['customer_id', 'test_group', 'campaign_version', 'clicked', 'converted', 'purchase_amount']],
+        on='customer_id', how='left'
+    )
+    main_data['revenue_per_customer'] = main_data['purchase_amount']
+    main_data['customer_lifetime_value'] = main_data['monetary_total'] * 2.5
+    main_data['engagement_score'] = (
+        (main_data['frequency'] / main_data['frequency'].max() * 40) +
+        (main_data['monetary_total'] / main_data['monetary_total'].max() * 40) +
+        ((365 - main_data['recency']) / 365 * 20)
+    ).round(1)
+    return main_data, ab_results
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=1,
+                        help='replicate the customer base this many times')
+    args = parser.parse_args()
+
+    main_data, ab_results = dashboard_tables(args.scale)
+    workdir = tempfile.mkdtemp(prefix='insightx_bench_')
+    try:
+        csv_path = os.path.join(workdir, 'dashboard_main_data.csv')
+        csv_write, _ = timed(main_data.to_csv, csv_path, index=False)
+        csv_read, _ = timed(pd.read_csv, csv_path)
+        csv_size = os.path.getsize(csv_path)
+
+        star_root = os.path.join(workdir, 'star')
+        star_write, _ = timed(lambda: write_star_schema(build_star_schema(main_data, ab_results), star_root))
+        star_read, _ = timed(read_fact_partitions, star_root)
+        star_size = directory_size(star_root)
+
+        # Incremental refresh: export without the last month, then with it
+        last_month = pd.to_datetime(ab_results['send_date']).dt.to_period('M').max()
+        earlier = ab_results[pd.to_datetime(ab_results['send_date']).dt.to_period('M') < last_month]
+        shutil.rmtree(star_root)
+        write_star_schema(build_star_schema(main_data, earlier), star_root)
+        incremental_write, export = timed(lambda: write_star_schema(
+            build_star_schema(main_data, ab_results, read_dimensions(star_root)), star_root))
+        incremental_read, _ = timed(read_fact_partitions, star_root, export['written'])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Rows: {len(main_data):,} (scale x{args.scale}), star format: {export['format']}")
+    print(f"{'':<34} {'size (MB)':>10} {'write (s)':>10} {'refresh (s)':>12}")
+    print(f"{'wide CSV (full rewrite/reload)':<34} {csv_size / 1e6:>10.2f} {csv_write:>10.3f} {csv_read:>12.3f}")
+    print(f"{'star schema (full)':<34} {star_size / 1e6:>10.2f} {star_write:>10.3f} {star_read:>12.3f}")
+    print(f"{'star schema (new month only)':<34} {'':>10} {incremental_write:>10.3f} {incremental_read:>12.3f}"
+          f"   partitions written: {export['written']}")
@@ -0,0 +1,103 @@
+"""Startup time of the lightweight ``python -m insightx`` commands.
+
+Runs ``stages``, ``score`` and ``query`` against a throwaway cluster model
+and SQLite database, reports the median wall time of ``--runs`` launches,
+and checks with ``-X importtime`` that none of them imports pandas, NumPy,
+scikit-learn or matplotlib. Exits 1 if a command misses ``--target-ms``
+or pulls in a heavy module. Run from the repository root:
+
+    python benchmarks/cli_startup.py [--runs 20] [--target-ms 150]
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'numpy', 'sklearn', 'matplotlib', 'seaborn', 'scipy']
+
+
+def make_fixtures(workdir):
+    model_path = os.path.join(workdir, 'cluster_model.json')
+    with open(model_path, 'w') as f:
+        json.dump({
+            'features': ['recency', 'frequency', 'monetary_total', 'monetary_avg', 'age'],
+            'mean': [90.0, 7.0, 70000.0, 9000.0, 40.0],
+            'scale': [80.0, 5.0, 60000.0, 4000.0, 14.0],
+            'centers': [[-0.6, 1.8, 1.9, 1.1, 0.0], [-0.3, 0.1, 0.0, 0.2, 0.5],
+                        [1.6, -0.8, -0.7, -0.3, 0.1], [-0.2, -0.4, -0.5, -0.6, -0.8]],
+            'segments': {'0': 'Champions', '1': 'Loyal Customers', '2': 'At Risk',
+                         '3': 'Potential Loyalists'},
+        }, f)
+    db_path = os.path.join(workdir, 'marketing_analysis.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('CREATE TABLE customers (customer_id INTEGER, behavior_type TEXT)')
+    conn.executemany('INSERT INTO customers VALUES (?, ?)',
+                     [(i, ['High_Value', 'Regular', 'Occasional'][i % 3]) for i in range(1000)])
+    conn.commit()
+    conn.close()
+    return {
+        'stages': ['stages'],
+        'score': ['score', '--recency', '12', '--frequency', '9', '--monetary-total', '1450',
+                  '--monetary-avg', '161', '--age', '34', '--model', model_path],
+        'query': ['query', 'SELECT behavior_type, COUNT(*) FROM customers GROUP BY 1',
+                  '--db', db_path],
+    }
+
+
+def heavy_imports(args):
+    """Heavy top-level modules imported by ``python -m insightx <args>``."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'insightx'] + args,
+                            cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    imported = set()
+    for line in result.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            imported.add(line.rsplit('|', 1)[1].strip().split('.')[0])
+    return sorted(imported.intersection(HEAVY_MODULES))
+
+
+def median_ms(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'insightx'] + args, cwd=REPO_ROOT,
+                       stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--target-ms', type=float, default=150)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='insightx_cli_')
+    failures = []
+    try:
+        commands = make_fixtures(workdir)
+        start_times = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', 'pass'], check=True)
+            start_times.append((time.perf_counter() - start) * 1000)
+        print(f"{'bare python':<10} {statistics.median(start_times):8.1f} ms  (interpreter floor)")
+        for name, command in commands.items():
+            elapsed = median_ms(command, args.runs)
+            heavy = heavy_imports(command)
+            ok = elapsed <= args.target_ms and not heavy
+            print(f"{name:<10} {elapsed:8.1f} ms  {'✅' if ok else '❌'}"
+                  + (f"  imports {', '.join(heavy)}" if heavy else ''))
+            if not ok:
+                failures.append(name)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nTarget: {args.target_ms:.0f} ms median, no heavy imports")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,192 @@
+"""Load generator for the ``python -m insightx serve`` lookup service.
+
+Starts the service on a free port (or targets ``--url``), then sends
+``--requests`` lookups from ``--concurrency`` keep-alive connections:
+single ``GET /customers/<id>`` requests, ``--batch-size`` id batches, and a
+``--score-share`` of ``POST /score`` requests with raw RFM inputs. Ids are
+drawn so that ``--hot-share`` of requests hit a small hot set, which is
+what the LRU cache is for. Reports throughput and p50/p95/p99/max latency
+for each request type, plus the in-process lookup time without HTTP, and
+exits 1 if single-lookup p99 exceeds ``--target-ms``. The client threads
+share the machine with the server, so on a few cores raise
+``--concurrency`` to measure throughput rather than latency. Run from a
+directory whose data/ holds a completed pipeline run:
+
+    python benchmarks/lookup_service.py [--requests 20000] [--concurrency 1]
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from insightx.service import LookupService  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, cache_size):
+    process = subprocess.Popen([sys.executable, '-m', 'insightx', 'serve', '--port', str(port),
+                                '--cache-size', str(cache_size)],
+                               env={**os.environ, 'PYTHONPATH': REPO_ROOT}, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit("Lookup service exited during startup (is there a completed pipeline run in data/?)")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    sys.exit("Lookup service did not start within 30s")
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def make_workload(ids, args, rng):
+    """List of (kind, method, path, body) requests."""
+    hot = rng.sample(ids, max(1, int(len(ids) * 0.01)))
+    pick = lambda: rng.choice(hot) if rng.random() < args.hot_share else rng.choice(ids)  # noqa: E731
+    workload = []
+    for _ in range(args.requests):
+        roll = rng.random()
+        if roll < args.score_share:
+            body = {'recency': rng.randint(1, 365), 'frequency': rng.randint(1, 30),
+                    'monetary_total': round(rng.uniform(20, 5000), 2),
+                    'monetary_avg': round(rng.uniform(10, 400), 2), 'age': rng.randint(18, 80)}
+            workload.append(('score', 'POST', '/score', json.dumps(body)))
+        elif args.batch_size and roll < args.score_share + args.batch_share:
+            body = {'customer_ids': [pick() for _ in range(args.batch_size)]}
+            workload.append((f'batch x{args.batch_size}', 'POST', '/customers', json.dumps(body)))
+        else:
+            workload.append(('lookup', 'GET', f'/customers/{pick()}', None))
+    return workload
+
+
+def run_load(host, port, workload, concurrency):
+    latencies = {}
+    errors = []
+    lock = threading.Lock()
+    chunks = [workload[i::concurrency] for i in range(concurrency)]
+
+    def worker(chunk):
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        local = {}
+        for kind, method, path, body in chunk:
+            headers = {'Content-Type': 'application/json'} if body else {}
+            start = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors.append(f'{method} {path}: HTTP {response.status}')
+            except OSError as error:
+                errors.append(f'{method} {path}: {error}')
+                conn = http.client.HTTPConnection(host, port, timeout=10)
+                continue
+            local.setdefault(kind, []).append((time.perf_counter() - start) * 1000)
+        conn.close()
+        with lock:
+            for kind, values in local.items():
+                latencies.setdefault(kind, []).extend(values)
+
+    threads = [threading.Thread(target=worker, args=(chunk,)) for chunk in chunks]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def in_process_latency(service, ids, rng, n=20000):
+    """Median and p99 microseconds of LookupService.lookup, cold then warm."""
+    sample = [rng.choice(ids) for _ in range(n)]
+    results = {}
+    for label in ['cold', 'warm']:
+        if label == 'cold':
+            service.lookup.cache_clear()
+        timings = []
+        for customer_id in sample:
+            start = time.perf_counter()
+            service.lookup(customer_id)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+        results[label] = (statistics.median(timings), percentile(timings, 0.99))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', help='existing service to target (default: start one)')
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=50, help='ids per batch request (0: none)')
+    parser.add_argument('--batch-share', type=float, default=0.05)
+    parser.add_argument('--score-share', type=float, default=0.05)
+    parser.add_argument('--hot-share', type=float, default=0.8,
+                        help='share of lookups hitting the hottest 1%% of customers')
+    parser.add_argument('--cache-size', type=int, default=100_000)
+    parser.add_argument('--target-ms', type=float, default=1.0, help='single-lookup p99 target')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    service = LookupService.from_files(cache_size=args.cache_size)
+    ids = [int(i) for i in service.store.ids()]
+    print(f"{len(ids):,} customers in the feature store")
+
+    process = None
+    if args.url:
+        url = urlparse(args.url)
+        host, port = url.hostname, url.port
+    else:
+        host, port = '127.0.0.1', free_port()
+        process = start_server(port, args.cache_size)
+    try:
+        workload = make_workload(ids, args, rng)
+        latencies, errors, elapsed = run_load(host, port, workload, args.concurrency)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    completed = sum(len(values) for values in latencies.values())
+    print(f"\n{completed:,} requests in {elapsed:.2f}s over {args.concurrency} connections: "
+          f"{completed / elapsed:,.0f} req/s, {len(errors)} errors")
+    print(f"{'request':<12} {'count':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for kind, values in sorted(latencies.items()):
+        values.sort()
+        print(f"{kind:<12} {len(values):>8,} {percentile(values, 0.5):>8.3f} {percentile(values, 0.95):>8.3f} "
+              f"{percentile(values, 0.99):>8.3f} {values[-1]:>8.3f}")
+    for error in errors[:5]:
+        print(f"  ❌ {error}")
+
+    in_process = in_process_latency(service, ids, rng)
+    for label, (median, p99) in in_process.items():
+        print(f"in-process lookup ({label} cache): median {median:.1f} µs, p99 {p99:.1f} µs")
+
+    lookup_p99 = percentile(sorted(latencies.get('lookup', [float('inf')])), 0.99)
+    ok = lookup_p99 <= args.target_ms and not errors
+    print(f"\nSingle-lookup p99 {lookup_p99:.3f} ms (target {args.target_ms:.1f} ms) {'✅' if ok else '❌'}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,91 @@
+"""Per-table memory before/after the compact dtype registry.
+
+Each pipeline table is replicated (with fresh customer/transaction ids) up
+to ``--sample-customers``, written to a temporary CSV and loaded twice: with
+plain ``pd.read_csv`` and with ``insightx.schema.load_table``. Deep memory
+is measured at the sample size and projected linearly to the target
+customer counts. Run from the repository root:
+
+    python benchmarks/memory_report.py [--sample-customers 200000] [--targets 1000000 10000000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insightx.schema import TABLE_PATHS, load_table, memory_usage
+
+
+def replicate(df, copies):
+    """Stack ``copies`` of ``df`` with ids shifted so every copy is distinct."""
+    frames = []
+    customer_offset = int(df['customer_id'].max()) if 'customer_id' in df else 0
+    transaction_offset = int(df['transaction_id'].max()) if 'transaction_id' in df else 0
+    for i in range(copies):
+        frame = df.copy()
+        if customer_offset:
+            frame['customer_id'] += i * customer_offset
+        if transaction_offset:
+            frame['transaction_id'] += i * transaction_offset
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def format_bytes(n):
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if n < 1024:
+            return f'{n:,.1f} {unit}'
+        n /= 1024
+    return f'{n:,.1f} TB'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sample-customers', type=int, default=200_000)
+    parser.add_argument('--targets', type=int, nargs='+', default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+
+    base_customers = len(pd.read_csv(TABLE_PATHS['customers'], usecols=['customer_id']))
+    copies = max(1, round(args.sample_customers / base_customers))
+    sample_customers = base_customers * copies
+
+    workdir = tempfile.mkdtemp(prefix='insightx_mem_')
+    rows = []
+    try:
+        for name, path in TABLE_PATHS.items():
+            if not os.path.exists(path):
+                continue
+            source = pd.read_csv(path)
+            sample_path = os.path.join(workdir, os.path.basename(path))
+            if 'customer_id' in source:
+                replicate(source, copies).to_csv(sample_path, index=False)
+            else:
+                # Aggregate tables (one row per segment x group) do not grow
+                shutil.copy(path, sample_path)
+            before = pd.read_csv(sample_path)
+            after = load_table(name, sample_path)
+            scales = 'customer_id' in source
+            rows.append((name, len(before), memory_usage(before), memory_usage(after), scales))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"Measured at {sample_customers:,} customers ({copies} copies of the current data)\n")
+    header = f"{'table':<30} {'rows':>12} {'before':>12} {'after':>12} {'ratio':>7}"
+    for target in [sample_customers] + args.targets:
+        factor = target / sample_customers
+        print(f"--- {target:,} customers" + (" (measured)" if target == sample_customers else " (projected)"))
+        print(header)
+        total_before = total_after = 0
+        for name, n_rows, before, after, scales in rows:
+            f = factor if scales else 1
+            total_before += before * f
+            total_after += after * f
+            print(f"{name:<30} {int(n_rows * f):>12,} {format_bytes(before * f):>12} "
+                  f"{format_bytes(after * f):>12} {before / after:>6.1f}x")
+        print(f"{'TOTAL':<30} {'':>12} {format_bytes(total_before):>12} "
+              f"{format_bytes(total_after):>12} {total_before / total_after:>6.1f}x\n")
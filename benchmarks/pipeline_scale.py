@@ -0,0 +1,217 @@
+"""Scale benchmark for every pipeline stage.
+
+For each dataset size the raw data is generated with
+``01_data_generation.py --vectorized --customers N`` into its own working
+directory, then steps 02-09 are run there as subprocesses. Wall time and
+peak RSS are recorded per stage (with the stage's own span report when it
+writes one), appended to a JSON history and compared
+with a saved baseline; stages slower or larger than the baseline by more
+than ``--threshold`` are reported as regressions (exit status 1).
+
+Run from anywhere:
+
+    python benchmarks/pipeline_scale.py --sizes 10000 100000
+    python benchmarks/pipeline_scale.py --sizes 10000 100000 --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from insightx.instrumentation import PROFILE_DIR, PROFILE_ENV
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_ROOT, 'benchmarks', 'results')
+DATA_DIR = os.path.join(REPO_ROOT, 'benchmarks', '.data')
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+STAGES = [
+    ('generate', '01_data_generation.py', ['--vectorized', '--customers', '{customers}']),
+    ('ingest', '14_ingest_validation.py', []),
+    ('rfm', '02_rfm_analysis.py', []),
+    ('rfm_windows', '15_rfm_windows.py', []),
+    ('sql', '03_create_sql_database.py', []),
+    ('clustering', '04_kmeans_clustering.py', ['--headless']),
+    ('affinity', '11_category_affinity.py', []),
+    ('clv', '12_clv_model.py', []),
+    ('strategies', '05_marketing_strategies.py', []),
+    ('schedule', '13_send_scheduler.py', []),
+    ('ab_setup', '06_ab_testing_setup.py', []),
+    ('ab_results', '07_ab_test_results.py', ['--rebuild-rollups']),
+    ('visualize', '08_create_visualizations.py', ['--headless', '--no-cache']),
+    ('powerbi', '09_powerbi_preparation.py', []),
+    ('cohorts', '10_cohort_analysis.py', []),
+]
+
+
+def _peak_mb(usage):
+    # ru_maxrss is KB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+
+def run_stage(script, args, cwd, timeout, log, profile=None):
+    """Run one stage script; return status, seconds and peak RSS in MB."""
+    env = dict(os.environ, MPLBACKEND='Agg', INSIGHTX_HEADLESS='1')
+    if profile:
+        env[PROFILE_ENV] = profile
+    command = [sys.executable, os.path.join(REPO_ROOT, script)] + args
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=cwd, stdout=log, stderr=subprocess.STDOUT, env=env)
+
+    if not hasattr(os, 'wait4'):
+        # No per-child rusage (Windows): time only
+        try:
+            returncode = proc.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            return {'status': 'timeout', 'seconds': round(time.perf_counter() - start, 3), 'peak_mb': None}
+        status = 'ok' if returncode == 0 else 'failed'
+        return {'status': status, 'seconds': round(time.perf_counter() - start, 3), 'peak_mb': None}
+
+    status = 'ok'
+    while True:
+        pid, wait_status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if timeout and time.perf_counter() - start > timeout:
+            proc.kill()
+            pid, wait_status, usage = os.wait4(proc.pid, 0)
+            status = 'timeout'
+            break
+        time.sleep(0.05)
+    seconds = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(wait_status)
+    if status == 'ok' and proc.returncode != 0:
+        status = 'failed'
+    return {'status': status, 'seconds': round(seconds, 3), 'peak_mb': _peak_mb(usage)}
+
+
+def benchmark_size(customers, timeout, reuse_data, profile=None):
+    workdir = os.path.join(DATA_DIR, f'customers_{customers}')
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    failed = False
+    with open(os.path.join(workdir, 'benchmark.log'), 'w') as log:
+        for name, script, args in STAGES:
+            if failed:
+                results[name] = {'status': 'skipped', 'seconds': None, 'peak_mb': None}
+                continue
+            if name == 'generate' and reuse_data and os.path.exists(
+                    os.path.join(workdir, 'data', 'raw', 'transactions.csv')):
+                results[name] = {'status': 'reused', 'seconds': None, 'peak_mb': None}
+                continue
+            log.write(f'\n===== {name} ({script}) =====\n')
+            log.flush()
+            args = [arg.format(customers=customers) for arg in args]
+            report_path = os.path.join(workdir, PROFILE_DIR, f'{name}.json')
+            if os.path.exists(report_path):
+                os.remove(report_path)
+            results[name] = run_stage(script, args, workdir, timeout, log, profile)
+            if os.path.exists(report_path):
+                with open(report_path) as f:
+                    results[name]['spans'] = json.load(f)['spans']
+            failed = results[name]['status'] not in ('ok',)
+            print(f"  {customers:>11,} {name:<20} {results[name]['status']:<8} "
+                  f"{results[name]['seconds']:>9.2f}s {results[name]['peak_mb'] or 0:>9.1f} MB")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(run, baseline, threshold, min_seconds):
+    """List regressions of ``run`` against ``baseline``."""
+    regressions = []
+    for size, stages in run['results'].items():
+        for stage, current in stages.items():
+            previous = baseline['results'].get(size, {}).get(stage)
+            if not previous or previous['status'] != 'ok':
+                continue
+            if current['status'] not in ('ok', 'reused', 'skipped'):
+                regressions.append(f"{size} {stage}: {current['status']} (baseline ok)")
+                continue
+            if current['status'] != 'ok':
+                continue
+            if (current['seconds'] > previous['seconds'] * (1 + threshold)
+                    and current['seconds'] - previous['seconds'] >= min_seconds):
+                regressions.append(f"{size} {stage}: {previous['seconds']:.2f}s -> "
+                                   f"{current['seconds']:.2f}s")
+            if (current['peak_mb'] and previous['peak_mb']
+                    and current['peak_mb'] > previous['peak_mb'] * (1 + threshold)):
+                regressions.append(f"{size} {stage}: peak {previous['peak_mb']:.0f} MB -> "
+                                   f"{current['peak_mb']:.0f} MB")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time and measure every pipeline stage at scale')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='customer counts to benchmark')
+    parser.add_argument('--timeout', type=float, default=1800,
+                        help='per-stage timeout in seconds; later stages at that size are skipped')
+    parser.add_argument('--reuse-data', action='store_true',
+                        help='skip generation when a dataset of that size already exists')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative slowdown / memory growth flagged as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.25,
+                        help='ignore slowdowns smaller than this many seconds')
+    parser.add_argument('--baseline', default=os.path.join(RESULTS_DIR, 'baseline.json'))
+    parser.add_argument('--history', default=os.path.join(RESULTS_DIR, 'history.json'))
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store this run as the new baseline')
+    parser.add_argument('--profile', default=None,
+                        help=f'stage names (or "all") to profile; sets {PROFILE_ENV} for the stages')
+    args = parser.parse_args()
+
+    print(f"  {'customers':>11} {'stage':<20} {'status':<8} {'time':>10} {'peak RSS':>12}")
+    run = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'results': {str(size): benchmark_size(size, args.timeout, args.reuse_data, args.profile)
+                    for size in args.sizes},
+    }
+
+    os.makedirs(os.path.dirname(args.history), exist_ok=True)
+    history = []
+    if os.path.exists(args.history):
+        with open(args.history) as f:
+            history = json.load(f)
+    history.append(run)
+    with open(args.history, 'w') as f:
+        json.dump(history, f, indent=2)
+    print(f"\nRun appended to {args.history}")
+
+    regressions = []
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(run, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(run, json.load(f), args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n⚠️  {len(regressions)} regression(s) beyond {args.threshold:.0%} of baseline:")
+            for line in regressions:
+                print(f"  {line}")
+        else:
+            print(f"No regressions beyond {args.threshold:.0%} of baseline")
+    else:
+        print("No baseline found; run with --save-baseline to create one")
+
+    sys.exit(1 if regressions else 0)
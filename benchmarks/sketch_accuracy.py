@@ -0,0 +1,74 @@
+"""Accuracy, speed and size of the mergeable sketches behind segment metrics.
+
+Streams ``--rows`` synthetic rows (repeat customer ids, log-normal order
+values) through ``--shards`` independent HyperLogLog/TDigest pairs in
+``--chunksize`` chunks, merges the shards, and compares the merged answers
+with exact pandas results: relative error of the distinct count, and the
+rank error of each quantile (how far the estimate's true rank is from the
+requested one). Exits 1 if either exceeds its documented bound.
+
+    python benchmarks/sketch_accuracy.py [--rows 10000000] [--shards 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from insightx.sketches import HyperLogLog, TDigest  # noqa: E402
+
+LEVELS = [0.001, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999]
+MAX_DISTINCT_ERROR = 3 * 1.04 / np.sqrt(1 << 14)  # three standard errors at p=14
+MAX_RANK_ERROR = 0.01
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Mergeable sketch accuracy benchmark')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--shards', type=int, default=4)
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    customer_ids = rng.integers(0, args.rows // 3, args.rows)
+    amounts = rng.lognormal(4, 1, args.rows)
+
+    shards = [(HyperLogLog(), TDigest()) for _ in range(args.shards)]
+    start = time.perf_counter()
+    for i, begin in enumerate(range(0, args.rows, args.chunksize)):
+        hll, digest = shards[i % args.shards]
+        hll.add(customer_ids[begin:begin + args.chunksize])
+        digest.add(amounts[begin:begin + args.chunksize])
+    hll, digest = shards[0]
+    for other_hll, other_digest in shards[1:]:
+        hll.merge(other_hll)
+        digest.merge(other_digest)
+    elapsed = time.perf_counter() - start
+
+    exact_distinct = len(np.unique(customer_ids))
+    distinct_error = hll.count() / exact_distinct - 1
+    ranked = np.sort(amounts)
+    estimates = digest.quantile(LEVELS)
+    rank_errors = np.searchsorted(ranked, estimates) / len(ranked) - np.array(LEVELS)
+
+    print(f"{args.rows:,} rows in {args.shards} shards of {args.chunksize:,}-row chunks: "
+          f"{elapsed:.2f}s ({args.rows / elapsed / 1e6:.1f}M rows/s)")
+    print(f"Sketch size: HyperLogLog {hll.registers.nbytes:,} bytes, "
+          f"TDigest {len(digest.means)} centroids ({digest.means.nbytes + digest.weights.nbytes:,} bytes)")
+    print(f"Distinct: {hll.count():,} estimated vs {exact_distinct:,} exact ({distinct_error:+.3%})")
+    for level, estimate, exact, error in zip(LEVELS, estimates, np.quantile(amounts, LEVELS), rank_errors):
+        print(f"  p{level * 100:g}: {estimate:10.2f} estimated vs {exact:10.2f} exact (rank error {error:+.4%})")
+
+    if abs(distinct_error) > MAX_DISTINCT_ERROR or np.abs(rank_errors).max() > MAX_RANK_ERROR:
+        print("❌ Sketch error above the documented bound")
+        sys.exit(1)
+    print("✅ Sketch errors within the documented bounds")
+
+
+if __name__ == '__main__':
+    main()
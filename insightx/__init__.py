@@ -0,0 +1 @@
+"""Shared helpers for the InsightX marketing analytics pipeline scripts."""
@@ -0,0 +1,3 @@
+from insightx.cli import main
+
+main()
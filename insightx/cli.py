@@ -0,0 +1,185 @@
+"""Command-line entry point for the pipeline: ``python -m insightx <command>``.
+
+    python -m insightx stages               list the pipeline stages
+    python -m insightx run rfm              run one stage (extra arguments go to it)
+    python -m insightx run all              run every stage in order
+    python -m insightx score --recency 12 --frequency 9 --monetary-total 1450 \\
+                             --monetary-avg 161 --age 34
+    python -m insightx query "SELECT segment_name, COUNT(*) FROM ..."
+    python -m insightx preview --fraction 0.01   what-if run on a stratified sample
+    python -m insightx serve --port 8765         real-time segment/offer lookup service
+
+Only the standard library is imported up front. A stage's module, and with
+it pandas, scikit-learn or matplotlib, is imported when that stage runs, so
+``score`` and ``query`` start as fast as Python itself
+(see benchmarks/cli_startup.py).
+"""
+import argparse
+import importlib
+import os
+import sqlite3
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATABASE_PATH = 'data/marketing_analysis.db'
+
+# Stage name -> (step script module, description), in pipeline order
+STAGES = {
+    'generate': ('01_data_generation', 'generate synthetic customers and transactions'),
+    'ingest': ('14_ingest_validation', 'validate raw files and quarantine bad rows with reasons'),
+    'rfm': ('02_rfm_analysis', 'compute recency/frequency/monetary metrics'),
+    'rfm_windows': ('15_rfm_windows', 'trailing-window RFM features and 1-5 R/F/M scores'),
+    'sql': ('03_create_sql_database', 'load the SQLite analysis database'),
+    'clustering': ('04_kmeans_clustering', 'K-means customer segmentation'),
+    'affinity': ('11_category_affinity', 'customer x category affinity and next-category picks'),
+    'clv': ('12_clv_model', 'BG/NBD + Gamma-Gamma predicted customer lifetime value'),
+    'strategies': ('05_marketing_strategies', 'assign campaign strategies per segment'),
+    'schedule': ('13_send_scheduler', 'plan dated per-channel send batches under caps'),
+    'ab_setup': ('06_ab_testing_setup', 'split segments into A/B test groups'),
+    'ab_results': ('07_ab_test_results', 'simulate A/B campaign results and rollups'),
+    'visualize': ('08_create_visualizations', 'render the marketing dashboard'),
+    'powerbi': ('09_powerbi_preparation', 'prepare Power BI dashboard files'),
+    'cohorts': ('10_cohort_analysis', 'registration cohort retention and revenue matrices'),
+}
+
+
+def load_stage(name):
+    """Import a stage's step script (and its dependencies) on demand."""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    return importlib.import_module(STAGES[name][0])
+
+
+def run_stage(name, argv=()):
+    return load_stage(name).main(list(argv))
+
+
+def cmd_stages(args):
+    for name, (module, description) in STAGES.items():
+        print(f"  {name:<12} {module + '.py':<30} {description}")
+
+
+def cmd_run(args):
+    if args.stage == 'all':
+        if args.stage_args:
+            sys.exit("insightx run all: stage arguments are only accepted for a single stage")
+        for name in STAGES:
+            run_stage(name)
+    else:
+        run_stage(args.stage, args.stage_args)
+
+
+def cmd_score(args):
+    from insightx.scoring import load_cluster_model, score
+
+    try:
+        model = load_cluster_model(args.model)
+    except FileNotFoundError:
+        sys.exit(f"No cluster model at {args.model}. Run Step 4 (insightx run clustering) first!")
+    values = {
+        'recency': args.recency,
+        'frequency': args.frequency,
+        'monetary_total': args.monetary_total,
+        'monetary_avg': args.monetary_avg,
+        'age': args.age,
+    }
+    extra = [feature for feature in model['features'] if feature not in values]
+    if extra:
+        sys.exit(f"The cluster model also uses {', '.join(extra)} (Step 4 --windowed-features); "
+                 f"score those customers through `insightx serve` (POST /score) instead")
+    cluster = score(model, values)
+    print(f"Cluster {cluster} - {model['segments'][str(cluster)]}")
+
+
+def cmd_query(args):
+    if not os.path.exists(args.db):
+        sys.exit(f"No database at {args.db}. Run Step 3 (insightx run sql) first!")
+    conn = sqlite3.connect(f'file:{args.db}?mode=ro', uri=True)
+    try:
+        cursor = conn.execute(args.sql)
+        rows = cursor.fetchmany(args.limit) if args.limit else cursor.fetchall()
+        if cursor.description:
+            print('\t'.join(column[0] for column in cursor.description))
+        for row in rows:
+            print('\t'.join('' if value is None else str(value) for value in row))
+    except sqlite3.Error as error:
+        sys.exit(f"Query failed: {error}")
+    finally:
+        conn.close()
+
+
+def cmd_preview(args):
+    from insightx.preview import run_preview, clear_workdir
+
+    try:
+        clear_workdir(args.workdir)
+    except ValueError as error:
+        sys.exit(str(error))
+    run_preview(args.fraction, args.seed, args.workdir, args.stages)
+
+
+def cmd_serve(args):
+    from insightx.service import serve
+
+    try:
+        serve(args.host, args.port, args.cache_size, quiet=not args.access_log)
+    except FileNotFoundError as error:
+        sys.exit(str(error))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='insightx', description='InsightX marketing analytics pipeline')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stages = commands.add_parser('stages', help='list the pipeline stages')
+    stages.set_defaults(func=cmd_stages)
+
+    run = commands.add_parser('run', help='run a pipeline stage, or all of them')
+    run.add_argument('stage', choices=list(STAGES) + ['all'])
+    run.add_argument('stage_args', nargs=argparse.REMAINDER,
+                     help='arguments passed through to the stage (e.g. --headless)')
+    run.set_defaults(func=cmd_run)
+
+    score = commands.add_parser('score', help='assign one customer to a segment')
+    score.add_argument('--recency', type=float, required=True, help='days since last purchase')
+    score.add_argument('--frequency', type=float, required=True, help='number of transactions')
+    score.add_argument('--monetary-total', type=float, required=True, help='total spent ($)')
+    score.add_argument('--monetary-avg', type=float, required=True, help='average order value ($)')
+    score.add_argument('--age', type=float, required=True)
+    score.add_argument('--model', default='data/processed/cluster_model.json')
+    score.set_defaults(func=cmd_score)
+
+    query = commands.add_parser('query', help='run a read-only SQL query on the analysis database')
+    query.add_argument('sql')
+    query.add_argument('--db', default=DATABASE_PATH)
+    query.add_argument('--limit', type=int, default=None, help='print at most this many rows')
+    query.set_defaults(func=cmd_query)
+
+    preview = commands.add_parser(
+        'preview', help='run the pipeline on a stratified customer sample and extrapolate metrics')
+    preview.add_argument('--fraction', type=float, default=0.01, help='share of each stratum to sample')
+    preview.add_argument('--seed', type=int, default=42)
+    preview.add_argument('--workdir', default='data/preview',
+                         help='directory the sampled pipeline runs in (new, or replaced if an earlier '
+                              'preview created it)')
+    preview.add_argument('--stages', nargs='+', choices=list(STAGES)[1:],
+                         default=[name for name in STAGES if name != 'generate'],
+                         help='stages to run on the sample')
+    preview.set_defaults(func=cmd_preview)
+
+    serve = commands.add_parser('serve', help='serve segment and campaign lookups over HTTP')
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--cache-size', type=int, default=100_000, help='LRU cache entries')
+    serve.add_argument('--access-log', action='store_true', help='log every request to stderr')
+    serve.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,246 @@
+"""Probabilistic customer lifetime value: BG/NBD purchases x Gamma-Gamma spend.
+
+Each customer is summarised by four numbers (``summarize``): repeat
+purchases ``x``, the time of their last purchase ``t_x`` and their tenure
+``T`` (both measured from their first purchase, in weeks) and their average
+order value. Two models are fitted by maximum likelihood on those summaries:
+
+* ``BetaGeometricNBD`` (Fader, Hardie & Lee 2005): while alive a customer
+  buys at a Poisson rate drawn from Gamma(r, alpha) and after each purchase
+  drops out with a probability drawn from Beta(a, b). It gives the expected
+  number of purchases over a horizon and the probability a customer is
+  still active.
+* ``GammaGamma`` (Fader & Hardie 2013): order values vary around a
+  customer-level mean drawn from a gamma prior, so a customer's expected
+  order value shrinks their observed average towards the population's,
+  the more so the fewer orders it rests on.
+
+Log-likelihoods and their gradients are written over whole arrays of
+customers, so each optimizer step is a handful of numpy passes. BG/NBD only
+depends on (x, t_x, T), which take few distinct values in whole weeks, so
+customers are first collapsed into weighted unique triplets, and the
+Gamma-Gamma gamma functions are evaluated once per distinct order count;
+fitting and predicting on 10M customers takes seconds.
+
+    summary = summarize(transactions, analysis_day)
+    clv = lifetime_value(summary, horizon=52)
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, special
+
+from insightx.schema import to_cents
+
+DAYS_PER_PERIOD = 7
+HORIZON = 52
+# Parameters are searched in log space within these limits, which keeps
+# degenerate summaries from driving a scale parameter to zero or infinity
+LOG_PARAM_BOUNDS = (-15.0, 15.0)
+
+
+def summarize(transactions, analysis_day):
+    """Per-customer model inputs from transactions, in customer_id order.
+
+    ``repeat_purchases`` counts purchases after the first; ``last_purchase``
+    and ``tenure`` are days from the first purchase to the last purchase and
+    to ``analysis_day``; ``monetary_avg`` is the mean order value in cents.
+    """
+    summary = transactions.groupby('customer_id').agg(
+        first=('transaction_date', 'min'),
+        last=('transaction_date', 'max'),
+        purchases=('amount', 'size'),
+        spend=('amount', 'sum'),
+    )
+    return pd.DataFrame({
+        'customer_id': summary.index.to_numpy(dtype=np.int32),
+        'repeat_purchases': (summary['purchases'] - 1).to_numpy(dtype=np.int32),
+        'last_purchase': (summary['last'] - summary['first']).to_numpy(dtype=np.int32),
+        'tenure': (analysis_day - summary['first']).to_numpy(dtype=np.int32),
+        'monetary_avg': (summary['spend'] / summary['purchases']).to_numpy(),
+    })
+
+
+def _fit(negative_log_likelihood, start):
+    """Minimise over log-parameters so every parameter stays positive."""
+    start = np.log(start)
+    result = optimize.minimize(negative_log_likelihood, start, jac=True, method='L-BFGS-B',
+                               bounds=[LOG_PARAM_BOUNDS] * len(start))
+    if not np.isfinite(result.fun):
+        raise RuntimeError(f"CLV model fit failed: {result.message}")
+    return np.exp(result.x), -result.fun
+
+
+class BetaGeometricNBD:
+    """BG/NBD repeat-purchase model; time is in periods of ``DAYS_PER_PERIOD`` days."""
+
+    def __init__(self, params=None):
+        self.params = params  # (r, alpha, a, b)
+        self.log_likelihood = None
+
+    @staticmethod
+    def _collapse(x, t_x, T):
+        """Unique (x, t_x, T) triplets in whole periods, their counts and the inverse index."""
+        x = np.asarray(x, dtype=np.int64)
+        t_x = np.asarray(t_x, dtype=np.int64) // DAYS_PER_PERIOD
+        T = np.asarray(T, dtype=np.int64) // DAYS_PER_PERIOD
+        span = int(T.max()) + 1 if len(T) else 1
+        keys, inverse, counts = np.unique((x * span + t_x) * span + T, return_inverse=True, return_counts=True)
+        x, rest = np.divmod(keys, span * span)
+        t_x, T = np.divmod(rest, span)
+        return (x.astype(float), t_x.astype(float), T.astype(float)), counts, inverse
+
+    @staticmethod
+    def _terms(params, x, t_x, T):
+        r, alpha, a, b = params
+        repeat = x > 0
+        a1 = special.gammaln(r + x) - special.gammaln(r) + r * np.log(alpha)
+        a2 = special.betaln(a, b + x) - special.betaln(a, b)
+        a3 = -(r + x) * np.log(alpha + T)
+        a4 = np.where(repeat, np.log(a) - np.log(b + np.maximum(x, 1) - 1) - (r + x) * np.log(alpha + t_x),
+                      -np.inf)
+        return a1, a2, a3, a4, repeat
+
+    def _negative_log_likelihood(self, log_params, x, t_x, T, weights):
+        params = np.exp(log_params)
+        r, alpha, a, b = params
+        a1, a2, a3, a4, repeat = self._terms(params, x, t_x, T)
+        total = np.logaddexp(a3, a4)
+        ll = a1 + a2 + total
+
+        # Share of the likelihood from "still alive at T" vs "dropped after t_x"
+        alive = np.exp(a3 - total)
+        dropped = 1 - alive
+        x1 = np.maximum(x, 1)
+        grad = np.array([
+            special.digamma(r + x) - special.digamma(r) + np.log(alpha)
+            - alive * np.log(alpha + T) - dropped * np.log(alpha + t_x),
+            r / alpha - alive * (r + x) / (alpha + T) - dropped * (r + x) / (alpha + t_x),
+            special.digamma(a + b) - special.digamma(a + b + x) + np.where(repeat, dropped / a, 0),
+            special.digamma(a + b) + special.digamma(b + x) - special.digamma(b) - special.digamma(a + b + x)
+            - np.where(repeat, dropped / (b + x1 - 1), 0),
+        ])
+        n = weights.sum()
+        return -(weights @ ll) / n, -(grad @ weights) * params / n
+
+    def fit(self, x, t_x, T):
+        """Fit on repeat purchases and last-purchase/tenure days per customer."""
+        (x, t_x, T), weights, _ = self._collapse(x, t_x, T)
+        self.params, mean_ll = _fit(
+            lambda p: self._negative_log_likelihood(p, x, t_x, T, weights), np.ones(4))
+        self.log_likelihood = mean_ll * weights.sum()
+        return self
+
+    def _predict(self, x, t_x, T, horizon):
+        r, alpha, a, b = self.params
+        _, _, a3, a4, _ = self._terms(self.params, x, t_x, T)
+        p_alive = np.exp(a3 - np.logaddexp(a3, a4))
+        # Fader, Hardie & Lee (2005) eq. 10, written as P(alive) x E[purchases | alive]
+        z = horizon / (alpha + T + horizon)
+        hyp = special.hyp2f1(r + x, b + x, a + b + x - 1, z)
+        unconditional = (a + b + x - 1) / (a - 1) * (
+            1 - np.exp((r + x) * np.log((alpha + T) / (alpha + T + horizon))) * hyp)
+        return unconditional * p_alive, p_alive
+
+    def predict(self, x, t_x, T, horizon=HORIZON):
+        """(expected purchases over ``horizon`` periods, P(alive)) per customer."""
+        (x, t_x, T), _, inverse = self._collapse(x, t_x, T)
+        expected, p_alive = self._predict(x, t_x, T, horizon)
+        return expected[inverse], p_alive[inverse]
+
+
+class GammaGamma:
+    """Gamma-Gamma order value model on (purchases, average order value)."""
+
+    def __init__(self, params=None):
+        self.params = params  # (p, q, gamma)
+        self.log_likelihood = None
+
+    @staticmethod
+    def _negative_log_likelihood(log_params, orders, counts, total, n_total, log_m):
+        """Mean negative log-likelihood and gradient.
+
+        The gamma functions depend on a customer's order count only, so they
+        are evaluated once per distinct count (``orders`` with ``counts``);
+        the one per-customer term is log(x * m + gamma) over ``total`` = x * m.
+        """
+        params = np.exp(log_params)
+        p, q, gamma = params
+        shape = p * orders
+        log_total = np.log(total + gamma)
+        inverse_total = 1 / (total + gamma)
+        sum_log_total = log_total.sum()
+        sum_x_log_total = n_total @ log_total
+        sum_log_m, sum_x_log_m = log_m
+
+        ll = (counts @ (special.gammaln(shape + q) - special.gammaln(shape) + shape * np.log(orders))
+              - len(total) * (special.gammaln(q) - q * np.log(gamma))
+              + p * sum_x_log_m - sum_log_m - p * sum_x_log_total - q * sum_log_total)
+        digamma_total = special.digamma(shape + q)
+        grad = np.array([
+            (counts * orders) @ (digamma_total - special.digamma(shape) + np.log(orders))
+            + sum_x_log_m - sum_x_log_total,
+            counts @ digamma_total - len(total) * (special.digamma(q) - np.log(gamma)) - sum_log_total,
+            len(total) * q / gamma - (p * n_total + q) @ inverse_total,
+        ])
+        return -ll / len(total), -grad * params / len(total)
+
+    def fit(self, x, m):
+        """Fit on purchases per customer and their average order value."""
+        x, m = np.asarray(x, dtype=float), np.asarray(m, dtype=float)
+        orders, counts = np.unique(x, return_counts=True)
+        log_m = np.log(m)
+        args = (orders, counts, x * m, x, (log_m.sum(), x @ log_m))
+        self.params, mean_ll = _fit(lambda p: self._negative_log_likelihood(p, *args),
+                                    np.array([1.0, 2.0, m.mean()]))
+        self.log_likelihood = mean_ll * len(x)
+        return self
+
+    def expected_spend(self, x, m):
+        """Posterior mean order value; needs q > 1 for the prior mean to exist."""
+        p, q, gamma = self.params
+        x = np.asarray(x, dtype=float)
+        return (gamma + np.asarray(m, dtype=float) * x) * p / (p * x + q - 1)
+
+
+def lifetime_value(summary, horizon=HORIZON):
+    """Fit both models on ``summarize`` output and score every customer.
+
+    As in Fader & Hardie (2013), Gamma-Gamma is fitted on repeat customers
+    only: a single order says nothing about how a customer's order values
+    vary. One difference: ``monetary_avg`` averages all of a customer's
+    orders, the first included, so the model sees x + 1 orders per customer
+    rather than the x repeat orders. One-time buyers are still scored, and
+    their expected order value leans towards the population mean.
+
+    Returns (per-customer frame in customer_id order, fitted purchase model,
+    fitted spend model). Money columns are cents.
+    """
+    x = summary['repeat_purchases'].to_numpy()
+    purchases = BetaGeometricNBD().fit(x, summary['last_purchase'].to_numpy(), summary['tenure'].to_numpy())
+    expected, p_alive = purchases.predict(x, summary['last_purchase'].to_numpy(),
+                                          summary['tenure'].to_numpy(), horizon)
+
+    # Order values in dollars keep the optimizer's starting point well scaled
+    orders = x + 1
+    average = summary['monetary_avg'].to_numpy() / 100
+    # With no repeat customers at all, everyone is the only sample there is
+    fitted = x > 0 if (x > 0).any() else np.ones(len(x), dtype=bool)
+    spend = GammaGamma().fit(orders[fitted], average[fitted])
+    q = spend.params[1]
+    if q > 1:
+        order_value = spend.expected_spend(orders, average)
+    else:
+        warnings.warn(f"Gamma-Gamma fit has q={q:.3f} <= 1, so the prior has no mean order value; "
+                      f"using each customer's observed average order value instead", RuntimeWarning)
+        order_value = average
+
+    table = pd.DataFrame({
+        'customer_id': summary['customer_id'].to_numpy(),
+        'expected_purchases': expected.round(3),
+        'p_alive': p_alive.round(4),
+        'expected_order_value': to_cents(order_value),
+        'predicted_clv': to_cents(expected * order_value),
+    })
+    return table, purchases, spend
@@ -0,0 +1,122 @@
+"""Registration-cohort retention and revenue matrices.
+
+Customers are grouped by the month they registered (their cohort) and each
+transaction falls in the cell (cohort, months since registration). Months
+are integer indices (months since 1970-01), a transaction's cohort is read
+positionally from a dense customer_id -> cohort array, and every cell total
+is one ``np.bincount`` over flattened cell indices, so a batch of
+transactions is aggregated in a single vectorized pass:
+
+    matrix = CohortMatrix(customers)
+    for chunk in whole_customer_chunks(load_table('transactions', chunksize=...)):
+        matrix.add(chunk)
+    matrix.table()
+
+``add`` accepts any number of chunks. Active customers are counted once per
+cell, which needs each customer's transactions in a single chunk
+(insightx.joins.whole_customer_chunks).
+"""
+import numpy as np
+import pandas as pd
+
+from insightx.schema import dollars
+
+
+def month_index(days):
+    """Months since 1970-01 for int32 day numbers."""
+    return np.asarray(days).astype('datetime64[D]').astype('datetime64[M]').astype(np.int32)
+
+
+def month_label(months):
+    """``YYYY-MM`` labels for month indices."""
+    return np.asarray(months).astype('datetime64[M]').astype(str)
+
+
+class CohortMatrix:
+    """Running (cohort x months since registration) totals."""
+
+    def __init__(self, customers):
+        ids = customers['customer_id'].to_numpy()
+        months = month_index(customers['registration_date'])
+        self.first_month = int(months.min())
+        cohorts = months - self.first_month
+        self.n_cohorts = int(cohorts.max()) + 1
+        self.cohort_of = np.full(int(ids.max()) + 1, -1, dtype=np.int32)
+        self.cohort_of[ids] = cohorts
+        self.cohort_size = np.bincount(cohorts, minlength=self.n_cohorts)
+        self.n_ages = 0
+        self.active = np.zeros((self.n_cohorts, 0), dtype=np.int64)
+        self.transactions = np.zeros((self.n_cohorts, 0), dtype=np.int64)
+        self.revenue = np.zeros((self.n_cohorts, 0), dtype=np.int64)
+        self.last_month = None
+        self.skipped = 0
+
+    def _grow(self, n_ages):
+        pad = ((0, 0), (0, n_ages - self.n_ages))
+        self.active = np.pad(self.active, pad)
+        self.transactions = np.pad(self.transactions, pad)
+        self.revenue = np.pad(self.revenue, pad)
+        self.n_ages = n_ages
+
+    def add(self, transactions):
+        """Accumulate a chunk of transactions (amounts in cents)."""
+        ids = transactions['customer_id'].to_numpy()
+        months = month_index(transactions['transaction_date'])
+        cohorts = np.full(len(ids), -1, dtype=np.int32)
+        known = (ids >= 0) & (ids < len(self.cohort_of))
+        cohorts[known] = self.cohort_of[ids[known]]
+        ages = months - self.first_month - cohorts
+
+        # Unknown customers and purchases before registration have no cell
+        valid = (cohorts >= 0) & (ages >= 0)
+        self.skipped += int((~valid).sum())
+        if not valid.any():
+            return
+        ids, cohorts, ages, months = ids[valid], cohorts[valid], ages[valid], months[valid]
+        amounts = transactions['amount'].to_numpy()[valid]
+
+        self.last_month = max(int(months.max()), self.last_month or 0)
+        if ages.max() >= self.n_ages:
+            self._grow(int(ages.max()) + 1)
+        shape = (self.n_cohorts, self.n_ages)
+        cells = cohorts.astype(np.int64) * self.n_ages + ages
+        size = self.n_cohorts * self.n_ages
+        self.transactions += np.bincount(cells, minlength=size).reshape(shape)
+        revenue = np.bincount(cells, weights=amounts, minlength=size)
+        self.revenue += np.rint(revenue).astype(np.int64).reshape(shape)
+
+        # A customer is active in a cell once, however many purchases they made
+        _, first = np.unique(ids.astype(np.int64) * self.n_ages + ages, return_index=True)
+        self.active += np.bincount(cells[first], minlength=size).reshape(shape)
+
+    def table(self):
+        """One row per observed (cohort, months since registration) cell."""
+        if self.last_month is not None and self.last_month - self.first_month >= self.n_ages:
+            # The oldest cohort's quiet months up to the last transaction month are still observed
+            self._grow(self.last_month - self.first_month + 1)
+        cohort, age = np.meshgrid(np.arange(self.n_cohorts), np.arange(self.n_ages), indexing='ij')
+        size = self.cohort_size[:, None].repeat(self.n_ages, axis=1)
+        # Cells after the last transaction month have not happened yet
+        observed = (size > 0) & (self.first_month + cohort + age <= (self.last_month or -1))
+        cumulative_revenue = self.revenue.cumsum(axis=1)
+
+        table = pd.DataFrame({
+            'cohort_month': month_label(self.first_month + cohort[observed]),
+            'months_since_registration': age[observed],
+            'cohort_size': size[observed],
+            'active_customers': self.active[observed],
+            'transactions': self.transactions[observed],
+            'revenue': dollars(self.revenue[observed]),
+        })
+        table['retention_rate'] = (table['active_customers'] / table['cohort_size']).round(4)
+        table['revenue_per_customer'] = (table['revenue'] / table['cohort_size']).round(2)
+        table['cumulative_revenue_per_customer'] = (dollars(cumulative_revenue[observed])
+                                                    / table['cohort_size']).round(2)
+        return table
+
+
+def pivot(table, values):
+    """Wide cohort x months-since-registration matrix of one measure."""
+    matrix = table.pivot(index='cohort_month', columns='months_since_registration', values=values)
+    matrix.columns = [f'month_{age}' for age in matrix.columns]
+    return matrix.reset_index()
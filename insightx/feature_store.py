@@ -0,0 +1,224 @@
+"""Memory-mapped customer feature store indexed directly by customer_id.
+
+Each feature is one dense ``.npy`` column under ``data/features/`` whose
+row number *is* the customer_id, so a lookup or a batch gather is a plain
+array index with no join or hash table:
+
+    store = FeatureStore()
+    store.put(rfm_customers)                        # add/update customers
+    store.gather([17, 4021, 9], ['segment_name', 'test_group'])
+    store.column('monetary_total')[customer_ids]    # read-only memmap
+    read_features('customer_segments', ['cluster', 'age'])   # stages' reader
+
+Columns are opened with ``mmap_mode='r'``, so every process reading the
+store shares the same OS page cache instead of holding its own copy.
+Categorical features are stored as integer codes with their categories in
+``manifest.json``; money and dates keep the pipeline's cents/day-number
+integers. ``put`` grows every column when new, higher customer_ids arrive
+and marks which ids exist in the ``present`` column; a write that does not
+fit a column's dtype (more categories than int16 codes hold, NaN or
+fractions into an int column) widens the column first.
+
+Stages read their per-customer inputs with ``read_features``, which only
+falls back to the CSV table when the store lacks a column.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+from numpy.lib.format import open_memmap
+
+from insightx.schema import apply_schema, load_table
+
+FEATURE_STORE_DIR = 'data/features'
+PRESENT = 'present'
+GROWTH = 1.5
+
+
+class FeatureStore:
+    def __init__(self, root=FEATURE_STORE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {'capacity': 0, 'columns': {}}
+        self._mapped = {}
+
+    @property
+    def capacity(self):
+        return self.manifest['capacity']
+
+    @property
+    def columns(self):
+        return [name for name in self.manifest['columns'] if name != PRESENT]
+
+    def has(self, columns):
+        return all(name in self.manifest['columns'] for name in columns)
+
+    def reset(self):
+        """Delete every column (the next ``put`` starts an empty store)."""
+        self._mapped.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.manifest = {'capacity': 0, 'columns': {}}
+
+    def _path(self, name):
+        return os.path.join(self.root, f'{name}.npy')
+
+    def _save_manifest(self):
+        tmp = self.manifest_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def column(self, name, writable=False):
+        """The raw column as a memory-mapped array (codes for categoricals).
+
+        Read-only maps are opened once and reused until the next write.
+        """
+        if writable:
+            self._mapped.clear()
+            return np.load(self._path(name), mmap_mode='r+')
+        if name not in self._mapped:
+            self._mapped[name] = np.load(self._path(name), mmap_mode='r')
+        return self._mapped[name]
+
+    def _create(self, name, dtype, fill, categories=None):
+        array = open_memmap(self._path(name), mode='w+', dtype=dtype, shape=(self.capacity,))
+        array[:] = fill
+        array.flush()
+        self.manifest['columns'][name] = {'dtype': np.dtype(dtype).str, 'fill': fill,
+                                          'categories': categories}
+
+    def _grow(self, needed):
+        self._mapped.clear()
+        capacity = max(needed, int(self.capacity * GROWTH))
+        for name, spec in self.manifest['columns'].items():
+            old = self.column(name)
+            tmp = self._path(name) + '.tmp'
+            new = open_memmap(tmp, mode='w+', dtype=old.dtype, shape=(capacity,))
+            new[:len(old)] = old
+            new[len(old):] = spec['fill']
+            new.flush()
+            del old, new
+            os.replace(tmp, self._path(name))
+        self.manifest['capacity'] = capacity
+
+    def _widen(self, name, dtype):
+        """Rewrite column ``name`` with the wider ``dtype``, keeping its values."""
+        self._mapped.clear()
+        spec = self.manifest['columns'][name]
+        old = self.column(name)
+        tmp = self._path(name) + '.tmp'
+        new = open_memmap(tmp, mode='w+', dtype=dtype, shape=old.shape)
+        new[:] = old
+        new.flush()
+        del old, new
+        os.replace(tmp, self._path(name))
+        spec['dtype'] = np.dtype(dtype).str
+        spec['fill'] = np.dtype(dtype).type(spec['fill']).item()
+
+    def _fits(self, array, dtype):
+        """True if every value of ``array`` is stored exactly as ``dtype``."""
+        if np.can_cast(array.dtype, dtype, 'safe') or not len(array):
+            return True
+        if dtype.kind in 'iu' and array.dtype.kind in 'iuf':
+            if array.dtype.kind == 'f' and not (np.isfinite(array).all() and (array % 1 == 0).all()):
+                return False
+            limits = np.iinfo(dtype)
+            return limits.min <= array.min() and array.max() <= limits.max
+        return False
+
+    def _encode(self, name, values):
+        """Array to store for ``values``, creating or widening the column if needed."""
+        spec = self.manifest['columns'].get(name)
+        if isinstance(values.dtype, pd.CategoricalDtype) or values.dtype == object \
+                or pd.api.types.is_string_dtype(values.dtype):
+            categories = list(spec['categories']) if spec else []
+            new = [c for c in pd.unique(values.dropna().astype(str)) if c not in set(categories)]
+            categories.extend(new)
+            codes = pd.Categorical(values.astype(str).where(values.notna()),
+                                   categories=categories).codes
+            code_dtype = np.int16 if len(categories) <= np.iinfo(np.int16).max else np.int32
+            if spec is None:
+                self._create(name, code_dtype, -1, categories)
+            else:
+                spec['categories'] = categories
+                if np.dtype(spec['dtype']).itemsize < np.dtype(code_dtype).itemsize:
+                    self._widen(name, code_dtype)
+            return codes
+        array = values.to_numpy()
+        if spec is None:
+            fill = float('nan') if array.dtype.kind == 'f' else (False if array.dtype.kind == 'b' else 0)
+            self._create(name, array.dtype, fill)
+        elif not self._fits(array, np.dtype(spec['dtype'])):
+            # e.g. NaN or fractions written to an int column, or ids past int16
+            self._widen(name, np.promote_types(spec['dtype'], array.dtype))
+        return array
+
+    def put(self, df, columns=None):
+        """Write ``columns`` (default: all) of ``df`` at its customer_ids."""
+        os.makedirs(self.root, exist_ok=True)
+        columns = [c for c in (columns or df.columns) if c != 'customer_id']
+        ids = df['customer_id'].to_numpy(dtype=np.int64)
+        if PRESENT not in self.manifest['columns']:
+            self._create(PRESENT, np.bool_, False)
+        if len(ids) and ids.max() + 1 > self.capacity:
+            self._grow(int(ids.max()) + 1)
+        for name in columns:
+            encoded = self._encode(name, df[name])
+            target = self.column(name, writable=True)
+            target[ids] = encoded
+            target.flush()
+        present = self.column(PRESENT, writable=True)
+        present[ids] = True
+        present.flush()
+        self._save_manifest()
+
+    def ids(self):
+        """Every stored customer_id, ascending."""
+        if PRESENT not in self.manifest['columns']:
+            return np.array([], dtype=np.int64)
+        return np.flatnonzero(self.column(PRESENT))
+
+    def gather(self, ids, columns=None):
+        """Frame of ``columns`` for ``ids`` (in the given order).
+
+        Raises KeyError if any id is not in the store.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) and (ids.min() < 0 or ids.max() >= self.capacity
+                         or not self.column(PRESENT)[ids].all()):
+            raise KeyError('customer_id not in the feature store')
+        data = {'customer_id': ids}
+        for name in columns or self.columns:
+            spec = self.manifest['columns'][name]
+            values = self.column(name)[ids]
+            if spec['categories'] is not None:
+                values = pd.Categorical.from_codes(values, categories=spec['categories'])
+            data[name] = values
+        return pd.DataFrame(data)
+
+    def frame(self, columns=None):
+        """All stored customers in customer_id order."""
+        return self.gather(self.ids(), columns)
+
+
+def read_features(table, columns, store=None):
+    """``customer_id`` and ``columns`` of every stored customer, typed as ``load_table(table)`` types them.
+
+    Gathered from the feature store; ``table``'s CSV is read instead when
+    the store lacks any of the columns (e.g. it was deleted).
+    """
+    store = store or FeatureStore()
+    if not store.has(columns):
+        return load_table(table, usecols=['customer_id'] + list(columns))
+    frame = store.frame(columns)
+    for column in columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            # Lexical category order, as the CSV reader gives
+            frame[column] = frame[column].cat.reorder_categories(sorted(frame[column].cat.categories))
+    return apply_schema(frame)
@@ -0,0 +1,80 @@
+"""Array-based synthetic data generator for benchmark-scale datasets.
+
+Draws customers and transactions from the same distributions as Step 1's
+per-row loop, but as NumPy arrays in fixed-size customer chunks that are
+appended to the CSVs, so 10M customers can be generated in bounded memory.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from insightx.schema import check_key_order
+
+BEHAVIOR_TYPES = ['High_Value', 'Regular', 'Occasional', 'Bargain_Hunter']
+BEHAVIOR_WEIGHTS = [0.15, 0.35, 0.35, 0.15]
+# Inclusive transaction-count range and average amount per behavior type
+BEHAVIOR_TRANSACTIONS = np.array([[8, 25], [3, 12], [1, 6], [2, 8]])
+BEHAVIOR_AMOUNT_BASE = np.array([150, 80, 60, 35])
+CATEGORIES = ['Electronics', 'Clothing', 'Home & Garden', 'Sports & Outdoors', 'Books & Media']
+CATEGORY_WEIGHTS = [0.30, 0.25, 0.20, 0.15, 0.10]
+
+REGISTRATION_START = np.datetime64('2023-01-01')
+TRANSACTION_START = np.datetime64('2024-01-01')
+
+
+def generate_chunk(rng, first_customer_id, n_customers, first_transaction_id):
+    """Generate one chunk of customers and their transactions."""
+    customer_ids = np.arange(first_customer_id, first_customer_id + n_customers)
+    behavior = rng.choice(len(BEHAVIOR_TYPES), n_customers, p=BEHAVIOR_WEIGHTS)
+    customers = pd.DataFrame({
+        'customer_id': customer_ids,
+        'age': np.clip(rng.normal(40, 15, n_customers).astype(int), 18, 80),
+        'gender': np.array(['M', 'F'])[rng.integers(0, 2, n_customers)],
+        'registration_date': (REGISTRATION_START + rng.integers(0, 366, n_customers)).astype(str),
+        'behavior_type': np.array(BEHAVIOR_TYPES)[behavior],
+    })
+
+    low, high = BEHAVIOR_TRANSACTIONS[behavior].T
+    counts = rng.integers(low, high + 1)
+    owner = np.repeat(np.arange(n_customers), counts)
+    n_transactions = len(owner)
+    amount_base = BEHAVIOR_AMOUNT_BASE[behavior[owner]]
+    amounts = np.maximum(5, rng.normal(amount_base, amount_base * 0.3)).round(2)
+    transactions = pd.DataFrame({
+        'transaction_id': np.arange(first_transaction_id, first_transaction_id + n_transactions),
+        'customer_id': customer_ids[owner],
+        'transaction_date': (TRANSACTION_START + rng.integers(0, 365, n_transactions)).astype(str),
+        'amount': amounts,
+        'category': np.array(CATEGORIES)[rng.choice(len(CATEGORIES), n_transactions, p=CATEGORY_WEIGHTS)],
+    })
+    return customers, transactions
+
+
+def generate_raw_data(n_customers, output_dir='data/raw', seed=42, chunk_size=500_000):
+    """Write customers.csv and transactions.csv for ``n_customers`` customers.
+
+    Returns summary totals (customers, transactions, revenue).
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+    customers_path = os.path.join(output_dir, 'customers.csv')
+    transactions_path = os.path.join(output_dir, 'transactions.csv')
+
+    next_customer, next_transaction = 1, 1
+    total_transactions, total_revenue = 0, 0.0
+    while next_customer <= n_customers:
+        size = min(chunk_size, n_customers - next_customer + 1)
+        customers, transactions = generate_chunk(rng, next_customer, size, next_transaction)
+        first = next_customer == 1
+        # Chunks cover ascending id ranges, so ordered chunks keep the files sorted
+        check_key_order(customers, 'customers')
+        check_key_order(transactions, 'transactions')
+        customers.to_csv(customers_path, index=False, mode='w' if first else 'a', header=first)
+        transactions.to_csv(transactions_path, index=False, mode='w' if first else 'a', header=first)
+        next_customer += size
+        next_transaction += len(transactions)
+        total_transactions += len(transactions)
+        total_revenue += float(transactions['amount'].sum())
+
+    return {'customers': n_customers, 'transactions': total_transactions, 'revenue': total_revenue}
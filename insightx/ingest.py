@@ -0,0 +1,386 @@
+"""Typed, validated ingest of the raw customer and transaction CSVs.
+
+Both paths below use the column types registered in insightx.schema and
+the value rules in ``RAW_RULES``:
+
+* ``read_raw`` is the fast path ``load_table`` uses for the raw tables.
+  pyarrow's multithreaded CSV reader (when installed) parses each column
+  straight to its declared type, ``YYYY-MM-DD`` dates included; pandas'
+  C parser with the same dtypes and date format is the fallback. A missing
+  or malformed value raises ValueError instead of loading as NaN.
+* ``validate_table`` streams a raw CSV in chunks read as text and checks
+  every row: required values, numbers and dates that parse, value ranges,
+  duplicate ids and ``customer_id`` references to unknown customers. Ids
+  are int32 and usually dense, so the "seen" sets are boolean arrays
+  indexed by id, or sorted arrays once the ids are too sparse for that
+  (``IdSet``). Rejected rows are written to a rejects file with their row
+  number and every reason they failed; the raw file is rewritten from the
+  remaining rows' text as read, and the original kept.
+
+    report = validate_table('customers')
+    report = validate_table('transactions', known=report['ids'])
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from insightx.schema import COLUMN_TYPES, CATEGORY, MONEY, DAY, TABLE_PATHS, day_numbers, to_cents
+
+DATE_FORMAT = '%Y-%m-%d'
+REJECTS_DIR = 'data/raw/rejects'
+CHUNKSIZE = 500_000
+MAX_REASONS = 20  # distinct reasons listed per table in the report
+MAX_ID = int(np.iinfo(np.int32).max)  # ids load as int32
+
+# Required columns of each raw table and their value rules
+RAW_RULES = {
+    'customers': {
+        'customer_id': {'min': 1, 'max': MAX_ID, 'unique': True},
+        'age': {'min': 0, 'max': 120},
+        'gender': {},
+        'registration_date': {'min': '2000-01-01', 'max': '2099-12-31'},
+        'behavior_type': {},
+    },
+    'transactions': {
+        'transaction_id': {'min': 1, 'max': MAX_ID, 'unique': True},
+        'customer_id': {'min': 1, 'max': MAX_ID, 'references': 'customers'},
+        'transaction_date': {'min': '2000-01-01', 'max': '2099-12-31'},
+        'amount': {'min': 0.01, 'max': 1_000_000},
+        'category': {},
+    },
+}
+INGEST_HINT = f"run `python -m insightx run ingest` to move bad rows to {REJECTS_DIR}/"
+
+
+def pyarrow_csv():
+    """pyarrow's CSV module, or None if pyarrow is not installed."""
+    try:
+        import pyarrow.csv
+    except ImportError:
+        return None
+    return pyarrow.csv
+
+
+def _arrow_types(columns):
+    import pyarrow as pa
+
+    types = {}
+    for column in columns:
+        kind = COLUMN_TYPES[column]
+        if kind == CATEGORY:
+            types[column] = pa.dictionary(pa.int32(), pa.string())
+        elif kind == MONEY:
+            types[column] = pa.float64()
+        elif kind == DAY:
+            types[column] = pa.date32()
+        else:
+            types[column] = pa.from_numpy_dtype(np.dtype(kind))
+    return types
+
+
+def _from_arrow(table, path):
+    """Frame in the pipeline's dtypes from a typed Arrow table or record batch."""
+    frame = {}
+    for column, values in zip(table.column_names, table.columns):
+        if values.null_count:
+            raise ValueError(f"{path}: {values.null_count} missing {column} values; {INGEST_HINT}")
+        kind = COLUMN_TYPES[column]
+        if kind == CATEGORY:
+            # Lexical category order, as pandas' parser gives
+            categorical = values.to_pandas()
+            frame[column] = categorical.cat.reorder_categories(sorted(categorical.cat.categories))
+        elif kind == MONEY:
+            frame[column] = to_cents(values.to_numpy())
+        elif kind == DAY:
+            frame[column] = values.cast('int32').to_numpy()
+        else:
+            frame[column] = values.to_numpy()
+    return pd.DataFrame(frame)
+
+
+def _block_size(path, chunksize):
+    """Arrow reads by bytes: a block size holding about ``chunksize`` rows."""
+    with open(path, 'rb') as f:
+        sample = f.read(1 << 16)
+    row_bytes = len(sample) / max(sample.count(b'\n'), 1)
+    return max(int(chunksize * row_bytes), 1 << 16)
+
+
+def _arrow_chunks(csv, path, columns, chunksize):
+    options = {
+        'read_options': csv.ReadOptions(block_size=_block_size(path, chunksize)),
+        'convert_options': csv.ConvertOptions(include_columns=columns, column_types=_arrow_types(columns)),
+    }
+    reader = None
+    while True:
+        try:
+            # Opening the reader already converts the first block
+            reader = reader or csv.open_csv(path, **options)
+            batch = reader.read_next_batch()
+        except StopIteration:
+            return
+        except ValueError as error:  # pyarrow.ArrowInvalid
+            raise ValueError(f"{path}: {error}; {INGEST_HINT}") from None
+        yield _from_arrow(batch, path)
+
+
+def _from_text(df, path):
+    missing = df.columns[df.isna().any()]
+    if len(missing):
+        raise ValueError(f"{path}: missing values in {list(missing)}; {INGEST_HINT}")
+    for column in df.columns:
+        if COLUMN_TYPES[column] == MONEY:
+            df[column] = to_cents(df[column])
+        elif COLUMN_TYPES[column] == DAY:
+            df[column] = day_numbers(pd.to_datetime(df[column], format=DATE_FORMAT))
+    return df
+
+
+def _c_chunks(path, columns, dtypes, chunksize):
+    reader = pd.read_csv(path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+    while True:
+        try:
+            chunk = next(reader)
+        except StopIteration:
+            return
+        except ValueError as error:
+            raise ValueError(f"{path}: {error}; {INGEST_HINT}") from None
+        yield _from_text(chunk, path)
+
+
+def read_raw(name, path=None, usecols=None, chunksize=None, engine=None):
+    """Typed read of a raw table; an iterator of frames with ``chunksize``.
+
+    ``engine`` is 'pyarrow' or 'c' (default: pyarrow when installed).
+    """
+    path = path or TABLE_PATHS[name]
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in header if usecols is None or c in usecols]
+    undeclared = [c for c in columns if c not in COLUMN_TYPES]
+    if undeclared:
+        raise ValueError(f"{path}: no declared type for columns {undeclared}")
+
+    csv = pyarrow_csv() if engine in (None, 'pyarrow') else None
+    if csv is not None:
+        if chunksize:
+            return _arrow_chunks(csv, path, columns, chunksize)
+        try:
+            table = csv.read_csv(path, convert_options=csv.ConvertOptions(
+                include_columns=columns, column_types=_arrow_types(columns)))
+        except ValueError as error:  # pyarrow.ArrowInvalid
+            raise ValueError(f"{path}: {error}; {INGEST_HINT}") from None
+        return _from_arrow(table, path)
+
+    dtypes = {}
+    for column in columns:
+        kind = COLUMN_TYPES[column]
+        dtypes[column] = np.float64 if kind == MONEY else str if kind == DAY else kind
+    if chunksize:
+        return _c_chunks(path, columns, dtypes, chunksize)
+    try:
+        df = pd.read_csv(path, usecols=columns, dtype=dtypes)
+    except ValueError as error:  # e.g. "Integer column has NA values"
+        raise ValueError(f"{path}: {error}; {INGEST_HINT}") from None
+    return _from_text(df, path)
+
+
+class IdSet:
+    """Set of non-negative integer ids.
+
+    A boolean array indexed by id while the ids are dense; a sorted array of
+    the ids once the largest id is over ``DENSE_FACTOR`` times their count.
+    """
+
+    DENSE_FACTOR = 8
+    DENSE_MIN = 1 << 20  # ids below this always stay dense
+
+    def __init__(self):
+        self.present = np.zeros(0, dtype=bool)
+        self.sorted = None
+
+    def __len__(self):
+        return len(self.sorted) if self.sorted is not None else int(self.present.sum())
+
+    def contains(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        found = np.zeros(len(ids), dtype=bool)
+        if self.sorted is not None:
+            if len(self.sorted):
+                positions = np.searchsorted(self.sorted, ids).clip(max=len(self.sorted) - 1)
+                found = self.sorted[positions] == ids
+            return found
+        inside = (ids >= 0) & (ids < len(self.present))
+        found[inside] = self.present[ids[inside]]
+        return found
+
+    def add(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(ids):
+            return
+        if self.sorted is None and ids.max() >= len(self.present):
+            size = max(int(ids.max()) + 1, len(self.present) * 3 // 2)
+            if size > max(self.DENSE_MIN, self.DENSE_FACTOR * (len(self) + len(ids))):
+                self.sorted = np.flatnonzero(self.present)
+            else:
+                self.present = np.concatenate([self.present, np.zeros(size - len(self.present), dtype=bool)])
+        if self.sorted is not None:
+            self.sorted = np.union1d(self.sorted, ids)
+        else:
+            self.present[ids] = True
+
+
+def _text_chunks(path, chunksize):
+    """Chunks of a CSV with every value as text ('' where empty)."""
+    csv = pyarrow_csv()
+    if csv is None:
+        yield from pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize)
+        return
+    import pyarrow as pa
+
+    header = pd.read_csv(path, nrows=0).columns
+    reader = csv.open_csv(
+        path,
+        read_options=csv.ReadOptions(block_size=_block_size(path, chunksize)),
+        convert_options=csv.ConvertOptions(column_types={column: pa.string() for column in header},
+                                           strings_can_be_null=False),
+    )
+    for batch in reader:
+        yield batch.to_pandas()
+
+
+def _parse(text, column):
+    """Tolerant parse of a text column: (numeric values, missing mask, malformed mask)."""
+    missing = (text == '').to_numpy()
+    kind = COLUMN_TYPES[column]
+    if kind == CATEGORY:
+        return None, missing, np.zeros(len(text), dtype=bool)
+    if kind == DAY:
+        parsed = pd.to_datetime(text, format=DATE_FORMAT, errors='coerce')
+        unparsed = parsed.isna().to_numpy()
+        days = parsed.to_numpy().astype('datetime64[D]').astype(np.int64)
+        return np.where(unparsed, 0, days), missing, unparsed & ~missing
+    try:
+        # Strict cast first: far faster, and clean chunks are the common case
+        parsed = text.astype(np.float64).to_numpy()
+    except (ValueError, TypeError):
+        parsed = pd.to_numeric(text, errors='coerce').to_numpy(dtype=np.float64)
+    unparsed = ~np.isfinite(parsed)
+    values = np.where(unparsed, 0, parsed)
+    malformed = unparsed & ~missing
+    if kind != MONEY:
+        malformed |= values % 1 != 0
+    return values, missing, malformed
+
+
+def validate_chunk(text, name, seen, known=None):
+    """Rejection reason per row of a text chunk ('' if valid).
+
+    ``seen`` (IdSet) holds the table's unique ids so far and gains the valid
+    rows' ids; ``known`` (IdSet) holds the ids a ``references`` rule allows.
+    """
+    rules = RAW_RULES[name]
+    absent = [c for c in rules if c not in text.columns]
+    if absent:
+        raise ValueError(f"{name}: missing columns {absent}")
+
+    checks = []
+    usable = np.ones(len(text), dtype=bool)  # every value parsed and within bounds
+    values = {}
+    for column, rule in rules.items():
+        values[column], missing, malformed = _parse(text[column], column)
+        checks += [(missing, f'{column} missing'), (malformed, f'{column} malformed')]
+        ok = ~missing & ~malformed
+        for bound, outside, label in (('min', np.less, 'below'), ('max', np.greater, 'above')):
+            if bound in rule:
+                limit = day_numbers(rule[bound]) if COLUMN_TYPES[column] == DAY else rule[bound]
+                out_of_bounds = ok & outside(values[column], limit)
+                checks.append((out_of_bounds, f'{column} {label} {rule[bound]}'))
+                ok &= ~out_of_bounds
+        if rule.get('references') or rule.get('unique'):
+            # Only in-bounds ids are looked up (a stray huge id would overflow int64)
+            values[column] = np.where(ok, values[column], 0).astype(np.int64)
+        if rule.get('references'):
+            checks.append((ok & ~known.contains(values[column]), f'{column} not in {rule["references"]}'))
+        usable &= ok
+
+    unique = [column for column, rule in rules.items() if rule.get('unique')]
+    for column in unique:
+        ids = values[column]
+        repeated = seen.contains(ids) | pd.Series(ids).duplicated().to_numpy()
+        checks.append((usable & repeated, f'{column} duplicate'))
+
+    reasons = np.full(len(text), '', dtype=object)
+    for failed, reason in checks:
+        if failed.any():
+            reasons[failed] = reasons[failed] + (reason + '; ')
+    valid = reasons == ''
+    for column in unique:
+        seen.add(values[column][valid])
+    return pd.Series(reasons, index=text.index).str.removesuffix('; ')
+
+
+def _rewrite_valid(path, original, rejected_rows, chunksize):
+    """Write the rows of ``original`` to ``path`` without the given (1-based) row numbers.
+
+    Rows are counted as the CSV reader counts them, so a quoted newline or a
+    blank line cannot shift them; values are written back as the text read.
+    """
+    rejected = np.sort(np.asarray(rejected_rows, dtype=np.int64))
+    rows = 0
+    with open(path, 'w', newline='') as dst:
+        for chunk in _text_chunks(original, chunksize):
+            numbers = np.arange(rows + 1, rows + len(chunk) + 1)
+            keep = ~np.isin(numbers, rejected, assume_unique=True)
+            chunk[keep].to_csv(dst, index=False, header=rows == 0)
+            rows += len(chunk)
+
+
+def validate_table(name, path=None, known=None, chunksize=CHUNKSIZE, rejects_dir=REJECTS_DIR, rewrite=True):
+    """Validate a raw CSV and quarantine its bad rows.
+
+    Writes ``<rejects_dir>/<name>_rejects.csv`` (the rejected rows as read,
+    plus ``row``, their 1-based number after the header, and ``reasons``)
+    when any row fails. With ``rewrite``, the file at ``path`` is then
+    replaced by its valid rows and the original
+    kept as ``<rejects_dir>/<name>_original.csv``. Returns a report dict;
+    ``report['ids']`` is the IdSet of valid unique ids (e.g. customers to
+    pass as ``known`` when validating transactions).
+    """
+    path = path or TABLE_PATHS[name]
+    if known is None and any(rule.get('references') for rule in RAW_RULES[name].values()):
+        known = IdSet()
+        for chunk in read_raw('customers', usecols=['customer_id'], chunksize=chunksize):
+            known.add(chunk['customer_id'].to_numpy())
+
+    seen = IdSet()
+    rejects = []
+    rows = 0
+    for chunk in _text_chunks(path, chunksize):
+        reasons = validate_chunk(chunk, name, seen, known)
+        bad = (reasons != '').to_numpy()
+        if bad.any():
+            rejected = chunk[bad].copy()
+            rejected.insert(0, 'row', np.flatnonzero(bad) + rows + 1)
+            rejected['reasons'] = reasons[bad].to_numpy()
+            rejects.append(rejected)
+        rows += len(chunk)
+
+    rejects = pd.concat(rejects, ignore_index=True) if rejects else None
+    n_rejected = 0 if rejects is None else len(rejects)
+    report = {'table': name, 'path': path, 'rows': rows, 'valid': rows - n_rejected,
+              'rejected': n_rejected, 'reasons': {}, 'ids': seen}
+    if rejects is None:
+        return report
+
+    counts = rejects['reasons'].str.split('; ').explode().value_counts()
+    report['reasons'] = {reason: int(n) for reason, n in counts.head(MAX_REASONS).items()}
+    os.makedirs(rejects_dir, exist_ok=True)
+    report['rejects_path'] = os.path.join(rejects_dir, f'{name}_rejects.csv')
+    rejects.to_csv(report['rejects_path'], index=False)
+    if rewrite:
+        report['original_path'] = os.path.join(rejects_dir, f'{name}_original.csv')
+        shutil.move(path, report['original_path'])
+        _rewrite_valid(path, report['original_path'], rejects['row'], chunksize)
+    return report
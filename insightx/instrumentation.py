@@ -0,0 +1,259 @@
+"""Per-stage timing spans, memory high-water marks and optional profiling.
+
+Each step script opens one stage and wraps its phases in named spans:
+
+    start_stage('rfm')
+    with span('load transactions') as s:
+        transactions = load_table('transactions')
+        s.rows = len(transactions)
+    ...
+    finish_stage()
+
+A span records wall time, rows processed (and rows/sec), the process peak
+RSS when it closes and how much that peak grew while it was open. Spans
+nest. When the stage finishes (or the interpreter exits after an error) a
+report is written to ``data/results/profiles/``:
+
+* ``<stage>.json``   machine-readable run report
+* ``<stage>.folded`` span tree as folded stacks (self time in ms), readable
+  by flamegraph.pl, speedscope or inferno
+
+Setting ``INSIGHTX_PROFILE`` to a stage name (comma-separated, or ``all``)
+also profiles that stage. ``INSIGHTX_PROFILER`` picks the profiler:
+``sample`` (default) samples the main thread's stack every few
+milliseconds into ``<stage>.sampled.folded``; ``cprofile`` writes
+``<stage>.prof`` for ``pstats``/snakeviz. Any other value is an error.
+"""
+import atexit
+import cProfile
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_DIR = 'data/results/profiles'
+PROFILE_ENV = 'INSIGHTX_PROFILE'
+PROFILER_ENV = 'INSIGHTX_PROFILER'
+PROFILERS = ('sample', 'cprofile')
+SAMPLE_INTERVAL = 0.005
+
+
+def peak_rss_mb(who='self'):
+    """Peak resident set size of this process (or its reaped children) in MB."""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF if who == 'self' else resource.RUSAGE_CHILDREN)
+    # ru_maxrss is KB on Linux and bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / divisor, 1)
+
+
+class Span:
+    """One timed phase of a stage."""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.path = f'{parent.path};{name}' if parent else name
+        self.children = []
+        self.rows = None
+        self.seconds = None
+        self.peak_rss_mb = None
+        self.rss_growth_mb = None
+        self._start = time.perf_counter()
+        self._start_peak = peak_rss_mb()
+
+    def close(self):
+        self.seconds = time.perf_counter() - self._start
+        self.peak_rss_mb = peak_rss_mb()
+        if self.peak_rss_mb is not None:
+            self.rss_growth_mb = round(self.peak_rss_mb - self._start_peak, 1)
+
+    @property
+    def rows_per_sec(self):
+        if self.rows is None or not self.seconds:
+            return None
+        return round(self.rows / self.seconds, 1)
+
+    def self_seconds(self):
+        return max(0.0, (self.seconds or 0) - sum(child.seconds or 0 for child in self.children))
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def to_dict(self):
+        return {
+            'path': self.path,
+            'seconds': round(self.seconds, 4) if self.seconds is not None else None,
+            'rows': self.rows,
+            'rows_per_sec': self.rows_per_sec,
+            'peak_rss_mb': self.peak_rss_mb,
+            'rss_growth_mb': self.rss_growth_mb,
+        }
+
+
+class StackSampler:
+    """Sample one thread's Python stack on a timer into folded-stack counts."""
+
+    def __init__(self, thread_id, prefix, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.prefix = prefix
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if stack:
+                self.counts[';'.join([self.prefix] + stack[::-1])] += 1
+
+    def folded(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.counts.most_common())
+
+
+class StageRecorder:
+    """Collects the spans of one stage and writes its run report."""
+
+    def __init__(self, stage, output_dir=PROFILE_DIR):
+        self.stage = stage
+        self.output_dir = output_dir
+        self.started = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.root = Span(stage)
+        self.stack = [self.root]
+        self.finished = False
+        self.profiler = self.sampler = None
+        self.profile_mode = profile_mode(stage)
+        if self.profile_mode == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profile_mode == 'sample':
+            self.sampler = StackSampler(threading.get_ident(), stage)
+            self.sampler.start()
+
+    @contextmanager
+    def span(self, name, rows=None):
+        current = Span(name, self.stack[-1])
+        current.rows = rows
+        self.stack[-1].children.append(current)
+        self.stack.append(current)
+        try:
+            yield current
+        finally:
+            current.close()
+            self.stack.pop()
+
+    def finish(self, status='completed'):
+        """Stop profiling, close the stage span and write the reports."""
+        if self.finished:
+            return None
+        self.finished = True
+        outputs = {}
+        os.makedirs(self.output_dir, exist_ok=True)
+        if self.profiler is not None:
+            self.profiler.disable()
+            outputs['cprofile'] = os.path.join(self.output_dir, f'{self.stage}.prof')
+            self.profiler.dump_stats(outputs['cprofile'])
+        if self.sampler is not None:
+            self.sampler.stop()
+            outputs['sampled_folded'] = os.path.join(self.output_dir, f'{self.stage}.sampled.folded')
+            with open(outputs['sampled_folded'], 'w') as f:
+                f.write(self.sampler.folded())
+        while len(self.stack) > 1:
+            self.stack.pop().close()
+        self.root.close()
+
+        outputs['folded'] = os.path.join(self.output_dir, f'{self.stage}.folded')
+        with open(outputs['folded'], 'w') as f:
+            for node in self.root.walk():
+                f.write(f'{node.path} {round(node.self_seconds() * 1000)}\n')
+
+        report = {
+            'stage': self.stage,
+            'status': status,
+            'started': self.started,
+            'seconds': round(self.root.seconds, 4),
+            'peak_rss_mb': self.root.peak_rss_mb,
+            'children_peak_rss_mb': peak_rss_mb('children'),
+            'argv': sys.argv,
+            'python': platform.python_version(),
+            'profile': self.profile_mode,
+            'outputs': outputs,
+            'spans': [node.to_dict() for node in self.root.walk()][1:],
+        }
+        outputs['report'] = os.path.join(self.output_dir, f'{self.stage}.json')
+        with open(outputs['report'], 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def profile_mode(stage):
+    """Profiler requested for ``stage`` via the environment, or None."""
+    requested = [s.strip() for s in os.environ.get(PROFILE_ENV, '').split(',') if s.strip()]
+    if stage not in requested and 'all' not in requested:
+        return None
+    profiler = os.environ.get(PROFILER_ENV, 'sample').strip().lower()
+    if profiler not in PROFILERS:
+        raise ValueError(f"Unknown {PROFILER_ENV}={profiler!r}; use one of: {', '.join(PROFILERS)}")
+    return profiler
+
+
+_recorder = None
+
+
+def start_stage(stage, output_dir=PROFILE_DIR):
+    """Begin recording ``stage``; its report is written even if the step fails."""
+    global _recorder
+    _recorder = StageRecorder(stage, output_dir)
+    atexit.register(_recorder.finish, 'incomplete')
+    return _recorder
+
+
+def finish_stage():
+    """Write the current stage's report and print where it went."""
+    if _recorder is None:
+        return None
+    report = _recorder.finish()
+    if report is not None:
+        print(f"⏱️  {report['stage']}: {report['seconds']:.2f}s, peak RSS {report['peak_rss_mb']} MB "
+              f"- report saved to {report['outputs']['report']}")
+    return report
+
+
+@contextmanager
+def span(name, rows=None):
+    """Time a phase of the current stage (a detached span if none is open)."""
+    if _recorder is None or _recorder.finished:
+        current = Span(name)
+        current.rows = rows
+        try:
+            yield current
+        finally:
+            current.close()
+        return
+    with _recorder.span(name, rows) as current:
+        yield current
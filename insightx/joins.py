@@ -0,0 +1,130 @@
+"""Joins on customer_id for tables kept in customer_id order.
+
+Every per-customer table is written sorted by ``customer_id`` (see
+``insightx.schema.KEY_ORDER``), so joining two of them never needs a hash
+table:
+
+* ``merge_join`` aligns rows positionally when both sides hold the same
+  ids, and otherwise locates each left key in the sorted right keys with
+  one vectorized ``searchsorted`` pass;
+* ``stream_merge_join`` does the same over two streams of sorted chunks,
+  holding only the current chunks in memory, for inputs too large to load;
+* ``whole_customer_chunks`` re-cuts a sorted stream so that no customer's
+  rows are split across two chunks, for per-customer aggregation.
+
+The right-hand side must have one row per customer_id; the left side may
+repeat ids (transactions against customers, for example). Results match
+``pd.merge(left, right, on='customer_id', how=how)`` row for row.
+"""
+import numpy as np
+import pandas as pd
+
+KEY = 'customer_id'
+
+
+def _check_sorted(keys, side, unique):
+    steps = np.diff(keys)
+    if (steps <= 0).any() if unique else (steps < 0).any():
+        raise ValueError(f"merge_join: {side} side is not sorted by {KEY}")
+
+
+def merge_join(left, right, how='inner', key=KEY):
+    """Join ``right`` onto ``left`` by ``key``; both must be sorted by it."""
+    if how not in ('inner', 'left'):
+        raise ValueError(f"merge_join: unsupported join type {how!r}")
+    right_columns = [c for c in right.columns if c != key]
+    overlap = set(right_columns).intersection(left.columns)
+    if overlap:
+        raise ValueError(f"merge_join: columns on both sides: {sorted(overlap)}")
+    left_keys = left[key].to_numpy()
+    right_keys = right[key].to_numpy()
+
+    if len(left_keys) == len(right_keys) and np.array_equal(left_keys, right_keys):
+        # Same customers in the same order: plain positional alignment
+        positions = np.arange(len(right_keys))
+        matched = None
+    else:
+        _check_sorted(left_keys, 'left', unique=False)
+        _check_sorted(right_keys, 'right', unique=True)
+        positions = np.searchsorted(right_keys, left_keys).clip(max=max(len(right_keys) - 1, 0))
+        matched = (right_keys[positions] == left_keys) if len(right_keys) else \
+            np.zeros(len(left_keys), dtype=bool)
+        if matched.all():
+            matched = None
+
+    joined = left.reset_index(drop=True)
+    if matched is not None and how == 'inner':
+        joined = joined[matched].reset_index(drop=True)
+        positions = positions[matched]
+    joined = joined.copy()
+    for column in right_columns:
+        if not len(right_keys):
+            # All missing, upcast the way pd.merge does (int to float, str stays str)
+            joined[column] = right[column].reset_index(drop=True).reindex(joined.index)
+            continue
+        values = right[column].iloc[positions].reset_index(drop=True)
+        if matched is not None and how == 'left':
+            values = values.where(matched)
+        joined[column] = values
+    return joined
+
+
+def stream_merge_join(left_chunks, right_chunks, how='inner', key=KEY, right_columns=None):
+    """Yield ``merge_join`` results for two iterators of sorted chunks.
+
+    Right rows are buffered only until the left stream has moved past their
+    key, so memory is bounded by the chunk sizes rather than the inputs.
+    An empty right chunk still supplies the right-hand columns; pass
+    ``right_columns`` for a right stream that may yield no chunks at all.
+    """
+    right_chunks = iter(right_chunks)
+    buffer = None
+    exhausted = False
+    last_left = last_right = None
+    for chunk in left_chunks:
+        if not len(chunk):
+            continue
+        keys = chunk[key].to_numpy()
+        if last_left is not None and keys[0] < last_left:
+            raise ValueError(f"stream_merge_join: left chunks are not sorted by {key}")
+        last_left = keys[-1]
+        # Read right chunks until they cover this left chunk's last key
+        while not exhausted and (buffer is None or not len(buffer) or buffer[key].iat[-1] < last_left):
+            try:
+                incoming = next(right_chunks)
+            except StopIteration:
+                exhausted = True
+                break
+            if not len(incoming):
+                if buffer is None:
+                    buffer = incoming
+                continue
+            if last_right is not None and incoming[key].iat[0] <= last_right:
+                raise ValueError(f"stream_merge_join: right chunks are not sorted by {key}")
+            last_right = incoming[key].iat[-1]
+            buffer = incoming if buffer is None or not len(buffer) else pd.concat([buffer, incoming],
+                                                                                  ignore_index=True)
+        if buffer is None:
+            buffer = pd.DataFrame(columns=[key] + [c for c in right_columns or [] if c != key])
+        yield merge_join(chunk, buffer, how, key)
+        # Later left chunks can still repeat the last key, but nothing earlier
+        buffer = buffer[buffer[key].to_numpy() >= last_left].reset_index(drop=True)
+
+
+def whole_customer_chunks(chunks, key=KEY):
+    """Yield sorted chunks re-cut so each customer's rows are in one chunk.
+
+    The last customer of every chunk is carried into the next one.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if not len(chunk):
+            continue
+        tail = chunk[key].to_numpy() == chunk[key].iat[-1]
+        carry = chunk[tail]
+        if not tail.all():
+            yield chunk[~tail]
+    if carry is not None and len(carry):
+        yield carry
@@ -0,0 +1,97 @@
+"""On-disk cache of rendered dashboard panels keyed by their input data.
+
+Each panel declares the table columns it reads. The cache key is a hash of
+exactly those columns plus the renderer's code, the module-level constants
+it reads (e.g. colour lists), the source of insightx.rendering, which draws
+every panel, and the render settings, so a panel is only re-rendered when
+something it actually depends on changes.
+"""
+import glob
+import hashlib
+import os
+import types
+
+import pandas as pd
+
+import insightx.rendering
+
+# Module-level values a renderer may read that are fingerprinted by value
+CONSTANT_TYPES = (str, bytes, int, float, bool, tuple, list, dict, type(None))
+
+
+def _code_parts(code, names):
+    # Nested functions and lambdas are code objects among the constants;
+    # their repr holds a memory address, so they are fingerprinted by content
+    parts = [code.co_code.hex()]
+    names.update(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            parts += _code_parts(const, names)
+        else:
+            parts.append(repr(const))
+    return parts
+
+
+def _code_fingerprint(func, seen=None):
+    # Helper functions from the renderer's own module are included as well
+    seen = set() if seen is None else seen
+    seen.add(func)
+    names = set()
+    parts = _code_parts(func.__code__, names)
+    constants = {}
+    for name in sorted(names):
+        value = func.__globals__.get(name)
+        if isinstance(value, CONSTANT_TYPES):
+            constants[name] = value
+        elif (isinstance(value, types.FunctionType) and value.__module__ == func.__module__
+              and value not in seen):
+            parts.append(_code_fingerprint(value, seen))
+    return f'{func.__module__}.{func.__qualname__}:{":".join(parts)}:{constants!r}'
+
+
+def _source_fingerprint(module):
+    with open(module.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def panel_key(tables, inputs, functions=(), extra=()):
+    """Hash the declared input columns, renderer code and constants, and settings.
+
+    ``inputs`` maps table name to the list of columns the panel reads.
+    """
+    digest = hashlib.sha256()
+    for table_name in sorted(inputs):
+        columns = list(inputs[table_name])
+        frame = tables[table_name][columns]
+        digest.update(f'{table_name}:{columns}:{len(frame)}'.encode())
+        digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    for func in functions:
+        digest.update(_code_fingerprint(func).encode())
+    digest.update(_source_fingerprint(insightx.rendering).encode())
+    digest.update(repr(extra).encode())
+    return digest.hexdigest()[:20]
+
+
+class PanelCache:
+    """Stores one PNG per panel as ``<name>.<key>.png`` under ``directory``."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name, key):
+        return os.path.join(self.directory, f'{name}.{key}.png')
+
+    def get(self, name, key):
+        path = self._path(name, key)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def put(self, name, key, png):
+        # Drop stale renders of this panel so the cache holds one image each
+        for stale in glob.glob(os.path.join(self.directory, f'{glob.escape(name)}.*.png')):
+            os.remove(stale)
+        with open(self._path(name, key), 'wb') as f:
+            f.write(png)
@@ -0,0 +1,204 @@
+"""Stratified-sample preview runs with extrapolated metrics.
+
+``run_preview`` samples a fraction of customers within strata (behavior
+type, then the cluster of the last full run when one exists), copies only
+their transactions into a separate working directory, runs the pipeline
+stages there, and scales the A/B campaign and transaction metrics back to
+the full population with stratified expansion estimators:
+
+    total    = sum_h N_h * mean_h(y)
+    variance = sum_h N_h^2 * (1 - n_h / N_h) * var_h(y) / n_h
+
+CTR is estimated as a ratio of totals with a linearized standard error.
+Every estimate is reported with its standard error and 95% interval.
+
+Stages run headless (no plot windows), so a preview never waits on
+``plt.show()``. The working directory is replaced on every preview, so it is only deleted
+when it holds the ``PREVIEW_MARKER`` file ``write_sample`` leaves there,
+and never when it is the current directory or one of its parents.
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from insightx.joins import merge_join
+from insightx.rendering import HEADLESS_ENV
+from insightx.schema import TABLE_PATHS, load_table, save_table, dollars
+
+PREVIEW_DIR = 'data/preview'
+WEIGHTS_PATH = 'data/raw/sample_weights.csv'
+PREVIEW_MARKER = '.insightx-preview'
+PREVIEW_STAGES = ['rfm', 'rfm_windows', 'sql', 'clustering', 'affinity', 'clv', 'strategies', 'schedule',
+                  'ab_setup', 'ab_results', 'visualize', 'powerbi', 'cohorts']
+Z_95 = 1.96
+
+
+def assign_strata(customers, segments=None):
+    """Stratum label per customer: behavior type, then last full-run cluster."""
+    strata = customers['behavior_type'].astype(str)
+    if segments is not None:
+        cluster = merge_join(customers[['customer_id']], segments[['customer_id', 'cluster']],
+                             how='left')['cluster']
+        strata = strata + '|' + cluster.fillna(-1).astype(int).astype(str).values
+    return pd.Series(strata.values, index=customers.index, name='stratum')
+
+
+def stratified_sample(customers, fraction, strata, seed=42):
+    """Sample ``fraction`` of each stratum (at least 2 customers where possible).
+
+    Returns one row per sampled customer with its stratum, the stratum's
+    population and sample sizes, and its expansion weight N_h / n_h.
+    """
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({'customer_id': customers['customer_id'].values, 'stratum': strata.values})
+    picks = []
+    for stratum, members in frame.groupby('stratum', sort=True)['customer_id']:
+        population = len(members)
+        size = min(population, max(2, int(round(fraction * population))))
+        chosen = rng.choice(members.values, size=size, replace=False)
+        picks.append(pd.DataFrame({'customer_id': np.sort(chosen), 'stratum': stratum,
+                                   'population': population, 'sampled': size}))
+    sample = pd.concat(picks, ignore_index=True)
+    sample['weight'] = sample['population'] / sample['sampled']
+    return sample
+
+
+def clear_workdir(workdir):
+    """Delete a previous preview's ``workdir``; ValueError if it is anything else."""
+    path = os.path.realpath(workdir)
+    cwd = os.path.realpath(os.getcwd())
+    if os.path.commonpath([path, cwd]) == path:
+        raise ValueError(f"Preview workdir {workdir} is the current directory or one of its parents")
+    if not os.path.exists(path):
+        return
+    if not os.path.isdir(path) or (os.listdir(path) and not os.path.exists(os.path.join(path, PREVIEW_MARKER))):
+        raise ValueError(f"{workdir} exists and is not a preview directory (no {PREVIEW_MARKER} file); "
+                         f"remove it yourself or pass another --workdir")
+    shutil.rmtree(path)
+
+
+def write_sample(sample, customers, transactions, workdir):
+    """Write the sampled customers, their transactions and weights under ``workdir``."""
+    os.makedirs(workdir, exist_ok=True)
+    with open(os.path.join(workdir, PREVIEW_MARKER), 'w') as f:
+        f.write('Preview working directory; replaced by the next `insightx preview`\n')
+    ids = sample['customer_id'].values
+    for name, table in [('customers', customers), ('transactions', transactions)]:
+        path = os.path.join(workdir, TABLE_PATHS[name])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save_table(table[table['customer_id'].isin(ids)], path)
+    sample.to_csv(os.path.join(workdir, WEIGHTS_PATH), index=False)
+
+
+def stratified_total(sample, values):
+    """Expansion estimate of a population total and its standard error."""
+    frame = sample[['stratum', 'population', 'sampled']].assign(y=np.asarray(values, dtype=float))
+    by_stratum = frame.groupby('stratum').agg(population=('population', 'first'),
+                                              sampled=('sampled', 'first'),
+                                              mean=('y', 'mean'), var=('y', 'var'))
+    by_stratum['var'] = by_stratum['var'].fillna(0)
+    total = (by_stratum['population'] * by_stratum['mean']).sum()
+    variance = (by_stratum['population'] ** 2
+                * (1 - by_stratum['sampled'] / by_stratum['population'])
+                * by_stratum['var'] / by_stratum['sampled']).sum()
+    return float(total), float(np.sqrt(variance))
+
+
+def _row(metric, domain, sample_value, estimate, std_error):
+    return {'metric': metric, 'domain': domain, 'sample_value': sample_value,
+            'estimate': estimate, 'std_error': std_error,
+            'ci_low': estimate - Z_95 * std_error, 'ci_high': estimate + Z_95 * std_error,
+            'rel_error': std_error / estimate if estimate else np.nan}
+
+
+def extrapolate(sample, ab_results, transactions):
+    """Population estimates of customer, transaction and campaign metrics."""
+    customers = sample.merge(ab_results[['customer_id', 'segment_name', 'test_group', 'clicked',
+                                         'converted', 'purchase_amount']],
+                             on='customer_id', how='left')
+    spend = transactions.groupby('customer_id').agg(transactions=('transaction_id', 'count'),
+                                                    spend=('amount', 'sum'))
+    customers = customers.merge(spend, left_on='customer_id', right_index=True, how='left')
+    customers[['transactions', 'spend']] = customers[['transactions', 'spend']].fillna(0)
+    customers['sends'] = customers['test_group'].notna().astype(int)
+    customers['revenue'] = dollars(customers['purchase_amount'].fillna(0))
+    customers['spend'] = dollars(customers['spend'])
+
+    rows = []
+    for metric, column in [('customers', None), ('transactions', 'transactions'),
+                           ('transaction_revenue', 'spend'), ('emails_sent', 'sends'),
+                           ('clicks', 'clicked'), ('conversions', 'converted'),
+                           ('campaign_revenue', 'revenue')]:
+        values = np.ones(len(customers)) if column is None else customers[column].fillna(0).values
+        rows.append(_row(metric, 'all', values.sum(), *stratified_total(customers, values)))
+
+    domains = customers['segment_name'].astype(str) + ' / ' + customers['test_group'].astype(str)
+    for domain in sorted(domains[customers['sends'] == 1].unique()):
+        in_domain = (domains == domain).values
+        for metric, column in [('emails_sent', 'sends'), ('clicks', 'clicked'),
+                               ('conversions', 'converted'), ('campaign_revenue', 'revenue')]:
+            values = np.where(in_domain, customers[column].fillna(0).values, 0)
+            rows.append(_row(metric, domain, values.sum(), *stratified_total(customers, values)))
+
+    # CTR per test group as a ratio of totals, with a linearized standard error
+    for group in sorted(customers['test_group'].dropna().astype(str).unique()):
+        in_group = (customers['test_group'].astype(str) == group).values
+        clicks = np.where(in_group, customers['clicked'].fillna(0).values, 0)
+        sends = in_group.astype(float)
+        clicks_total, _ = stratified_total(customers, clicks)
+        sends_total, _ = stratified_total(customers, sends)
+        ctr = clicks_total / sends_total
+        _, residual_se = stratified_total(customers, clicks - ctr * sends)
+        rows.append(_row('ctr', f'test group {group}', clicks.sum() / sends.sum(), ctr,
+                         residual_se / sends_total))
+    return pd.DataFrame(rows)
+
+
+def run_preview(fraction=0.01, seed=42, workdir=PREVIEW_DIR, stages=PREVIEW_STAGES):
+    """Sample, run ``stages`` inside ``workdir`` and write extrapolated metrics."""
+    from insightx.cli import run_stage
+
+    clear_workdir(workdir)
+    print(f"Preview: sampling {fraction:.1%} of customers (seed {seed})...")
+    customers = load_table('customers')
+    transactions = load_table('transactions')
+    segments_path = TABLE_PATHS['customer_segments']
+    segments = None
+    if os.path.exists(segments_path):
+        segments = load_table('customer_segments', usecols=['customer_id', 'cluster'])
+
+    strata = assign_strata(customers, segments)
+    sample = stratified_sample(customers, fraction, strata, seed)
+    write_sample(sample, customers, transactions, workdir)
+    print(f"Sampled {len(sample):,} of {len(customers):,} customers across "
+          f"{sample['stratum'].nunique()} strata "
+          f"({'behavior type x cluster' if segments is not None else 'behavior type'})")
+
+    home = os.getcwd()
+    headless = os.environ.get(HEADLESS_ENV)
+    os.environ[HEADLESS_ENV] = '1'
+    os.chdir(workdir)
+    try:
+        for name in stages:
+            run_stage(name)
+        ab_results = load_table('ab_test_results')
+        sample_transactions = load_table('transactions')
+        estimates = extrapolate(sample, ab_results, sample_transactions)
+        estimates.round(4).to_csv('data/results/preview_estimates.csv', index=False)
+    finally:
+        os.chdir(home)
+        if headless is None:
+            del os.environ[HEADLESS_ENV]
+        else:
+            os.environ[HEADLESS_ENV] = headless
+
+    print(f"\n=== PREVIEW ESTIMATES ({fraction:.1%} stratified sample, 95% CI) ===")
+    for row in estimates.itertuples():
+        relative = 'n/a' if np.isnan(row.rel_error) else f'{row.rel_error:.1%}'
+        print(f"  {row.metric:<20} {row.domain:<32} {row.estimate:>14,.2f} "
+              f"± {Z_95 * row.std_error:>12,.2f}  ({relative})")
+    print(f"\n✅ Preview outputs in {workdir}/; estimates saved to "
+          f"{workdir}/data/results/preview_estimates.csv")
+    return estimates
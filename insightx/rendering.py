@@ -0,0 +1,163 @@
+"""Headless, aggregate-first chart rendering used by steps 4 and 8.
+
+Large scatters are drawn from pre-binned 2D counts and histograms from one
+grouped counting pass, so plotting cost depends on the number of bins rather
+than the number of customers. Dashboard panels can be rendered to PNG in
+worker processes and pasted into one composite image.
+"""
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+HEADLESS_ENV = 'INSIGHTX_HEADLESS'
+
+
+def headless_requested(argv=None):
+    """True when ``--headless`` is passed or INSIGHTX_HEADLESS is set."""
+    argv = sys.argv[1:] if argv is None else argv
+    return '--headless' in argv or os.environ.get(HEADLESS_ENV, '') not in ('', '0')
+
+
+def configure_backend(headless):
+    """Switch matplotlib to the non-interactive Agg backend when headless."""
+    import matplotlib
+    if headless:
+        matplotlib.use('Agg')
+    return headless
+
+
+def _bin_index(values, edges):
+    # searchsorted on the edges is equivalent to np.histogram's binning,
+    # with the right-most edge folded into the last bin
+    idx = np.searchsorted(edges, values, side='right') - 1
+    return np.clip(idx, 0, len(edges) - 2)
+
+
+def _edges(values, bins):
+    lo, hi = float(np.min(values)), float(np.max(values))
+    if lo == hi:
+        lo, hi = lo - 0.5, hi + 0.5
+    return np.linspace(lo, hi, bins + 1)
+
+
+def bin_points(x, y, labels, bins=60):
+    """Count points per (label, x-bin, y-bin) in a single bincount pass.
+
+    Returns a dict with the bin centers, the sorted unique labels and a
+    ``(n_labels, bins, bins)`` count array.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    uniques, codes = np.unique(np.asarray(labels), return_inverse=True)
+    x_edges, y_edges = _edges(x, bins), _edges(y, bins)
+    flat = (codes * bins + _bin_index(x, x_edges)) * bins + _bin_index(y, y_edges)
+    counts = np.bincount(flat, minlength=len(uniques) * bins * bins)
+    return {
+        'x_centers': (x_edges[:-1] + x_edges[1:]) / 2,
+        'y_centers': (y_edges[:-1] + y_edges[1:]) / 2,
+        'labels': uniques,
+        'counts': counts.reshape(len(uniques), bins, bins),
+    }
+
+
+def binned_scatter(ax, binned, cmap='viridis', alpha=0.6, min_size=8, max_size=120):
+    """Draw a labelled scatter from ``bin_points`` output.
+
+    One marker is drawn per non-empty (label, bin) cell, sized by the number
+    of customers it stands for. Returns the PathCollection for a colorbar.
+    """
+    counts = binned['counts']
+    label_idx, ix, iy = np.nonzero(counts)
+    n = counts[label_idx, ix, iy]
+    sizes = min_size + (max_size - min_size) * np.sqrt(n / max(n.max(initial=1), 1))
+    return ax.scatter(binned['x_centers'][ix], binned['y_centers'][iy],
+                      c=binned['labels'][label_idx], cmap=cmap, alpha=alpha, s=sizes)
+
+
+def grouped_histogram(values, groups, bins=20):
+    """Histogram ``values`` for every group at once over shared bin edges.
+
+    Returns ``(edges, group_labels, counts)`` where ``counts`` has one row per
+    group, in order of first appearance.
+    """
+    values = np.asarray(values, dtype=float)
+    group_labels, first, codes = np.unique(np.asarray(groups), return_index=True,
+                                           return_inverse=True)
+    edges = np.histogram_bin_edges(values, bins=bins)
+    counts = np.bincount(codes * bins + _bin_index(values, edges),
+                         minlength=len(group_labels) * bins).reshape(len(group_labels), bins)
+    order = np.argsort(first)
+    return edges, group_labels[order], counts[order]
+
+
+def _render_panel(job):
+    name, draw, payload, size, dpi = job
+    import matplotlib
+    matplotlib.use('Agg')
+    from matplotlib.figure import Figure
+
+    start = time.perf_counter()
+    fig = Figure(figsize=size)
+    ax = fig.add_subplot()
+    draw(fig, ax, payload)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi)
+    return name, buffer.getvalue(), time.perf_counter() - start
+
+
+def render_panels(panels, dpi, workers=None):
+    """Render ``(name, draw, payload, (w_in, h_in))`` panels to PNG bytes.
+
+    ``draw(fig, ax, payload)`` must be a module-level function so it can be
+    sent to worker processes. Returns ``{name: png_bytes}`` and
+    ``{name: seconds}``.
+    """
+    jobs = [(name, draw, payload, size, dpi) for name, draw, payload, size in panels]
+    if workers is None:
+        workers = min(len(jobs), os.cpu_count() or 1)
+    if workers <= 1:
+        results = [_render_panel(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render_panel, jobs))
+    images = {name: png for name, png, _ in results}
+    timings = {name: seconds for name, _, seconds in results}
+    return images, timings
+
+
+def composite_panels(images, boxes, size, dpi, path):
+    """Paste rendered panels onto one canvas and save it.
+
+    ``boxes`` maps panel name to its ``(left, top)`` offset in inches.
+    Returns the composed PIL image.
+    """
+    from PIL import Image
+
+    canvas = Image.new('RGB', (round(size[0] * dpi), round(size[1] * dpi)), 'white')
+    for name, (left, top) in boxes.items():
+        if name not in images:
+            continue
+        panel = Image.open(io.BytesIO(images[name])).convert('RGB')
+        canvas.paste(panel, (round(left * dpi), round(top * dpi)))
+    canvas.save(path, dpi=(dpi, dpi))
+    return canvas
+
+
+def panel_grid(rows, cols, size, title_height, spans=None):
+    """Lay out a ``rows x cols`` grid below a title strip.
+
+    ``spans`` maps a panel name to ``(row, col, row_span, col_span)``.
+    Returns ``{name: ((left, top), (width, height))}`` in inches.
+    """
+    cell_w = size[0] / cols
+    cell_h = (size[1] - title_height) / rows
+    layout = {'title': ((0.0, 0.0), (size[0], title_height))}
+    for name, (row, col, row_span, col_span) in (spans or {}).items():
+        layout[name] = ((col * cell_w, title_height + row * cell_h),
+                        (col_span * cell_w, row_span * cell_h))
+    return layout
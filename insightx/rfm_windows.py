@@ -0,0 +1,133 @@
+"""Trailing-window RFM features and 1-5 R/F/M quantile scores.
+
+``WindowedRFM`` sorts transactions once by (customer, day) into a single
+int64 key per transaction, ``customer_id * span + day offset``, and keeps
+the running sum of their amounts. For a customer ``c`` and as-of day
+``a``, the transactions in the trailing window (a - w, a] are the key range
+between ``c * span + a - w`` and ``c * span + a``. One ``searchsorted`` of
+every (customer, boundary day) key gives each customer's window count (the
+difference of two positions) and spend (the difference of two running
+sums), so extra windows and as-of dates add work per customer rather than
+another filtered pass over the transactions:
+
+    rfm = WindowedRFM(transactions)
+    features = rfm.features([day_numbers('2024-06-30'), day_numbers('2024-12-31')])
+    scores = quantile_scores(features)
+
+Rows are customers with at least one purchase on or before the as-of day,
+in (customer_id, as_of_date) order. Scores are computed within each as-of
+date: the share of customers with a strictly lower value is cut into
+``N_SCORES`` equal bands, so tied values always share a score. Customers
+joined from elsewhere who have no row yet get ``fill_inactive``'s values:
+nothing bought in any window and the lowest score.
+"""
+import numpy as np
+import pandas as pd
+
+from insightx.schema import apply_schema
+
+WINDOWS = (30, 90, 180, 365)
+N_SCORES = 5
+SCORE_WINDOW = 365  # F and M scores use this window's frequency and spend
+SCORE_COLUMNS = ['r_score', 'f_score', 'm_score', 'rfm_score']
+
+
+def window_columns(windows=WINDOWS):
+    return [f'{metric}_{window}d' for window in windows for metric in ('frequency', 'monetary')]
+
+
+class WindowedRFM:
+    """Transactions sorted by (customer, day) with running spend totals."""
+
+    def __init__(self, transactions, windows=WINDOWS):
+        self.windows = tuple(sorted(windows))
+        customer_ids = transactions['customer_id'].to_numpy().astype(np.int64)
+        days = transactions['transaction_date'].to_numpy().astype(np.int64)
+        amounts = transactions['amount'].to_numpy().astype(np.int64)
+
+        # Day offsets leave room for the longest window before the first purchase
+        self.origin = int(days.min()) - self.windows[-1] - 1 if len(days) else 0
+        self.span = int(days.max()) - self.origin + 1 if len(days) else 1
+        keys = customer_ids * self.span + (days - self.origin)
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.spend = np.concatenate([[0], np.cumsum(amounts[order])])
+        customer_ids = customer_ids[order]
+        self.starts = np.flatnonzero(np.diff(customer_ids, prepend=-1))
+        self.customer_ids = customer_ids[self.starts]
+
+    def features(self, as_of_days):
+        """Recency and per-window frequency/spend for each as-of day."""
+        as_of_days = np.unique(np.asarray(as_of_days, dtype=np.int64))
+        # Every boundary day (as-of days and window starts) is searched for
+        # every customer in one call: customer-major needles are ascending,
+        # so consecutive searches touch neighbouring memory
+        bounds, index = np.unique(as_of_days[:, None] - np.array((0,) + self.windows), return_inverse=True)
+        index = index.reshape(len(as_of_days), -1)
+        offsets = np.clip(bounds - self.origin, -1, self.span - 1)
+        needles = (self.customer_ids[:, None] * self.span + offsets).ravel()
+        # Transactions of each customer up to and including each boundary day
+        positions = np.searchsorted(self.keys, needles, side='right').reshape(len(self.customer_ids), -1)
+
+        # (customer, as-of date) cells in customer-major order; a customer
+        # appears from their first purchase on
+        end = positions[:, index[:, 0]]
+        active = end > self.starts[:, None]
+        rows, dates = np.nonzero(active)
+        end = end[active]
+        customer_ids = self.customer_ids[rows]
+        last_day = self.keys[end - 1] - customer_ids * self.span + self.origin
+        features = {'customer_id': customer_ids, 'as_of_date': as_of_days[dates],
+                    'recency': as_of_days[dates] - last_day}
+        for column, window in enumerate(self.windows, start=1):
+            begin = positions[rows, index[dates, column]]
+            features[f'frequency_{window}d'] = end - begin
+            features[f'monetary_{window}d'] = self.spend[end] - self.spend[begin]
+        return pd.DataFrame(features)
+
+
+def score(values, groups=None, n_scores=N_SCORES):
+    """1..n_scores quantile band of each integer value within its group (higher value, higher score)."""
+    values = np.asarray(values, dtype=np.int64)
+    if groups is None:
+        codes, sizes = np.zeros(len(values), dtype=np.int64), np.array([len(values)])
+    else:
+        codes, labels = pd.factorize(np.asarray(groups), sort=True)
+        sizes = np.bincount(codes, minlength=len(labels))
+    if not len(values):
+        return np.empty(0, dtype=np.int8)
+    # Sorted by one (group, value) key, the first position of each run of
+    # equal keys minus its group's start is the number of strictly lower values
+    low = values.min()
+    keys = codes * (int(values.max()) - int(low) + 1) + (values - low)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    run_start = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+    first = np.maximum.accumulate(np.where(run_start, np.arange(len(keys)), 0))
+    group_starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    lower = np.empty(len(keys), dtype=np.int64)
+    lower[order] = first - group_starts[codes[order]]
+    return (1 + lower * n_scores // sizes[codes]).astype(np.int8)
+
+
+def fill_inactive(features):
+    """``features`` with missing window values set to no activity: zero purchases and spend, score 1."""
+    fill = {}
+    for column in features.columns:
+        if column.startswith(('frequency_', 'monetary_')):
+            fill[column] = 0
+        elif column in SCORE_COLUMNS:
+            fill[column] = 111 if column == 'rfm_score' else 1
+    return apply_schema(features.fillna(fill))
+
+
+def quantile_scores(features, score_window=SCORE_WINDOW):
+    """``features`` with R/F/M scores (1-5) per as-of date and the combined RFM cell (e.g. 545)."""
+    groups = features['as_of_date'].to_numpy()
+    scored = features.copy()
+    scored['r_score'] = score(-features['recency'].to_numpy(), groups)
+    scored['f_score'] = score(features[f'frequency_{score_window}d'].to_numpy(), groups)
+    scored['m_score'] = score(features[f'monetary_{score_window}d'].to_numpy(), groups)
+    scored['rfm_score'] = (scored['r_score'].astype(np.int16) * 100 + scored['f_score'] * 10
+                           + scored['m_score']).astype(np.int16)
+    return apply_schema(scored)
@@ -0,0 +1,158 @@
+"""Incremental time-series rollups of campaign results.
+
+Event-level A/B results (one row per email send) are aggregated into daily
+partitions of sends/clicks/conversions/revenue by day x segment x test
+group, one CSV per day under ``<root>/daily``. Weekly and monthly rollups
+are derived from the daily partitions. An append compares each day's
+aggregate with its stored partition and writes only the days that are new
+or changed (e.g. re-simulated results for days already stored), then
+recomputes just the weeks/months those days fall in. ``sync`` does the same
+for a full event history and also drops stored days it no longer has.
+"""
+import os
+import shutil
+
+import pandas as pd
+
+from insightx.schema import dollars, to_datetime
+
+DIMENSIONS = ['segment_name', 'test_group', 'campaign_version']
+MEASURES = ['sends', 'clicks', 'conversions', 'revenue']
+PERIOD_GRAINS = ('weekly', 'monthly')
+
+
+def period_start(dates, grain):
+    """Map dates to the first day of their week (Monday) or month."""
+    dates = pd.DatetimeIndex(dates).normalize()
+    if grain == 'weekly':
+        return dates - pd.to_timedelta(dates.dayofweek, unit='D')
+    if grain == 'monthly':
+        return dates - pd.to_timedelta(dates.day - 1, unit='D')
+    raise ValueError(f"Unknown rollup grain: {grain}")
+
+
+def aggregate_daily(events, date_column='send_date'):
+    """Sum event-level results to one row per day x segment x test group.
+
+    ``purchase_amount`` is in integer cents and the send date may be a day
+    number (see ``insightx.schema``); revenue is reported in dollars.
+    """
+    daily = events.assign(
+        date=to_datetime(events[date_column]).dt.normalize(),
+        sends=1,
+        revenue=events['purchase_amount']
+    ).rename(columns={'clicked': 'clicks', 'converted': 'conversions'})
+    daily = daily.groupby(['date'] + DIMENSIONS, as_index=False, observed=True)[MEASURES].sum()
+    daily['revenue'] = dollars(daily['revenue']).round(2)
+    return daily
+
+
+class RollupStore:
+    """Daily partitions plus derived weekly/monthly tables under ``root``."""
+
+    def __init__(self, root='data/results/rollups'):
+        self.root = root
+        self.daily_dir = os.path.join(root, 'daily')
+
+    def stored_days(self):
+        if not os.path.isdir(self.daily_dir):
+            return []
+        return sorted(pd.Timestamp(name[:-4]) for name in os.listdir(self.daily_dir)
+                      if name.endswith('.csv'))
+
+    def _grain_path(self, grain):
+        return os.path.join(self.root, f'{grain}.csv')
+
+    def _day_path(self, day):
+        return os.path.join(self.daily_dir, f'{day:%Y-%m-%d}.csv')
+
+    def append(self, events, date_column='send_date'):
+        """Store the partitions of days that are new or whose totals changed.
+
+        Returns the list of written days.
+        """
+        if events.empty:
+            return []
+        daily = aggregate_daily(events, date_column)
+        os.makedirs(self.daily_dir, exist_ok=True)
+        written = []
+        for day, partition in daily.groupby('date'):
+            text = partition.to_csv(index=False, date_format='%Y-%m-%d').encode()
+            path = self._day_path(day)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    if f.read() == text:
+                        continue
+            with open(path, 'wb') as f:
+                f.write(text)
+            written.append(day)
+
+        self._refresh(written)
+        return written
+
+    def sync(self, events, date_column='send_date'):
+        """Make the rollups match ``events``, the full event history.
+
+        Like ``append``, but stored days without events are removed. Returns
+        the written and the removed days.
+        """
+        dates = set(to_datetime(events[date_column]).dt.normalize())
+        removed = [day for day in self.stored_days() if day not in dates]
+        for day in removed:
+            os.remove(self._day_path(day))
+        self._refresh(removed)
+        return self.append(events, date_column), removed
+
+    def rebuild(self, events, date_column='send_date'):
+        """Drop every stored rollup and rebuild from ``events``."""
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+        return self.append(events, date_column)
+
+    def _read_days(self, days):
+        if len(days) == 0:
+            return pd.DataFrame(columns=['date'] + DIMENSIONS + MEASURES)
+        daily = pd.concat(
+            [pd.read_csv(self._day_path(day)) for day in days],
+            ignore_index=True
+        )
+        daily['date'] = pd.to_datetime(daily['date'])
+        return daily
+
+    def load_daily(self, start=None, end=None):
+        return self._read_days([day for day in self.stored_days()
+                                if (start is None or day >= start) and (end is None or day <= end)])
+
+    def load(self, grain):
+        """Load the ``daily``, ``weekly`` or ``monthly`` rollup."""
+        if grain == 'daily':
+            return self.load_daily()
+        rollup = pd.read_csv(self._grain_path(grain))
+        rollup['period'] = pd.to_datetime(rollup['period'])
+        return rollup
+
+    def _refresh(self, days):
+        for grain in PERIOD_GRAINS:
+            # A missing period table is rebuilt from every stored day
+            refresh = days if os.path.exists(self._grain_path(grain)) else self.stored_days()
+            if refresh:
+                self._refresh_periods(grain, refresh)
+
+    def _refresh_periods(self, grain, days):
+        # Recompute only the periods touched by the new days, reading just
+        # the daily partitions that fall inside them
+        periods = pd.DatetimeIndex(period_start(days, grain).unique())
+        stored = pd.DatetimeIndex(self.stored_days())
+        affected_days = stored[period_start(stored, grain).isin(periods)]
+        daily = self._read_days(affected_days)
+        daily['period'] = period_start(daily['date'], grain)
+        refreshed = daily.groupby(['period'] + DIMENSIONS, as_index=False)[MEASURES].sum()
+        refreshed['revenue'] = refreshed['revenue'].round(2)
+
+        path = self._grain_path(grain)
+        if os.path.exists(path):
+            existing = self.load(grain)
+            existing = existing[~existing['period'].isin(periods)]
+            refreshed = pd.concat([existing, refreshed], ignore_index=True)
+        refreshed = refreshed.sort_values(['period'] + DIMENSIONS)
+        refreshed.to_csv(path, index=False, date_format='%Y-%m-%d')
@@ -0,0 +1,199 @@
+"""Campaign send scheduling: assignments -> dated per-channel send batches.
+
+Each customer's ``send_frequency`` sets their touch interval and their
+``channel_priority`` ("Email + SMS + Push") the channels a touch goes out
+on, in order. ``SendScheduler.batches`` walks the plan one day at a time:
+
+* touches wait in a priority queue (``heapq``) keyed by due day. Entries
+  are whole buckets of customers sharing an interval and start offset, so
+  the heap holds a few dozen numpy arrays rather than one item per
+  customer; a popped bucket is pushed straight back ``interval`` days on.
+* customers are numbered by priority (highest predicted value first) and
+  every bucket stays in that order, so "most valuable first" is a slice.
+* each channel has a daily throughput cap. Contacts over the cap are
+  deferred to the next day, ahead of that day's new touches, and dropped
+  as expired after ``max_delay`` days.
+* each customer gets at most ``max_contacts_per_week`` contacts per plan
+  week; their lower-priority channels are skipped once they reach it.
+
+Every step is vectorized over the day's due customers, and only the
+per-customer state and one day's batch are held in memory, so a quarter
+for 10M customers can be streamed straight to disk.
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+SEND_INTERVALS = {'Weekly': 7, 'Bi-weekly': 14, 'Monthly': 30}
+CHANNEL_CAPS = {
+    'Email': 2_000_000,
+    'Push': 500_000,
+    'SMS': 100_000,
+    'Social Media': 250_000,
+    'Direct Mail': 10_000,
+}
+MAX_CONTACTS_PER_WEEK = 3
+MAX_DELAY = 3
+HORIZON_DAYS = 91
+STATS = ['due', 'sent', 'deferred', 'expired', 'limited']
+
+
+def parse_channels(channel_priority):
+    """Channel names and per-position channel codes per customer, -1 padded."""
+    priorities = pd.Categorical(channel_priority)
+    lists = [str(p).split(' + ') for p in priorities.categories]
+    channels = list(dict.fromkeys(channel for channel_list in lists for channel in channel_list))
+    table = np.full((len(lists), max(len(channel_list) for channel_list in lists)), -1, dtype=np.int8)
+    for row, channel_list in enumerate(lists):
+        table[row, :len(channel_list)] = [channels.index(channel) for channel in channel_list]
+    return channels, [column[priorities.codes] for column in table.T]
+
+
+class SendScheduler:
+    """Day-by-day send planner over customers' campaign assignments.
+
+    ``priority`` is a non-negative value per assignment row (e.g. predicted
+    CLV in cents); higher values are sent first when a cap binds.
+    """
+
+    def __init__(self, assignments, priority, caps=CHANNEL_CAPS,
+                 max_contacts_per_week=MAX_CONTACTS_PER_WEEK, max_delay=MAX_DELAY):
+        unknown = set(pd.unique(assignments['send_frequency'])) - set(SEND_INTERVALS)
+        if unknown:
+            raise ValueError(f"Unknown send_frequency values: {sorted(unknown)}")
+        if max_delay >= min(SEND_INTERVALS.values()):
+            raise ValueError("max_delay must be shorter than the shortest send interval")
+
+        # Customer index = priority rank, so every index-sorted array is in
+        # priority order. Sorting (inverted priority, row) packed into one
+        # int64 is a stable descending sort at plain np.sort speed
+        priority = np.rint(np.asarray(priority, dtype=float)).clip(0, 2 ** 31 - 1).astype(np.int64)
+        packed = ((2 ** 31 - 1 - priority) << 32) | np.arange(len(priority), dtype=np.int64)
+        order = np.sort(packed) & 0xFFFFFFFF
+        self.customer_ids = assignments['customer_id'].to_numpy()[order]
+        frequency = pd.Categorical(assignments['send_frequency'])
+        lookup = np.array([SEND_INTERVALS[f] for f in frequency.categories], dtype=np.int64)
+        self.intervals = lookup[frequency.codes][order]
+        self.interval_values = np.unique(lookup)
+        self.channels, positions = parse_channels(assignments['channel_priority'])
+        self.channel_positions = [codes[order] for codes in positions]
+        missing = set(self.channels) - set(caps)
+        if missing:
+            raise ValueError(f"No daily cap for channels: {sorted(missing)}")
+        self.caps = np.array([caps[channel] for channel in self.channels], dtype=np.int64)
+        self.max_contacts_per_week = max_contacts_per_week
+        self.max_delay = max_delay
+        self.stats = []
+
+    def _initial_queue(self, start_day):
+        """Buckets of customers by (interval, start offset); offsets spread each cadence.
+
+        A bucket is stored pre-split by (channel position, channel), each
+        part in priority order, since its members never change.
+        """
+        intervals = self.interval_values
+        firsts = np.concatenate([[0], np.cumsum(intervals)[:-1]])
+        bucket_of = (firsts[np.searchsorted(intervals, self.intervals)]
+                     + self.customer_ids % self.intervals).astype(np.int16)
+        n_buckets = int(intervals.sum())
+        n_channels = len(self.channels)
+
+        # One stable (radix) sort per position groups customers by
+        # (bucket, channel) while keeping priority order inside each group
+        width = len(self.channel_positions)
+        parts = [[[None] * n_channels for _ in range(width)] for _ in range(n_buckets)]
+        for position, codes in enumerate(self.channel_positions):
+            members = np.flatnonzero(codes >= 0).astype(np.int32)
+            keys = bucket_of[members] * n_channels + codes[members]
+            order = np.argsort(keys, kind='stable')
+            members = members[order]
+            bounds = np.searchsorted(keys[order], np.arange(n_buckets * n_channels + 1))
+            for bucket in range(n_buckets):
+                for code in range(n_channels):
+                    key = bucket * n_channels + code
+                    parts[bucket][position][code] = members[bounds[key]:bounds[key + 1]]
+
+        queue = []
+        for interval, first in zip(intervals, firsts):
+            for offset in range(int(interval)):
+                bucket = int(first) + offset
+                if any(len(part) for by_channel in parts[bucket] for part in by_channel):
+                    queue.append((start_day + offset, bucket, int(interval), parts[bucket]))
+        heapq.heapify(queue)
+        return queue
+
+    def batches(self, start_day, days=HORIZON_DAYS):
+        """Yield (day number, send batch) for each day of the plan.
+
+        Each batch has ``customer_id`` and ``channel`` columns, grouped by
+        channel. Where a cap binds, the highest-priority customers are the
+        ones sent. Per-day, per-channel counts are appended to ``self.stats``.
+        """
+        queue = self._initial_queue(start_day)
+        n_channels = len(self.channels)
+        limit = self.max_contacts_per_week
+        week_contacts = np.zeros(len(self.customer_ids), dtype=np.int16)
+        # Deferred sends per (position, channel): [(due day, customer indices)], oldest first
+        deferred = [[[] for _ in range(n_channels)] for _ in self.channel_positions]
+
+        for day in range(start_day, start_day + days):
+            if (day - start_day) % 7 == 0:
+                week_contacts[:] = 0
+            due = []
+            while queue and queue[0][0] == day:
+                _, seq, interval, parts = heapq.heappop(queue)
+                due.append(parts)
+                heapq.heappush(queue, (day + interval, seq, interval, parts))
+
+            counts = np.zeros((n_channels, len(STATS)), dtype=np.int64)
+            caps_left = self.caps.copy()
+            sent = []
+            for position, queued in enumerate(deferred):
+                for code, waiting in enumerate(queued):
+                    fresh = [parts[position][code] for parts in due if len(parts[position][code])]
+                    fresh = np.concatenate(fresh) if len(fresh) > 1 else (fresh[0] if fresh else None)
+                    if fresh is not None:
+                        counts[code, STATS.index('due')] += len(fresh)
+                        # Merged buckets only need priority order if the cap cuts them off
+                        if len(due) > 1 and caps_left[code] < len(fresh) + sum(len(w) for _, w in waiting):
+                            fresh = np.sort(fresh)
+                        waiting.append((day, fresh))
+
+                    # Yesterday's overflow goes first, then today's touches by priority
+                    remaining = []
+                    for due_day, entries in waiting:
+                        if day - due_day > self.max_delay:
+                            counts[code, STATS.index('expired')] += len(entries)
+                            continue
+                        allowed = week_contacts[entries] < limit
+                        if not allowed.all():
+                            counts[code, STATS.index('limited')] += int((~allowed).sum())
+                            entries = entries[allowed]
+                        take = min(len(entries), int(caps_left[code]))
+                        if take:
+                            caps_left[code] -= take
+                            week_contacts[entries[:take]] += 1
+                            sent.append((code, entries[:take]))
+                        if take < len(entries):
+                            remaining.append((due_day, entries[take:]))
+                            counts[code, STATS.index('deferred')] += len(entries) - take
+                    queued[code] = remaining
+
+            for code, entries in sent:
+                counts[code, STATS.index('sent')] += len(entries)
+            self.stats.extend(
+                {'day': day, 'channel': name, **dict(zip(STATS, counts[code].tolist()))}
+                for code, name in enumerate(self.channels) if counts[code].any()
+            )
+            sent.sort(key=lambda part: part[0])
+            entries = np.concatenate([part for _, part in sent]) if sent else np.empty(0, np.int32)
+            codes = np.repeat(np.array([code for code, _ in sent], dtype=np.int8), [len(part) for _, part in sent])
+            yield day, pd.DataFrame({
+                'customer_id': self.customer_ids[entries],
+                'channel': pd.Categorical.from_codes(codes, self.channels),
+            })
+
+    def summary(self):
+        """Per-day, per-channel due/sent/deferred/expired/limited counts."""
+        return pd.DataFrame(self.stats, columns=['day', 'channel'] + STATS)
@@ -0,0 +1,270 @@
+"""Compact in-memory dtypes for every pipeline table.
+
+All stages load their CSVs through ``load_table``, which applies one
+registry of column types:
+
+* low-cardinality strings (segment names, gender, categories, test groups,
+  email subjects...) become pandas categoricals;
+* ids, ages and counts become int32/int16/int8;
+* money columns become integer cents (``MONEY``);
+* dates become int32 day numbers since 1970-01-01 (``DAY``).
+
+``save_table`` and ``to_external`` convert cents back to dollars and day
+numbers back to ``YYYY-MM-DD`` so the CSV files keep their format.
+
+Every table keyed by customer is kept sorted by ``customer_id``
+(``KEY_ORDER``); ``save_table`` refuses to write one out of order, which is
+what lets insightx.joins align tables positionally or merge-join them.
+"""
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+CATEGORY = 'category'
+MONEY = 'money'
+DAY = 'day'
+
+MONEY_DTYPE = np.int32
+DAY_DTYPE = np.int32
+EPOCH = np.datetime64('1970-01-01', 'D')
+# Integer dtypes and their nullable pandas counterparts, for columns with gaps
+NULLABLE_INTS = {np.dtype(dtype): name for dtype, name in
+                 [(np.int8, 'Int8'), (np.int16, 'Int16'), (np.int32, 'Int32'), (np.int64, 'Int64')]}
+
+COLUMN_TYPES = {
+    # Identifiers and small integers
+    'customer_id': 'int32',
+    'transaction_id': 'int32',
+    'cluster': 'int8',
+    'age': 'int16',
+    'recency': 'int16',
+    'frequency': 'int16',
+    'discount_percent': 'int8',
+    'clicked': 'int8',
+    'converted': 'int8',
+    'categories_purchased': 'int16',
+    'frequency_30d': 'int16',
+    'frequency_90d': 'int16',
+    'frequency_180d': 'int16',
+    'frequency_365d': 'int16',
+    'r_score': 'int8',
+    'f_score': 'int8',
+    'm_score': 'int8',
+    'rfm_score': 'int16',
+
+    # Low-cardinality strings
+    'gender': CATEGORY,
+    'behavior_type': CATEGORY,
+    'category': CATEGORY,
+    'segment_name': CATEGORY,
+    'segment_description': CATEGORY,
+    'segment_strategy': CATEGORY,
+    'test_group': CATEGORY,
+    'campaign_version': CATEGORY,
+    'campaign_type': CATEGORY,
+    'email_subject': CATEGORY,
+    'email_subject_generic': CATEGORY,
+    'email_subject_targeted': CATEGORY,
+    'personalization_level': CATEGORY,
+    'send_frequency': CATEGORY,
+    'channel_priority': CATEGORY,
+    'top_category': CATEGORY,
+    'next_category': CATEGORY,
+    'recommended_category': CATEGORY,
+
+    # Money, as integer cents
+    'amount': MONEY,
+    'monetary_total': MONEY,
+    'monetary_avg': MONEY,
+    'purchase_amount': MONEY,
+    'ltv_increase': MONEY,
+    'expected_order_value': MONEY,
+    'predicted_clv': MONEY,
+    'monetary_30d': MONEY,
+    'monetary_90d': MONEY,
+    'monetary_180d': MONEY,
+    'monetary_365d': MONEY,
+
+    # Dates, as day numbers
+    'registration_date': DAY,
+    'transaction_date': DAY,
+    'send_date': DAY,
+    'as_of_date': DAY,
+}
+
+TABLE_PATHS = {
+    'customers': 'data/raw/customers.csv',
+    'transactions': 'data/raw/transactions.csv',
+    'rfm_analysis': 'data/processed/rfm_analysis.csv',
+    'rfm_windows': 'data/processed/rfm_windows.csv',
+    'category_affinity': 'data/processed/category_affinity.csv',
+    'customer_clv': 'data/processed/customer_clv.csv',
+    'customer_segments': 'data/processed/customer_segments.csv',
+    'campaign_assignments': 'data/processed/campaign_assignments.csv',
+    'ab_test_setup': 'data/processed/ab_test_setup.csv',
+    'ab_test_results': 'data/results/ab_test_results.csv',
+    'campaign_performance_metrics': 'data/results/campaign_performance_metrics.csv',
+    'dashboard_main_data': 'powerbi/dashboard_main_data.csv',
+}
+
+# Generated inputs, read and validated by insightx.ingest
+RAW_TABLES = ('customers', 'transactions')
+
+# Row order of the per-customer tables: UNIQUE tables hold one row per
+# customer in ascending customer_id, SORTED tables may repeat a customer
+UNIQUE = 'unique'
+SORTED = 'sorted'
+KEY_ORDER = {
+    'customers': UNIQUE,
+    'transactions': SORTED,
+    'rfm_analysis': UNIQUE,
+    'rfm_windows': SORTED,
+    'category_affinity': UNIQUE,
+    'customer_clv': UNIQUE,
+    'customer_segments': UNIQUE,
+    'campaign_assignments': UNIQUE,
+    'ab_test_setup': UNIQUE,
+    'ab_test_results': UNIQUE,
+    'dashboard_main_data': UNIQUE,
+}
+
+
+def to_cents(dollars):
+    """Round dollar amounts to integer cents (float cents if any are NaN)."""
+    cents = np.rint(np.asarray(dollars, dtype=float) * 100)
+    return cents if np.isnan(cents).any() else cents.astype(MONEY_DTYPE)
+
+
+def dollars(cents):
+    """Convert integer cents (array, Series or scalar) back to dollars."""
+    return cents / 100
+
+
+def day_numbers(dates):
+    """Convert dates or ``YYYY-MM-DD`` strings to int32 days since 1970-01-01."""
+    if isinstance(dates, pd.Series):
+        return pd.Series(day_numbers(dates.values), index=dates.index, name=dates.name)
+    if isinstance(dates, str) or not hasattr(dates, '__len__'):
+        return int((np.datetime64(pd.Timestamp(dates), 'D') - EPOCH).astype(DAY_DTYPE))
+    values = np.asarray(dates)
+    if values.dtype.kind not in 'M':
+        values = pd.to_datetime(values, format='%Y-%m-%d').values
+    return (values.astype('datetime64[D]') - EPOCH).astype(DAY_DTYPE)
+
+
+def to_datetime(values):
+    """Datetimes from day numbers, or from anything ``pd.to_datetime`` accepts."""
+    if isinstance(values, pd.Series) and values.dtype.kind in 'iu':
+        if values.hasnans:  # nullable integers: missing days become NaT
+            return pd.to_datetime(values.astype('float64'), unit='D')
+        return pd.Series((values.values.astype('timedelta64[D]') + EPOCH).astype('datetime64[ns]'),
+                         index=values.index, name=values.name)
+    return pd.to_datetime(values)
+
+
+def apply_schema(df):
+    """Cast the registered columns of an in-memory frame to compact dtypes.
+
+    Money columns must already hold cents and date columns day numbers.
+    Integer, money and date columns with missing values become the nullable
+    pandas integer of the same width (with a warning, since most stages
+    expect none); categoricals hold missing values as they are.
+    """
+    casts = {}
+    for column in df.columns:
+        kind = COLUMN_TYPES.get(column)
+        if kind is None:
+            continue
+        dtype = MONEY_DTYPE if kind == MONEY else DAY_DTYPE if kind == DAY else kind
+        if kind != CATEGORY and df[column].isna().any():
+            dtype = NULLABLE_INTS[np.dtype(dtype)]
+            warnings.warn(f"{column}: {int(df[column].isna().sum())} missing values; stored as {dtype}",
+                          RuntimeWarning, stacklevel=2)
+        casts[column] = dtype
+    return df.astype(casts)
+
+
+def _from_csv(df):
+    for column in df.columns:
+        kind = COLUMN_TYPES.get(column)
+        if kind == MONEY:
+            df[column] = to_cents(df[column])
+        elif kind == DAY:
+            df[column] = day_numbers(df[column])
+    return df
+
+
+def load_table(name, path=None, usecols=None, chunksize=None):
+    """Read a pipeline table from CSV with the registry's compact dtypes.
+
+    With ``chunksize``, returns an iterator of frames of that many rows.
+    The raw input tables go through insightx.ingest's strict typed reader.
+    """
+    if name in RAW_TABLES:
+        from insightx.ingest import read_raw
+        return read_raw(name, path, usecols, chunksize)
+    path = path or TABLE_PATHS[name]
+    header = pd.read_csv(path, nrows=0).columns
+    columns = [c for c in header if usecols is None or c in usecols]
+    read_dtypes = {}
+    for column in columns:
+        kind = COLUMN_TYPES.get(column)
+        if kind == MONEY:
+            read_dtypes[column] = np.float64
+        elif kind == DAY:
+            read_dtypes[column] = str
+        elif kind is not None:
+            read_dtypes[column] = kind
+    if chunksize:
+        reader = pd.read_csv(path, usecols=columns, dtype=read_dtypes, chunksize=chunksize)
+        return (_from_csv(chunk) for chunk in reader)
+    return _from_csv(pd.read_csv(path, usecols=columns, dtype=read_dtypes))
+
+
+def to_external(df):
+    """Copy of ``df`` with cents as dollars and day numbers as ISO dates."""
+    df = df.copy()
+    for column in df.columns:
+        kind = COLUMN_TYPES.get(column)
+        if kind == MONEY and df[column].dtype.kind in 'iuf':
+            df[column] = dollars(df[column]).round(2)
+        elif kind == DAY and df[column].dtype.kind in 'iu':
+            df[column] = to_datetime(df[column]).dt.strftime('%Y-%m-%d')
+    return df
+
+
+def table_name(path):
+    """Registered table stored at ``path`` (relative to any working directory)."""
+    path = os.path.normpath(path)
+    for name, table_path in TABLE_PATHS.items():
+        table_path = os.path.normpath(table_path)
+        if path == table_path or path.endswith(os.sep + table_path):
+            return name
+    return None
+
+
+def check_key_order(df, name):
+    """Raise ValueError unless ``df`` is in table ``name``'s customer_id order."""
+    order = KEY_ORDER.get(name)
+    if order is None or 'customer_id' not in df.columns:
+        return
+    steps = np.diff(df['customer_id'].to_numpy())
+    if (steps <= 0).any() if order == UNIQUE else (steps < 0).any():
+        row = int(np.flatnonzero(steps <= 0 if order == UNIQUE else steps < 0)[0]) + 1
+        requirement = 'strictly ascending' if order == UNIQUE else 'ascending'
+        raise ValueError(f"{name}: customer_id must be {requirement} "
+                         f"(row {row} has {df['customer_id'].iloc[row]} after "
+                         f"{df['customer_id'].iloc[row - 1]})")
+
+
+def save_table(df, path):
+    """Write a pipeline table to CSV in its external (dollars, ISO date) form."""
+    check_key_order(df, table_name(path))
+    to_external(df).to_csv(path, index=False)
+
+
+def memory_usage(df):
+    """Deep memory footprint of ``df`` in bytes, including string payloads."""
+    return int(df.memory_usage(deep=True).sum())
@@ -0,0 +1,47 @@
+"""Single-customer segment scoring without NumPy, pandas or scikit-learn.
+
+Step 4 saves the fitted scaler and K-means centroids with
+``save_cluster_model``. ``score`` standardizes one customer's features and
+returns the nearest centroid, which is what ``KMeans.predict`` does, so the
+``score`` command answers in the time it takes to start Python.
+"""
+import json
+
+CLUSTER_MODEL_PATH = 'data/processed/cluster_model.json'
+
+# Features the pipeline keeps in integer cents; callers pass dollars
+CENT_FEATURES = ('monetary_total', 'monetary_avg', 'monetary_30d', 'monetary_90d', 'monetary_180d', 'monetary_365d')
+
+
+def save_cluster_model(scaler, kmeans, features, segment_names, path=CLUSTER_MODEL_PATH):
+    """Write the fitted StandardScaler/KMeans parameters as plain JSON."""
+    model = {
+        'features': list(features),
+        'mean': [float(v) for v in scaler.mean_],
+        'scale': [float(v) for v in scaler.scale_],
+        'centers': [[float(v) for v in center] for center in kmeans.cluster_centers_],
+        'segments': {str(cluster): name for cluster, name in segment_names.items()},
+    }
+    with open(path, 'w') as f:
+        json.dump(model, f, indent=2)
+    return model
+
+
+def load_cluster_model(path=CLUSTER_MODEL_PATH):
+    with open(path) as f:
+        return json.load(f)
+
+
+def score(model, values):
+    """Nearest cluster id for ``values``, a mapping of feature name to value.
+
+    Money features are given in dollars, the rest in their CSV units.
+    """
+    scaled = []
+    for feature, mean, scale in zip(model['features'], model['mean'], model['scale']):
+        value = float(values[feature])
+        if feature in CENT_FEATURES:
+            value = round(value * 100)
+        scaled.append((value - mean) / scale)
+    distances = [sum((x - c) ** 2 for x, c in zip(scaled, center)) for center in model['centers']]
+    return min(range(len(distances)), key=distances.__getitem__)
@@ -0,0 +1,182 @@
+"""Local HTTP lookup service for real-time segment and campaign personalization.
+
+    python -m insightx serve [--port 8765] [--cache-size 100000]
+
+    GET  /health                      store size and LRU cache statistics
+    GET  /customers/<id>              segment, test group and campaign offer
+    POST /customers  {"customer_ids": [1, 2, ...]}        batch lookup
+    POST /score      {"recency": 12, "frequency": 9, "monetary_total": 1450,
+                      "monetary_avg": 161, "age": 34}      score raw RFM inputs
+    POST /score      {"customers": [{...}, {...}]}         batch scoring
+
+Known customers are read from the memory-mapped feature store (one array
+index per column) and memoized in an in-process LRU cache; unknown
+customers can be scored from raw RFM values against the saved cluster
+model. Offers come from ``data/processed/campaign_strategies.json``. The
+server is the standard library's threading HTTP server with keep-alive
+connections; benchmarks/lookup_service.py drives it and reports
+throughput and tail latency.
+"""
+import json
+import re
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from insightx.feature_store import FEATURE_STORE_DIR, PRESENT, FeatureStore
+from insightx.scoring import CLUSTER_MODEL_PATH, load_cluster_model, score
+
+STRATEGIES_PATH = 'data/processed/campaign_strategies.json'
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 100_000
+MAX_BATCH = 10_000
+OFFER_FIELDS = ['campaign_type', 'discount_percent', 'send_frequency', 'channel_priority']
+CUSTOMER_PATH = re.compile(r'^/customers/(\d+)$')
+
+
+class LookupService:
+    """Customer lookups and scoring behind an LRU cache (no HTTP involved)."""
+
+    def __init__(self, store, strategies, model, cache_size=DEFAULT_CACHE_SIZE):
+        self.store = store
+        self.strategies = strategies
+        self.model = model
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop cached lookups and re-read the store's columns after it has been updated."""
+        columns = ['cluster', 'segment_name', 'test_group', 'email_subject']
+        self.columns = [c for c in columns if self.store.has([c])]
+        self.categories = {}
+        for column in self.columns:
+            categories = self.store.manifest['columns'][column].get('categories')
+            self.categories[column] = None if categories is None else list(categories)
+        self.lookup.cache_clear()
+
+    @classmethod
+    def from_files(cls, store_root=FEATURE_STORE_DIR, strategies_path=STRATEGIES_PATH,
+                   model_path=CLUSTER_MODEL_PATH, cache_size=DEFAULT_CACHE_SIZE):
+        store = FeatureStore(store_root)
+        if not store.has(['cluster']):
+            raise FileNotFoundError(f"No segments in the feature store at {store.root}. "
+                                    "Run Steps 2 and 4 first!")
+        with open(strategies_path) as f:
+            strategies = json.load(f)
+        model = load_cluster_model(model_path)
+        return cls(store, strategies, model, cache_size)
+
+    def offer(self, cluster, test_group=None):
+        strategy = self.strategies[str(cluster)]
+        offer = {field: strategy[field] for field in OFFER_FIELDS}
+        subject = 'email_subject_generic' if test_group == 'A' else 'email_subject_targeted'
+        offer['email_subject'] = strategy[subject]
+        return offer
+
+    def _lookup(self, customer_id):
+        """Segment and offer for one stored customer, or None if unknown."""
+        store = self.store
+        if not 0 <= customer_id < store.capacity or not store.column(PRESENT)[customer_id]:
+            return None
+        record = {'customer_id': customer_id}
+        for column in self.columns:
+            value = store.column(column)[customer_id].item()
+            categories = self.categories[column]
+            if categories is not None:
+                value = categories[value] if value >= 0 else None
+            record[column] = value
+        record['offer'] = self.offer(record['cluster'], record.get('test_group'))
+        if record.get('email_subject'):
+            record['offer']['email_subject'] = record.pop('email_subject')
+        return record
+
+    def score(self, values):
+        """Segment and targeted offer for a customer given raw RFM values."""
+        cluster = score(self.model, values)
+        return {'cluster': cluster, 'segment_name': self.model['segments'][str(cluster)],
+                'offer': self.offer(cluster)}
+
+
+class LookupHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without TCP_NODELAY each
+    # keep-alive response waits ~40 ms on the client's delayed ACK
+    disable_nagle_algorithm = True
+    service = None
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        service = self.service
+        match = CUSTOMER_PATH.match(self.path)
+        if match:
+            record = service.lookup(int(match.group(1)))
+            if record is None:
+                self._send(404, {'error': f'unknown customer {match.group(1)}'})
+            else:
+                self._send(200, record)
+        elif self.path == '/health':
+            info = service.lookup.cache_info()
+            self._send(200, {'status': 'ok', 'customers': int(service.store.column(PRESENT).sum()),
+                             'cache': {'hits': info.hits, 'misses': info.misses,
+                                       'size': info.currsize, 'max_size': info.maxsize}})
+        else:
+            self._send(404, {'error': f'no route for GET {self.path}'})
+
+    def do_POST(self):
+        service = self.service
+        try:
+            request = self._read_json()
+            if self.path == '/customers':
+                ids = request['customer_ids']
+                if len(ids) > MAX_BATCH:
+                    self._send(413, {'error': f'at most {MAX_BATCH} customer_ids per request'})
+                    return
+                self._send(200, {'customers': [service.lookup(int(i)) for i in ids]})
+            elif self.path == '/score':
+                if 'customers' in request:
+                    customers = request['customers']
+                    if len(customers) > MAX_BATCH:
+                        self._send(413, {'error': f'at most {MAX_BATCH} customers per request'})
+                        return
+                    self._send(200, {'customers': [service.score(c) for c in customers]})
+                else:
+                    self._send(200, service.score(request))
+            else:
+                self._send(404, {'error': f'no route for POST {self.path}'})
+        except (KeyError, TypeError, ValueError) as error:
+            self._send(400, {'error': f'bad request: {error!r}'})
+
+
+def make_server(service, host='127.0.0.1', port=DEFAULT_PORT, quiet=True):
+    handler = type('BoundLookupHandler', (LookupHandler,), {'service': service, 'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(host='127.0.0.1', port=DEFAULT_PORT, cache_size=DEFAULT_CACHE_SIZE, quiet=True):
+    service = LookupService.from_files(cache_size=cache_size)
+    server = make_server(service, host, port, quiet)
+    print(f"✅ Serving {int(service.store.column(PRESENT).sum()):,} customers on "
+          f"http://{host}:{server.server_address[1]} (LRU cache {cache_size:,})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,63 @@
+"""Vectorized simulators for synthetic campaign performance tables."""
+import numpy as np
+import pandas as pd
+
+# Expected daily sends and base CTR per segment, and the CTR multiplier for
+# the generic (A) and targeted (B) email versions
+BASE_PERFORMANCE = {
+    'Champions': {'emails': 150, 'ctr_base': 0.12},
+    'Loyal Customers': {'emails': 120, 'ctr_base': 0.09},
+    'At Risk': {'emails': 90, 'ctr_base': 0.06},
+    'Potential Loyalists': {'emails': 110, 'ctr_base': 0.08}
+}
+TEST_GROUPS = {
+    'A': {'campaign_version': 'Generic', 'ctr_multiplier': 0.85},
+    'B': {'campaign_version': 'Targeted', 'ctr_multiplier': 1.23},
+}
+
+
+def simulate_daily_performance(dates, segments, base_performance=BASE_PERFORMANCE,
+                               conversion_rate=0.25, seed=42):
+    """Simulate sends/clicks/conversions/revenue for dates x segments x groups.
+
+    All rows of the cartesian product are drawn at once: Poisson send
+    volumes and uniform noise come from single array draws, and the rate
+    columns use division that yields 0 where the denominator is 0.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.DatetimeIndex(dates)
+    segments = np.asarray(list(segments), dtype=object)
+    groups = np.array(list(TEST_GROUPS), dtype=object)
+    n_dates, n_segments, n_groups = len(dates), len(segments), len(groups)
+    n_rows = n_dates * n_segments * n_groups
+
+    # Row order is date-major, then segment, then test group
+    date_idx = np.repeat(np.arange(n_dates), n_segments * n_groups)
+    segment_idx = np.tile(np.repeat(np.arange(n_segments), n_groups), n_dates)
+    group_idx = np.tile(np.arange(n_groups), n_dates * n_segments)
+
+    mean_emails = np.array([base_performance[s]['emails'] for s in segments], dtype=float)
+    ctr_base = np.array([base_performance[s]['ctr_base'] for s in segments])
+    multiplier = np.array([TEST_GROUPS[g]['ctr_multiplier'] for g in groups])
+
+    emails_sent = rng.poisson(mean_emails[segment_idx])
+    ctr = ctr_base[segment_idx] * multiplier[group_idx]
+    clicks = (emails_sent * ctr * rng.uniform(0.8, 1.2, n_rows)).astype(np.int64)
+    conversions = (clicks * conversion_rate * rng.uniform(0.8, 1.2, n_rows)).astype(np.int64)
+    revenue = conversions * rng.uniform(50, 200, n_rows)
+
+    versions = np.array([TEST_GROUPS[g]['campaign_version'] for g in groups], dtype=object)
+    return pd.DataFrame({
+        'date': dates[date_idx],
+        'segment_name': segments[segment_idx],
+        'test_group': groups[group_idx],
+        'campaign_version': versions[group_idx],
+        'emails_sent': emails_sent,
+        'clicks': clicks,
+        'conversions': conversions,
+        'revenue': revenue.round(2),
+        'ctr': np.divide(clicks, emails_sent, out=np.zeros(n_rows),
+                         where=emails_sent > 0).round(4),
+        'conversion_rate': np.divide(conversions, clicks, out=np.zeros(n_rows),
+                                     where=clicks > 0).round(4),
+    })
@@ -0,0 +1,254 @@
+"""Star-schema, date-partitioned export of the Power BI dataset.
+
+Instead of one wide CSV that repeats segment descriptions and email
+subjects on every customer row, the dashboard data is split into a fact
+table of integer surrogate keys and measures plus small dimension tables
+(segment, campaign, test group, customer, date). Fact rows are written as
+compressed Parquet files partitioned by send date, and a manifest records a
+content hash per partition so a refresh only rewrites (and Power BI only
+reloads) partitions that are new or changed.
+
+Surrogate keys are stable across exports: the previous export's dimension
+tables (``read_dimensions``) are the key mapping, members keep their key
+and new members are appended after the highest one, so a new campaign does
+not renumber the others and rewrite every fact partition.
+"""
+import hashlib
+import importlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from insightx.joins import merge_join
+from insightx.schema import to_datetime
+
+FACT_TABLE = 'fact_campaign_sends'
+MANIFEST = 'manifest.json'
+CAMPAIGN_COLUMNS = ['campaign_type', 'campaign_version', 'email_subject', 'discount_percent']
+CUSTOMER_COLUMNS = ['gender', 'behavior_type']
+FACT_MEASURES = [
+    'age', 'recency', 'frequency', 'monetary_total',
+    'monetary_avg', 'clicked', 'converted', 'purchase_amount',
+    'customer_lifetime_value', 'engagement_score'
+]
+# Dimensions whose keys are assigned here, with their key and natural key columns
+KEYED_DIMENSIONS = {
+    'dim_campaign': ('campaign_key', CAMPAIGN_COLUMNS),
+    'dim_test_group': ('test_group_key', ['test_group']),
+}
+
+
+def parquet_available():
+    for engine in ('pyarrow', 'fastparquet'):
+        try:
+            importlib.import_module(engine)
+            return True
+        except ImportError:
+            continue
+    return False
+
+
+def _plain(frame):
+    # Text columns as str, so members read back from disk match new ones
+    return frame.astype({column: str for column in frame.columns
+                         if not pd.api.types.is_numeric_dtype(frame[column])})
+
+
+def _natural_key(frame, columns):
+    key = frame[columns[0]].astype(str)
+    for column in columns[1:]:
+        key = key + '\x1f' + frame[column].astype(str)
+    return key
+
+
+def _surrogate_key(frame, columns, key, previous=None):
+    """Stable 1-based keys of ``frame``'s natural key ``columns`` and the dimension table.
+
+    Members of the ``previous`` dimension keep their key; new members get
+    the next keys, in sorted order of their natural key.
+    """
+    natural, members = pd.factorize(_natural_key(frame, columns), sort=True)
+    _, first_rows = np.unique(natural, return_index=True)
+    dimension = _plain(frame[columns].iloc[first_rows]).reset_index(drop=True)
+    known = {}
+    if previous is not None:
+        previous = _plain(previous[[key] + columns])
+        known = dict(zip(_natural_key(previous, columns), previous[key].astype(int)))
+    next_key = max(known.values(), default=0) + 1
+    keys = np.empty(len(members), dtype=np.int32)
+    for i, member in enumerate(members):
+        if member not in known:
+            known[member] = next_key
+            next_key += 1
+        keys[i] = known[member]
+    dimension.insert(0, key, keys)
+    if previous is not None:
+        # Keep members the current data no longer has, so old keys stay valid
+        dimension = pd.concat([previous[~previous[key].isin(keys)], dimension])
+    return keys[natural], dimension.sort_values(key, ignore_index=True)
+
+
+def build_star_schema(main_data, ab_results, previous=None):
+    """Split the wide dashboard table into a fact table and dimensions.
+
+    ``main_data`` is the per-customer dashboard table from Step 9 and
+    ``ab_results`` the Step 7 results, which supply the send date and
+    campaign attributes. ``previous`` holds the last export's dimension
+    tables (see ``read_dimensions``), whose surrogate keys are kept.
+    """
+    previous = previous or {}
+    if 'send_date' not in ab_results.columns:
+        raise ValueError("ab_test_results.csv has no send_date column; re-run Step 7")
+
+    sends = merge_join(
+        main_data,
+        ab_results[['customer_id', 'send_date', 'email_subject', 'discount_percent', 'campaign_type']]
+    )
+    send_dates = to_datetime(sends['send_date'])
+
+    sends['segment_key'] = sends['cluster'].astype(np.int16)
+    dimensions = {}
+    for name, (key, columns) in KEYED_DIMENSIONS.items():
+        sends[key], dimensions[name] = _surrogate_key(sends, columns, key, previous.get(name))
+    sends['test_group_key'] = sends['test_group_key'].astype(np.int8)
+    sends['date_key'] = (send_dates.dt.year * 10000 + send_dates.dt.month * 100
+                         + send_dates.dt.day).astype(np.int32)
+
+    dim_segment = (sends[['segment_key', 'segment_name', 'segment_description', 'segment_strategy']]
+                   .drop_duplicates('segment_key').sort_values('segment_key'))
+    # Customer attributes once per customer instead of on every send
+    dim_customer = sends[['customer_id'] + CUSTOMER_COLUMNS].drop_duplicates('customer_id')
+    dim_customer = dim_customer.astype({'customer_id': np.int32}).sort_values('customer_id')
+
+    # Continuous calendar over the send window for time intelligence
+    calendar = pd.date_range(send_dates.min(), send_dates.max(), freq='D')
+    dim_date = pd.DataFrame({
+        'date_key': (calendar.year * 10000 + calendar.month * 100 + calendar.day).astype(np.int32),
+        'date': calendar,
+        'year': calendar.year.astype(np.int16),
+        'month': calendar.month.astype(np.int8),
+        'month_name': calendar.strftime('%b'),
+        'week_start': calendar - pd.to_timedelta(calendar.dayofweek, unit='D'),
+        'day_of_week': calendar.strftime('%a'),
+    })
+
+    fact = sends[['date_key', 'customer_id', 'segment_key', 'campaign_key', 'test_group_key']
+                 + FACT_MEASURES].copy()
+    fact['customer_id'] = fact['customer_id'].astype(np.int32)
+    for column in ['age', 'recency', 'frequency']:
+        fact[column] = fact[column].astype(np.int16)
+    for column in ['clicked', 'converted']:
+        fact[column] = fact[column].astype(np.int8)
+    fact['send_date'] = send_dates.values
+    fact = fact.sort_values(['date_key', 'customer_id'], ignore_index=True)
+
+    return {
+        FACT_TABLE: fact,
+        'dim_segment': dim_segment.reset_index(drop=True),
+        **dimensions,
+        'dim_customer': dim_customer.reset_index(drop=True),
+        'dim_date': dim_date,
+    }
+
+
+def _partition_labels(dates, partition_by):
+    if partition_by == 'month':
+        return dates.dt.strftime('%Y-%m')
+    if partition_by == 'day':
+        return dates.dt.strftime('%Y-%m-%d')
+    raise ValueError(f"partition_by must be 'month' or 'day', not {partition_by!r}")
+
+
+def _write(frame, path_stem, file_format):
+    if file_format == 'parquet':
+        path = f'{path_stem}.parquet'
+        frame.to_parquet(path, index=False, compression='zstd')
+    else:
+        path = f'{path_stem}.csv.gz'
+        frame.to_csv(path, index=False, compression='gzip')
+    return path
+
+
+def write_star_schema(tables, root, partition_by='month'):
+    """Write dimensions and the partitioned fact table under ``root``.
+
+    Fact partitions whose content hash matches the manifest are left
+    untouched; partitions that no longer have rows are removed. Returns a
+    dict with the file format and the partitions written and skipped.
+    """
+    file_format = 'parquet' if parquet_available() else 'csv.gz'
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    if manifest.get('format') != file_format or manifest.get('partition_by') != partition_by:
+        # Layout changed, so none of the stored partitions can be reused
+        shutil.rmtree(os.path.join(root, FACT_TABLE), ignore_errors=True)
+        manifest = {}
+    previous = manifest.get('partitions', {})
+
+    for name, table in tables.items():
+        if name != FACT_TABLE:
+            _write(table, os.path.join(root, name), file_format)
+
+    fact = tables[FACT_TABLE]
+    labels = _partition_labels(fact['send_date'], partition_by)
+    fact_dir = os.path.join(root, FACT_TABLE)
+    partitions, written, skipped = {}, [], []
+    for label, partition in fact.drop(columns='send_date').groupby(labels.values, sort=True):
+        content_hash = hashlib.sha1(
+            pd.util.hash_pandas_object(partition, index=False).values.tobytes()
+        ).hexdigest()
+        partition_dir = os.path.join(fact_dir, f'send_{partition_by}={label}')
+        entry = previous.get(label)
+        if entry and entry['hash'] == content_hash and os.path.exists(os.path.join(root, entry['path'])):
+            partitions[label] = entry
+            skipped.append(label)
+            continue
+        shutil.rmtree(partition_dir, ignore_errors=True)
+        os.makedirs(partition_dir)
+        path = _write(partition, os.path.join(partition_dir, 'part-0'), file_format)
+        partitions[label] = {'path': os.path.relpath(path, root), 'rows': len(partition),
+                             'hash': content_hash}
+        written.append(label)
+
+    for label in set(previous) - set(partitions):
+        shutil.rmtree(os.path.dirname(os.path.join(root, previous[label]['path'])), ignore_errors=True)
+
+    with open(manifest_path, 'w') as f:
+        json.dump({'format': file_format, 'partition_by': partition_by,
+                   'partitions': partitions}, f, indent=2)
+    return {'format': file_format, 'written': written, 'skipped': skipped}
+
+
+def read_dimensions(root):
+    """The dimension tables of the export under ``root`` that assign keys ({} if none)."""
+    manifest_path = os.path.join(root, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        file_format = json.load(f)['format']
+    reader = pd.read_parquet if file_format == 'parquet' else pd.read_csv
+    dimensions = {}
+    for name in KEYED_DIMENSIONS:
+        path = os.path.join(root, f'{name}.{file_format}')
+        if os.path.exists(path):
+            dimensions[name] = reader(path)
+    return dimensions
+
+
+def read_fact_partitions(root, labels=None):
+    """Read the fact table, or only the given partition labels."""
+    with open(os.path.join(root, MANIFEST)) as f:
+        manifest = json.load(f)
+    entries = manifest['partitions']
+    labels = sorted(entries) if labels is None else labels
+    readers = {'parquet': pd.read_parquet, 'csv.gz': pd.read_csv}
+    reader = readers[manifest['format']]
+    return pd.concat([reader(os.path.join(root, entries[label]['path'])) for label in labels],
+                     ignore_index=True)
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from insightx.cli import load_stage
+
+SEGMENTS = ['Champions', 'Loyal Customers', 'At Risk', 'Potential Loyalists']
+
+
+def ab_setup(n=300):
+    rng = np.random.default_rng(3)
+    ids = np.arange(1, n + 1)
+    test_group = np.where(ids % 2, 'A', 'B')
+    return pd.DataFrame({
+        'customer_id': ids, 'cluster': ids % 4, 'segment_name': np.array(SEGMENTS)[ids % 4],
+        'frequency': rng.integers(1, 20, n), 'monetary_total': rng.integers(1000, 90000, n),
+        'test_group': test_group, 'campaign_version': np.where(test_group == 'A', 'Generic', 'Targeted'),
+        'email_subject': 'Subject', 'discount_percent': 15, 'expected_ctr': rng.uniform(0.2, 0.6, n),
+        'campaign_type': 'Cross-Sell Campaign',
+    })
+
+
+def test_results_do_not_depend_on_row_order():
+    simulate_results = load_stage('ab_results').simulate_results
+    setup = ab_setup()
+    results = simulate_results(setup)
+    shuffled = simulate_results(setup.sample(frac=1, random_state=7))
+
+    assert results['customer_id'].tolist() == setup['customer_id'].tolist()
+    pd.testing.assert_frame_equal(shuffled.sort_values('customer_id', ignore_index=True), results)
+    assert results['clicked'].between(0, 1).all() and results['clicked'].any()
+    assert (results['converted'] <= results['clicked']).all()
+    assert ((results['purchase_amount'] > 0) == (results['converted'] == 1)).all()
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.affinity import CategoryAffinity
+
+CATEGORIES = ['Books', 'Electronics', 'Fashion', 'Home', 'Sports', 'Toys']
+
+
+def make_transactions(customers=80, rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    # Customers lean towards a few categories so some pairs have lift above 1
+    taste = rng.dirichlet(np.full(len(CATEGORIES), 0.3), customers)
+    customer_ids = rng.integers(1, customers + 1, rows)
+    categories = [rng.choice(CATEGORIES, p=taste[c - 1]) for c in customer_ids]
+    return pd.DataFrame({'customer_id': customer_ids, 'category': categories,
+                         'amount': rng.integers(100, 20_000, rows)})
+
+
+def dense_reference(transactions):
+    """Spend matrix, lift and affinity scores with plain numpy arrays."""
+    spend = pd.crosstab(transactions['customer_id'], transactions['category'],
+                        values=transactions['amount'], aggfunc='sum').fillna(0)
+    spend = spend.reindex(columns=CATEGORIES, fill_value=0)
+    bought = (spend.to_numpy() > 0).astype(float)
+    co = bought.T @ bought
+    buyers = np.diag(co)
+    lift = (co / buyers[:, None]) / (buyers[None, :] / len(spend))
+    np.fill_diagonal(lift, 0)
+    shares = spend.to_numpy() / spend.to_numpy().sum(axis=1, keepdims=True)
+    scores = shares @ np.where(lift > 1, lift, 0)
+    scores[bought > 0] = 0
+    return spend, co, lift, scores
+
+
+def build(transactions, chunk_rows=None):
+    affinity = CategoryAffinity()
+    step = chunk_rows or len(transactions)
+    for start in range(0, len(transactions), step):
+        affinity.add(transactions[start:start + step])
+    return affinity
+
+
+def test_lift_matches_dense_reference():
+    transactions = make_transactions()
+    affinity = build(transactions)
+    _, co, lift, _ = dense_reference(transactions)
+    table = affinity.lift()
+
+    codes = {name: CATEGORIES.index(name) for name in CATEGORIES}
+    i = table['antecedent'].map(codes).to_numpy()
+    j = table['consequent'].map(codes).to_numpy()
+    np.testing.assert_allclose(table['lift'], lift[i, j])
+    np.testing.assert_array_equal(table['co_purchasers'], co[i, j])
+    # Every co-purchased pair is listed
+    assert len(table) == int((co > 0).sum() - (np.diag(co) > 0).sum())
+
+
+def test_recommendations_match_dense_reference():
+    transactions = make_transactions()
+    spend, _, _, scores = dense_reference(transactions)
+    table, _ = build(transactions).recommendations(top_k=len(CATEGORIES))
+
+    assert table['customer_id'].tolist() == spend.index.tolist()
+    assert table['top_category'].astype(str).tolist() == spend.idxmax(axis=1).tolist()
+    best = scores.max(axis=1)
+    has_candidate = best > 0
+    np.testing.assert_allclose(table['next_category_score'][has_candidate], best[has_candidate].round(4))
+    assert table['next_category'][~has_candidate].isna().all()
+    # The recommended category is a best-scoring one the customer has not bought
+    chosen = [CATEGORIES.index(c) for c in table['next_category'][has_candidate]]
+    np.testing.assert_allclose(scores[has_candidate][np.arange(len(chosen)), chosen], best[has_candidate])
+    assert (spend.to_numpy()[has_candidate][np.arange(len(chosen)), chosen] == 0).all()
+
+
+def test_top_k_keeps_each_antecedents_best_lifts():
+    transactions = make_transactions(seed=3)
+    affinity = build(transactions)
+    _, _, lift, _ = dense_reference(transactions)
+    kept = affinity.lift_matrix(affinity.lift(), top_k=2).toarray()
+    codes = [CATEGORIES.index(name) for name in affinity.categories]
+    lift = lift[np.ix_(codes, codes)]
+
+    for row, values in enumerate(kept):
+        above = np.sort(lift[row][lift[row] > 1])[::-1][:2]
+        np.testing.assert_allclose(np.sort(values[values > 0])[::-1], above)
+
+
+@pytest.mark.parametrize('chunk_rows', [1, 37, 200])
+def test_chunked_accumulation_matches_one_pass(chunk_rows):
+    transactions = make_transactions(seed=1)
+    whole = build(transactions)
+    chunked = build(transactions, chunk_rows)
+
+    order = [chunked.categories.index(name) for name in whole.categories]
+    np.testing.assert_array_equal(chunked.spend.toarray()[:, order], whole.spend.toarray())
+    pd.testing.assert_frame_equal(chunked.recommendations()[0], whole.recommendations()[0],
+                                  check_categorical=False)
+    pd.testing.assert_frame_equal(chunked.lift(), whole.lift())
@@ -0,0 +1,50 @@
+import types
+
+import pytest
+
+from insightx import cli
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+
+    def load_stage(name):
+        return types.SimpleNamespace(main=lambda argv: calls.append((name, argv)))
+
+    monkeypatch.setattr(cli, 'load_stage', load_stage)
+    return calls
+
+
+def test_stages_lists_every_stage_in_order(capsys):
+    cli.main(['stages'])
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines] == list(cli.STAGES)
+    assert '04_kmeans_clustering.py' in lines[list(cli.STAGES).index('clustering')]
+
+
+def test_run_forwards_stage_arguments(calls):
+    cli.main(['run', 'clustering', '--headless', '--windowed-features'])
+    assert calls == [('clustering', ['--headless', '--windowed-features'])]
+
+
+def test_run_all_runs_every_stage_without_arguments(calls):
+    cli.main(['run', 'all'])
+    assert calls == [(name, []) for name in cli.STAGES]
+
+
+def test_run_all_rejects_stage_arguments(calls, capsys):
+    with pytest.raises(SystemExit, match='only accepted for a single stage'):
+        cli.main(['run', 'all', '--headless'])
+    assert calls == []
+    with pytest.raises(SystemExit):
+        cli.main(['run', 'no_such_stage'])
+    assert 'invalid choice' in capsys.readouterr().err
+
+
+@pytest.mark.parametrize('stage', ['sql', 'strategies', 'ab_setup'])
+def test_stages_without_options_reject_unknown_arguments(stage, capsys):
+    with pytest.raises(SystemExit) as error:
+        cli.run_stage(stage, ['--anything'])
+    assert error.value.code == 2
+    assert 'unrecognized arguments: --anything' in capsys.readouterr().err
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx import clv
+from insightx.clv import GammaGamma, lifetime_value, summarize
+
+
+def make_transactions(customers=400, seed=0):
+    rng = np.random.default_rng(seed)
+    purchases = rng.geometric(0.3, customers)
+    customer_ids = np.repeat(np.arange(1, customers + 1), purchases)
+    mean_order = np.repeat(rng.gamma(4.0, 1_500, customers), purchases)
+    return pd.DataFrame({
+        'customer_id': customer_ids,
+        'transaction_date': rng.integers(19_700, 20_088, len(customer_ids)),
+        'amount': np.maximum(rng.gamma(8.0, mean_order / 8.0), 100).astype(np.int64),
+    })
+
+
+def test_spend_model_is_fitted_on_repeat_customers():
+    summary = summarize(make_transactions(), 20_088)
+    repeat = summary['repeat_purchases'].to_numpy() > 0
+    assert 0 < repeat.sum() < len(summary)
+
+    table, _, spend = lifetime_value(summary)
+    on_repeat = GammaGamma().fit(summary['repeat_purchases'][repeat] + 1,
+                                 summary['monetary_avg'][repeat] / 100)
+    np.testing.assert_allclose(spend.params, on_repeat.params)
+    # One-time buyers are still scored
+    assert len(table) == len(summary)
+    assert (table['expected_order_value'] > 0).all()
+
+
+def test_one_time_buyers_do_not_move_the_spend_model():
+    summary = summarize(make_transactions(), 20_088)
+    outliers = pd.DataFrame({'customer_id': np.arange(10_001, 10_051, dtype=np.int32), 'repeat_purchases': 0,
+                             'last_purchase': 0, 'tenure': 30, 'monetary_avg': 5_000_000.0})
+    _, _, spend = lifetime_value(summary)
+    _, _, with_outliers = lifetime_value(pd.concat([summary, outliers], ignore_index=True))
+    np.testing.assert_allclose(with_outliers.params, spend.params)
+
+
+def test_prior_without_a_mean_falls_back_to_observed_averages(monkeypatch):
+    summary = summarize(make_transactions(), 20_088)
+
+    def fit(self, x, m):
+        self.params = np.array([2.0, 0.8, 10.0])
+        return self
+
+    monkeypatch.setattr(clv.GammaGamma, 'fit', fit)
+    with pytest.warns(RuntimeWarning, match='q=0.800'):
+        table, _, _ = lifetime_value(summary)
+    np.testing.assert_allclose(table['expected_order_value'], summary['monetary_avg'], atol=0.5)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+from insightx.cohorts import CohortMatrix, pivot
+from insightx.joins import whole_customer_chunks
+from insightx.schema import day_numbers
+
+
+def days(*dates):
+    return np.array([day_numbers(date) for date in dates], dtype=np.int32)
+
+
+CUSTOMERS = pd.DataFrame({
+    'customer_id': [1, 2, 3, 4, 5],
+    'registration_date': days('2024-01-05', '2024-01-20', '2024-02-03', '2024-02-28', '2024-04-10'),
+})
+TRANSACTIONS = pd.DataFrame({
+    'customer_id': [1, 1, 1, 2, 2, 3, 3, 3, 4, 4],
+    'transaction_date': days('2024-01-06', '2024-01-30', '2024-03-02', '2024-02-10', '2024-03-15',
+                             '2024-02-04', '2024-02-20', '2024-04-01', '2024-03-01', '2024-04-30'),
+    'amount': [1_000, 2_550, 300, 4_000, 125, 999, 1, 5_000, 700, 800],
+})
+
+
+def reference(customers, transactions):
+    """Retention cells by plain pandas grouping."""
+    cohort = pd.to_datetime(customers['registration_date'], unit='D').dt.to_period('M')
+    frame = transactions.merge(customers.assign(cohort=cohort), on='customer_id')
+    month = pd.to_datetime(frame['transaction_date'], unit='D').dt.to_period('M')
+    frame['period'] = (month - frame['cohort']).apply(lambda offset: offset.n)
+    frame = frame[frame['period'] >= 0]
+    cells = frame.groupby(['cohort', 'period']).agg(
+        active_customers=('customer_id', 'nunique'), transactions=('customer_id', 'size'),
+        revenue=('amount', 'sum')).reset_index()
+    cells['cohort_size'] = cells['cohort'].map(cohort.value_counts())
+    cells['cohort'] = cells['cohort'].astype(str)
+    return cells
+
+
+def observed_cells(table):
+    return table[table['active_customers'] > 0].reset_index(drop=True)
+
+
+def test_matches_a_pandas_groupby():
+    matrix = CohortMatrix(CUSTOMERS)
+    matrix.add(TRANSACTIONS)
+    table = observed_cells(matrix.table())
+    expected = reference(CUSTOMERS, TRANSACTIONS)
+
+    assert table['cohort_month'].tolist() == expected['cohort'].tolist()
+    assert table['months_since_registration'].tolist() == expected['period'].tolist()
+    assert table['active_customers'].tolist() == expected['active_customers'].tolist()
+    assert table['transactions'].tolist() == expected['transactions'].tolist()
+    assert table['cohort_size'].tolist() == expected['cohort_size'].tolist()
+    np.testing.assert_allclose(table['revenue'], expected['revenue'] / 100)
+    np.testing.assert_allclose(table['retention_rate'],
+                               (expected['active_customers'] / expected['cohort_size']).round(4))
+
+
+def test_cells_run_to_the_last_transaction_month():
+    matrix = CohortMatrix(CUSTOMERS)
+    matrix.add(TRANSACTIONS)
+    table = matrix.table()
+    # January cohort: months 0-3 (through April); the April cohort has no purchases but its month 0
+    assert table.loc[table['cohort_month'] == '2024-01', 'months_since_registration'].tolist() == [0, 1, 2, 3]
+    april = table[table['cohort_month'] == '2024-04']
+    assert april['months_since_registration'].tolist() == [0]
+    assert april['retention_rate'].tolist() == [0.0]
+    # March has no registrations and no row
+    assert '2024-03' not in set(table['cohort_month'])
+    wide = pivot(table, 'active_customers')
+    assert list(wide.columns) == ['cohort_month', 'month_0', 'month_1', 'month_2', 'month_3']
+
+
+def test_chunked_input_matches_a_single_pass():
+    rng = np.random.default_rng(0)
+    n = 300
+    customers = pd.DataFrame({'customer_id': np.arange(1, n + 1),
+                              'registration_date': rng.integers(19_723, 20_000, n).astype(np.int32)})
+    transactions = pd.DataFrame({
+        'customer_id': np.sort(rng.integers(1, n + 1, 4_000)),
+        'transaction_date': rng.integers(19_723, 20_088, 4_000).astype(np.int32),
+        'amount': rng.integers(100, 20_000, 4_000),
+    })
+    whole = CohortMatrix(customers)
+    whole.add(transactions)
+    chunked = CohortMatrix(customers)
+    for chunk in whole_customer_chunks(transactions[start:start + 97] for start in range(0, 4_000, 97)):
+        chunked.add(chunk)
+
+    pd.testing.assert_frame_equal(chunked.table(), whole.table())
+    assert chunked.skipped == whole.skipped > 0
+    expected = reference(customers, transactions)
+    assert observed_cells(whole.table())['active_customers'].tolist() == expected['active_customers'].tolist()
+
+
+def test_unknown_customers_and_early_purchases_are_skipped():
+    bad = pd.DataFrame({
+        'customer_id': [1, 99, -3, 4],
+        'transaction_date': days('2023-12-31', '2024-02-01', '2024-02-01', '2024-01-15'),
+        'amount': [100, 200, 300, 400],
+    })
+    matrix = CohortMatrix(CUSTOMERS)
+    matrix.add(pd.concat([TRANSACTIONS, bad], ignore_index=True))
+    assert matrix.skipped == 4
+
+    clean = CohortMatrix(CUSTOMERS)
+    clean.add(TRANSACTIONS)
+    pd.testing.assert_frame_equal(matrix.table(), clean.table())
+
+    empty = CohortMatrix(CUSTOMERS)
+    empty.add(bad)
+    assert empty.skipped == 4 and empty.table().empty
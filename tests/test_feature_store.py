@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.feature_store import FeatureStore, read_features
+from insightx.schema import apply_schema, save_table
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FeatureStore(str(tmp_path / 'features'))
+
+
+def test_put_and_gather_by_id(store):
+    store.put(pd.DataFrame({'customer_id': [3, 1], 'age': np.array([30, 41], dtype=np.int16),
+                            'segment_name': ['At Risk', 'Champions']}))
+    store.put(pd.DataFrame({'customer_id': [7], 'age': np.array([25], dtype=np.int16),
+                            'segment_name': ['Loyal Customers']}))
+
+    frame = store.gather([7, 1, 3])
+    assert frame['age'].tolist() == [25, 41, 30]
+    assert frame['segment_name'].tolist() == ['Loyal Customers', 'Champions', 'At Risk']
+    assert store.ids().tolist() == [1, 3, 7]
+    with pytest.raises(KeyError):
+        store.gather([2])
+
+
+def test_categories_past_int16_codes_widen_the_column(store):
+    n = np.iinfo(np.int16).max + 10
+    store.put(pd.DataFrame({'customer_id': [1, 2], 'label': ['a', 'b']}))
+    assert store.column('label').dtype == np.int16
+    store.put(pd.DataFrame({'customer_id': np.arange(3, n + 3), 'label': [f'c{i}' for i in range(n)]}))
+
+    assert store.column('label').dtype == np.int32
+    assert store.gather([1, 2, n + 2])['label'].tolist() == ['a', 'b', f'c{n - 1}']
+
+
+def test_int_column_widens_for_nan_fractions_and_large_values(store):
+    store.put(pd.DataFrame({'customer_id': [1, 2], 'score': np.array([5, 6], dtype=np.int16)}))
+    store.put(pd.DataFrame({'customer_id': [2], 'score': [7.0]}))  # integral floats fit
+    assert store.column('score').dtype == np.int16
+
+    store.put(pd.DataFrame({'customer_id': [3], 'score': [100_000]}))
+    assert store.column('score').dtype == np.int64
+    store.put(pd.DataFrame({'customer_id': [4], 'score': [np.nan]}))
+    assert store.column('score').dtype == np.float64
+    assert store.gather([1, 2, 3, 4])['score'].tolist()[:3] == [5, 7, 100_000]
+    assert np.isnan(store.gather([4])['score'].iloc[0])
+
+
+def test_read_features_matches_the_csv_table(store, tmp_path, monkeypatch):
+    segments = apply_schema(pd.DataFrame({
+        'customer_id': [1, 2, 5],
+        'cluster': [2, 0, 1],
+        'segment_name': ['Loyal Customers', 'At Risk', 'Champions'],
+        'monetary_total': [12_345, 990, 1],
+    }))
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data' / 'processed').mkdir(parents=True)
+    save_table(segments, 'data/processed/customer_segments.csv')
+    store.put(segments)
+
+    columns = ['cluster', 'segment_name', 'monetary_total']
+    from_store = read_features('customer_segments', columns, store)
+    from_csv = read_features('customer_segments', columns, FeatureStore(str(tmp_path / 'empty')))
+    pd.testing.assert_frame_equal(from_store, from_csv)
+    assert list(from_store['segment_name'].cat.categories) == ['At Risk', 'Champions', 'Loyal Customers']
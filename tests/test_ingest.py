@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx import ingest
+from insightx.ingest import IdSet, read_raw, validate_table
+
+CUSTOMERS_HEADER = 'customer_id,age,gender,registration_date,behavior_type\n'
+
+
+@pytest.fixture(params=['pyarrow', 'pandas'])
+def engine(request, monkeypatch):
+    """Run each test with the pyarrow text reader and with the pandas fallback."""
+    if request.param == 'pandas':
+        monkeypatch.setattr(ingest, 'pyarrow_csv', lambda: None)
+    return request.param
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_rejects_rows_with_reasons(tmp_path, engine):
+    path = write(tmp_path / 'customers.csv', CUSTOMERS_HEADER + (
+        '1,30,F,2023-01-01,loyal\n'
+        '2,abc,M,2023-01-01,casual\n'
+        '3,150,M,,casual\n'
+        '1,40,F,2023-02-01,loyal\n'
+        '4,41,F,2023-02-01,loyal\n'
+    ))
+    report = validate_table('customers', path, rejects_dir=str(tmp_path / 'rejects'), chunksize=2)
+
+    assert (report['rows'], report['valid'], report['rejected']) == (5, 2, 3)
+    rejects = pd.read_csv(report['rejects_path'])
+    assert rejects['row'].tolist() == [2, 3, 4]
+    assert rejects['reasons'].tolist() == [
+        'age malformed', 'age above 120; registration_date missing', 'customer_id duplicate']
+    assert report['ids'].contains([1, 2, 3, 4]).tolist() == [True, False, False, True]
+    assert pd.read_csv(path)['customer_id'].tolist() == [1, 4]
+    assert pd.read_csv(report['original_path'])['customer_id'].tolist() == [1, 2, 3, 1, 4]
+
+
+def test_blank_lines_and_quoted_newlines_keep_row_numbers(tmp_path, engine):
+    path = write(tmp_path / 'customers.csv', CUSTOMERS_HEADER + (
+        '1,30,F,2023-01-01,"loyal\nmultiline"\n'
+        '\n'
+        '2,x,M,2023-01-01,casual\n'
+        '3,40,M,2023-01-01,"casual, ""quoted"""\n'
+        '\n'
+        '4,41,F,2023-01-01,loyal\n'
+        '5,-1,F,2023-01-01,loyal\n'
+    ))
+    report = validate_table('customers', path, rejects_dir=str(tmp_path / 'rejects'), chunksize=2)
+
+    assert report['rows'] == 5
+    rejects = pd.read_csv(report['rejects_path'])
+    assert rejects['row'].tolist() == [2, 5]
+    assert rejects['customer_id'].tolist() == [2, 5]
+    clean = pd.read_csv(path)
+    assert clean['customer_id'].tolist() == [1, 3, 4]
+    assert clean['behavior_type'].tolist() == ['loyal\nmultiline', 'casual, "quoted"', 'loyal']
+
+
+def test_check_only_leaves_the_file(tmp_path, engine):
+    text = CUSTOMERS_HEADER + '1,30,F,2023-01-01,loyal\n2,x,M,2023-01-01,casual\n'
+    path = write(tmp_path / 'customers.csv', text)
+    report = validate_table('customers', path, rejects_dir=str(tmp_path / 'rejects'), rewrite=False)
+
+    assert report['rejected'] == 1
+    assert 'original_path' not in report
+    assert (tmp_path / 'customers.csv').read_text() == text
+
+
+def test_transactions_reference_known_customers(tmp_path, engine):
+    path = write(tmp_path / 'transactions.csv', (
+        'transaction_id,customer_id,transaction_date,amount,category\n'
+        '1,1,2024-01-01,10.50,Books\n'
+        '2,7,2024-01-01,10.50,Books\n'
+        '3,99999999999999999999,2024-01-01,10.50,Books\n'
+        '4,1,2024-01-01,0,Books\n'
+    ))
+    known = IdSet()
+    known.add([1, 2])
+    report = validate_table('transactions', path, known=known, rejects_dir=str(tmp_path / 'rejects'))
+
+    rejects = pd.read_csv(report['rejects_path'], dtype={'customer_id': str})
+    assert rejects['reasons'].tolist() == [
+        'customer_id not in customers', 'customer_id above 2147483647', 'amount below 0.01']
+    assert read_raw('transactions', path)['transaction_id'].tolist() == [1]
+
+
+def test_id_set_matches_python_set():
+    rng = np.random.default_rng(0)
+    ids, expected = IdSet(), set()
+    for high in [100, 1_000, 10**9, 2**31 - 1]:
+        batch = rng.integers(1, high, size=500)
+        ids.add(batch)
+        expected.update(batch.tolist())
+        probe = np.concatenate([batch, rng.integers(0, high, size=500), [0, -1, 2**40]])
+        assert ids.contains(probe).tolist() == [value in expected for value in probe.tolist()]
+        assert len(ids) == len(expected)
+    # Sparse ids switch to the sorted representation instead of a huge array
+    assert ids.sorted is not None
+
+
+def test_read_raw_engines_agree(tmp_path):
+    path = write(tmp_path / 'customers.csv', CUSTOMERS_HEADER + (
+        '1,30,F,2023-01-01,loyal\n2,31,M,2023-01-02,casual\n3,32,F,2023-01-03,bargain\n'))
+    arrow = read_raw('customers', path, engine='pyarrow')
+    c_parser = read_raw('customers', path, engine='c')
+    pd.testing.assert_frame_equal(arrow, c_parser, check_dtype=False)
+    for engine in ['pyarrow', 'c']:
+        # Each chunk has its own categories, so compare category columns as text
+        chunks = pd.concat(read_raw('customers', path, engine=engine, chunksize=2), ignore_index=True)
+        as_text = {'gender': str, 'behavior_type': str}
+        pd.testing.assert_frame_equal(chunks.astype(as_text), c_parser.astype(as_text), check_dtype=False)
+
+
+def test_read_raw_rejects_missing_values(tmp_path):
+    path = write(tmp_path / 'customers.csv', CUSTOMERS_HEADER + '1,,F,2023-01-01,loyal\n')
+    for engine in ['pyarrow', 'c']:
+        with pytest.raises(ValueError, match='insightx run ingest'):
+            read_raw('customers', path, engine=engine)
+        with pytest.raises(ValueError, match='insightx run ingest'):
+            list(read_raw('customers', path, engine=engine, chunksize=1))
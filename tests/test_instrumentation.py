@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from insightx.instrumentation import PROFILE_ENV, PROFILER_ENV, StageRecorder, profile_mode
+
+
+def test_profile_mode_follows_the_environment(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+    monkeypatch.setenv(PROFILER_ENV, 'cprofile')
+    assert profile_mode('rfm') is None
+
+    monkeypatch.setenv(PROFILE_ENV, 'clustering, rfm')
+    assert profile_mode('rfm') == 'cprofile'
+    monkeypatch.setenv(PROFILER_ENV, ' Sample ')
+    assert profile_mode('rfm') == 'sample'
+    monkeypatch.delenv(PROFILER_ENV)
+    assert profile_mode('rfm') == 'sample'
+
+
+def test_unknown_profiler_is_rejected(monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, 'all')
+    monkeypatch.setenv(PROFILER_ENV, 'pyspy')
+    with pytest.raises(ValueError, match="sample, cprofile"):
+        profile_mode('rfm')
+    # Not profiling this stage: the setting is not consulted
+    monkeypatch.setenv(PROFILE_ENV, 'clustering')
+    assert profile_mode('rfm') is None
+
+
+def test_report_lists_spans(tmp_path, monkeypatch):
+    monkeypatch.setenv(PROFILE_ENV, 'rfm')
+    monkeypatch.setenv(PROFILER_ENV, 'cprofile')
+    recorder = StageRecorder('rfm', str(tmp_path))
+    with recorder.span('load', rows=10):
+        with recorder.span('parse'):
+            pass
+    report = recorder.finish()
+
+    assert [span['path'] for span in report['spans']] == ['rfm;load', 'rfm;load;parse']
+    assert (tmp_path / 'rfm.prof').exists()
+    assert json.loads((tmp_path / 'rfm.json').read_text())['profile'] == 'cprofile'
+    assert recorder.finish() is None
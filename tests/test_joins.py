@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.joins import merge_join, stream_merge_join, whole_customer_chunks
+
+
+def make_tables(seed=0, customers=200, transactions=1_000):
+    rng = np.random.default_rng(seed)
+    ids = np.sort(rng.choice(np.arange(1, customers * 2), customers, replace=False))
+    right = pd.DataFrame({'customer_id': ids, 'segment_name': rng.choice(['A', 'B', 'C'], customers),
+                          'age': rng.integers(18, 80, customers)})
+    # Left ids repeat and include customers the right side does not have
+    left = pd.DataFrame({'customer_id': np.sort(rng.integers(0, customers * 2 + 5, transactions)),
+                         'amount': rng.integers(100, 10_000, transactions)})
+    return left, right
+
+
+def expected(left, right, how):
+    return pd.merge(left, right, on='customer_id', how=how)
+
+
+def chunks_of(frame, size):
+    return [frame[start:start + size] for start in range(0, len(frame), size)]
+
+
+@pytest.mark.parametrize('how', ['inner', 'left'])
+def test_merge_join_matches_pd_merge(how):
+    left, right = make_tables()
+    pd.testing.assert_frame_equal(merge_join(left, right, how), expected(left, right, how))
+
+
+def test_same_ids_align_positionally():
+    _, right = make_tables()
+    left = right[['customer_id']].assign(clicked=1)
+    pd.testing.assert_frame_equal(merge_join(left, right), expected(left, right, 'inner'))
+
+
+@pytest.mark.parametrize('how', ['inner', 'left'])
+def test_empty_sides(how):
+    left, right = make_tables()
+    for l, r in [(left[:0], right), (left, right[:0]), (left[:0], right[:0])]:
+        pd.testing.assert_frame_equal(merge_join(l, r, how), expected(l, r, how), check_index_type=False)
+
+
+def test_unsorted_or_duplicate_input_raises():
+    left, right = make_tables()
+    with pytest.raises(ValueError, match='left side is not sorted'):
+        merge_join(left[::-1], right)
+    with pytest.raises(ValueError, match='right side is not sorted'):
+        merge_join(left, right[::-1])
+    with pytest.raises(ValueError, match='right side is not sorted'):
+        merge_join(left, pd.concat([right, right]).sort_values('customer_id'))
+    with pytest.raises(ValueError, match='columns on both sides'):
+        merge_join(left.assign(age=1), right)
+    with pytest.raises(ValueError, match='unsupported join type'):
+        merge_join(left, right, how='outer')
+
+
+@pytest.mark.parametrize('how', ['inner', 'left'])
+@pytest.mark.parametrize('left_size, right_size', [(7, 13), (100, 3), (1, 1), (5_000, 5_000)])
+def test_stream_merge_join_matches_pd_merge(how, left_size, right_size):
+    left, right = make_tables(seed=1)
+    # Small left chunks split one customer's transactions across chunks
+    parts = stream_merge_join(chunks_of(left, left_size), chunks_of(right, right_size), how)
+    joined = pd.concat(list(parts), ignore_index=True)
+    pd.testing.assert_frame_equal(joined, expected(left, right, how))
+
+
+@pytest.mark.parametrize('how', ['inner', 'left'])
+def test_stream_merge_join_keeps_right_columns_of_an_empty_stream(how):
+    left, right = make_tables()
+    expected_columns = list(expected(left, right, how).columns)
+    for right_chunks, kwargs in [([right[:0]], {}), ([right[:0], right[:0]], {}),
+                                 ([], {'right_columns': list(right.columns)})]:
+        parts = list(stream_merge_join(chunks_of(left, 300), right_chunks, how, **kwargs))
+        joined = pd.concat(parts, ignore_index=True)
+        assert list(joined.columns) == expected_columns
+        assert len(joined) == (len(left) if how == 'left' else 0)
+        assert joined['segment_name'].isna().all()
+
+
+def test_stream_merge_join_rejects_unsorted_chunks():
+    left, right = make_tables()
+    with pytest.raises(ValueError, match='left chunks'):
+        list(stream_merge_join(chunks_of(left, 100)[::-1], chunks_of(right, 50)))
+    with pytest.raises(ValueError, match='right chunks'):
+        list(stream_merge_join(chunks_of(left, 100), chunks_of(right, 50)[::-1]))
+
+
+def test_whole_customer_chunks_keep_each_customer_together():
+    left, _ = make_tables(seed=2)
+    chunks = list(whole_customer_chunks(chunks_of(left, 9)))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), left)
+    seen = set()
+    for chunk in chunks:
+        customers = set(chunk['customer_id'])
+        assert not customers & seen
+        seen |= customers
+    assert list(whole_customer_chunks([left[:0]])) == []
@@ -0,0 +1,51 @@
+import pandas as pd
+
+from insightx import panel_cache
+from insightx.panel_cache import PanelCache, panel_key
+
+COLORS = ['#FF6B6B', '#4ECDC4']
+TABLES = {'results': pd.DataFrame({'group': ['A', 'B'], 'clicks': [3, 4], 'unused': [0, 1]})}
+INPUTS = {'results': ['group', 'clicks']}
+
+
+def bar_colors(n):
+    return [COLORS[i % len(COLORS)] for i in range(n)]
+
+
+def draw(ax, payload):
+    ax.bar(payload.index, payload.values, color=bar_colors(len(payload)))
+
+
+def key():
+    return panel_key(TABLES, INPUTS, (draw,), ((4, 3), 100))
+
+
+def test_key_is_stable_and_tracks_declared_columns():
+    assert key() == key()
+    unused_changed = {'results': TABLES['results'].assign(unused=[9, 9])}
+    assert panel_key(unused_changed, INPUTS, (draw,), ((4, 3), 100)) == key()
+    changed = {'results': TABLES['results'].assign(clicks=[3, 5])}
+    assert panel_key(changed, INPUTS, (draw,), ((4, 3), 100)) != key()
+
+
+def test_key_changes_with_constants_helpers_and_settings(monkeypatch):
+    before = key()
+    monkeypatch.setitem(globals(), 'COLORS', ['#000000', '#4ECDC4'])
+    assert key() != before
+    monkeypatch.undo()
+    assert key() == before
+    assert panel_key(TABLES, INPUTS, (draw,), ((4, 3), 300)) != before
+
+
+def test_key_changes_with_rendering_source(monkeypatch):
+    before = key()
+    monkeypatch.setattr(panel_cache, '_source_fingerprint', lambda module: 'edited')
+    assert key() != before
+
+
+def test_cache_keeps_one_image_per_panel(tmp_path):
+    cache = PanelCache(str(tmp_path))
+    cache.put('ab_ctr', 'old', b'1')
+    cache.put('ab_ctr', 'new', b'2')
+    assert cache.get('ab_ctr', 'old') is None
+    assert cache.get('ab_ctr', 'new') == b'2'
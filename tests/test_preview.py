@@ -0,0 +1,155 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx import cli
+from insightx.preview import (PREVIEW_MARKER, clear_workdir, extrapolate, run_preview, stratified_sample,
+                              stratified_total, write_sample)
+from insightx.rendering import HEADLESS_ENV
+from insightx.schema import TABLE_PATHS, apply_schema, save_table
+
+
+def make_population(n=4_000, seed=0):
+    rng = np.random.default_rng(seed)
+    behavior = rng.choice(['Loyal', 'Occasional', 'Bargain'], n, p=[.2, .5, .3])
+    customers = pd.DataFrame({'customer_id': np.arange(1, n + 1), 'behavior_type': behavior})
+    # Strata differ in spend and click rate, so stratification matters
+    base = customers['behavior_type'].map({'Loyal': 300, 'Occasional': 60, 'Bargain': 25}).to_numpy()
+    ab_results = pd.DataFrame({
+        'customer_id': customers['customer_id'],
+        'segment_name': np.where(base > 100, 'Champions', 'At Risk'),
+        'test_group': rng.choice(['A', 'B'], n),
+        'clicked': rng.random(n) < base / 1_000,
+        'converted': rng.random(n) < base / 5_000,
+        'purchase_amount': rng.poisson(base * 10),
+    })
+    rows = rng.poisson(base / 30) + 1
+    transactions = pd.DataFrame({
+        'transaction_id': np.arange(1, rows.sum() + 1),
+        'customer_id': np.repeat(customers['customer_id'], rows).to_numpy(),
+        'amount': rng.gamma(2.0, np.repeat(base, rows) * 50),
+    })
+    return customers, ab_results, transactions
+
+
+def true_totals(ab_results, transactions):
+    return {'customers': len(ab_results), 'transactions': len(transactions),
+            'transaction_revenue': transactions['amount'].sum() / 100,
+            'emails_sent': len(ab_results), 'clicks': ab_results['clicked'].sum(),
+            'conversions': ab_results['converted'].sum(),
+            'campaign_revenue': ab_results['purchase_amount'].sum() / 100}
+
+
+def estimates_for(fraction, seed, population):
+    customers, ab_results, transactions = population
+    sample = stratified_sample(customers, fraction, customers['behavior_type'], seed)
+    ids = sample['customer_id']
+    return extrapolate(sample, ab_results[ab_results['customer_id'].isin(ids)],
+                       transactions[transactions['customer_id'].isin(ids)])
+
+
+def test_clears_a_previous_preview(tmp_path):
+    workdir = tmp_path / 'preview'
+    customers = pd.DataFrame({'customer_id': [1, 2]})
+    transactions = pd.DataFrame({'customer_id': [1, 2], 'transaction_id': [1, 2]})
+    write_sample(pd.DataFrame({'customer_id': [1]}), customers, transactions, str(workdir))
+    assert (workdir / PREVIEW_MARKER).exists()
+
+    clear_workdir(str(workdir))
+    assert not workdir.exists()
+
+
+def test_missing_or_empty_workdir_is_fine(tmp_path):
+    clear_workdir(str(tmp_path / 'new'))
+    (tmp_path / 'empty').mkdir()
+    clear_workdir(str(tmp_path / 'empty'))
+    assert not (tmp_path / 'empty').exists()
+
+
+def test_refuses_directories_without_the_marker(tmp_path):
+    (tmp_path / 'data').mkdir()
+    (tmp_path / 'data' / 'customers.csv').write_text('customer_id\n1\n')
+    with pytest.raises(ValueError, match=PREVIEW_MARKER):
+        clear_workdir(str(tmp_path / 'data'))
+    assert (tmp_path / 'data' / 'customers.csv').exists()
+
+
+def test_refuses_the_current_directory_and_its_parents(tmp_path, monkeypatch):
+    inside = tmp_path / 'repo' / 'data'
+    inside.mkdir(parents=True)
+    (tmp_path / 'repo' / PREVIEW_MARKER).write_text('')
+    monkeypatch.chdir(inside)
+    for workdir in ['.', '..', str(tmp_path), os.path.join('..', '..', 'repo')]:
+        with pytest.raises(ValueError, match='current directory'):
+            clear_workdir(workdir)
+    assert inside.exists()
+
+
+def test_full_sample_estimates_are_exact():
+    population = make_population()
+    estimates = estimates_for(1.0, 0, population).set_index(['metric', 'domain'])
+    for metric, total in true_totals(*population[1:]).items():
+        assert estimates.loc[(metric, 'all'), 'estimate'] == pytest.approx(total)
+        assert estimates.loc[(metric, 'all'), 'std_error'] == pytest.approx(0, abs=1e-9)
+    ab_results = population[1]
+    for group in ['A', 'B']:
+        clicked = ab_results.loc[ab_results['test_group'] == group, 'clicked']
+        assert estimates.loc[('ctr', f'test group {group}'), 'estimate'] == pytest.approx(clicked.mean())
+
+
+def test_stratified_total_weights_each_stratum():
+    sample = pd.DataFrame({'stratum': ['a', 'a', 'b', 'b', 'b'], 'population': [10, 10, 300, 300, 300],
+                           'sampled': [2, 2, 3, 3, 3]})
+    total, std_error = stratified_total(sample, [1, 3, 0, 0, 3])
+    assert total == pytest.approx(10 * 2 + 300 * 1)
+    expected = 10 ** 2 * (1 - 2 / 10) * 2 / 2 + 300 ** 2 * (1 - 3 / 300) * 3 / 3
+    assert std_error == pytest.approx(np.sqrt(expected))
+
+
+def test_intervals_bracket_the_true_totals_at_small_fractions():
+    population = make_population()
+    totals = true_totals(*population[1:])
+    covered = {metric: 0 for metric in ['transactions', 'transaction_revenue', 'clicks', 'campaign_revenue']}
+    runs = 20
+    for seed in range(runs):
+        estimates = estimates_for(0.05, seed, population).set_index(['metric', 'domain'])
+        for metric in covered:
+            row = estimates.loc[(metric, 'all')]
+            covered[metric] += row['ci_low'] <= totals[metric] <= row['ci_high']
+        # Customers are counted exactly by design
+        assert estimates.loc[('customers', 'all'), 'estimate'] == pytest.approx(totals['customers'])
+    # Nominal 95% coverage; allow for the sampling noise of 20 runs
+    assert all(count >= 0.8 * runs for count in covered.values()), covered
+
+
+def test_preview_stages_run_headless(tmp_path, monkeypatch):
+    customers, ab_results, transactions = make_population(n=300)
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('data/raw')
+    customers.assign(age=40, gender='F', registration_date='2023-01-01')[
+        ['customer_id', 'age', 'gender', 'registration_date', 'behavior_type']].to_csv(
+        TABLE_PATHS['customers'], index=False)
+    dollars = (transactions['amount'] / 100).round(2)
+    transactions.assign(transaction_date='2024-03-01', category='Books', amount=dollars)[
+        ['transaction_id', 'customer_id', 'transaction_date', 'amount', 'category']].to_csv(
+        TABLE_PATHS['transactions'], index=False)
+    monkeypatch.delenv(HEADLESS_ENV, raising=False)
+
+    seen = []
+
+    def run_stage(name, argv=()):
+        seen.append((name, os.environ.get(HEADLESS_ENV)))
+        sampled = pd.read_csv(TABLE_PATHS['customers'])['customer_id']
+        os.makedirs('data/results', exist_ok=True)
+        save_table(apply_schema(ab_results[ab_results['customer_id'].isin(sampled)]),
+                   TABLE_PATHS['ab_test_results'])
+
+    monkeypatch.setattr(cli, 'run_stage', run_stage)
+    estimates = run_preview(0.2, workdir='preview', stages=['clustering', 'visualize'])
+
+    assert seen == [('clustering', '1'), ('visualize', '1')]
+    assert HEADLESS_ENV not in os.environ
+    assert (tmp_path / 'preview' / 'data' / 'results' / 'preview_estimates.csv').exists()
+    assert set(estimates['metric']) >= {'customers', 'clicks', 'ctr'}
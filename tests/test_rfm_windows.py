@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from insightx.joins import merge_join
+from insightx.rfm_windows import WINDOWS, WindowedRFM, fill_inactive, quantile_scores, score, window_columns
+
+
+def make_transactions(customers=60, rows=1_500, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'customer_id': rng.integers(1, customers + 1, rows),
+        'transaction_date': rng.integers(19_500, 20_100, rows),
+        'amount': rng.integers(100, 50_000, rows),
+    }).sort_values('customer_id', ignore_index=True)
+
+
+def filtered_features(transactions, as_of):
+    """Window features by filtering the transactions once per window."""
+    seen = transactions[transactions['transaction_date'] <= as_of]
+    expected = seen.groupby('customer_id').agg(last_day=('transaction_date', 'max')).reset_index()
+    expected['recency'] = as_of - expected.pop('last_day')
+    for window in WINDOWS:
+        recent = seen[seen['transaction_date'] > as_of - window].groupby('customer_id')['amount']
+        expected[f'frequency_{window}d'] = expected['customer_id'].map(recent.size()).fillna(0)
+        expected[f'monetary_{window}d'] = expected['customer_id'].map(recent.sum()).fillna(0)
+    return expected
+
+
+def test_features_match_per_window_filtering():
+    transactions = make_transactions()
+    as_of_days = [19_700, 19_900, 20_099]
+    features = WindowedRFM(transactions).features(as_of_days)
+
+    assert (features.sort_values(['customer_id', 'as_of_date']).index == features.index).all()
+    for as_of in as_of_days:
+        actual = features[features['as_of_date'] == as_of].reset_index(drop=True)
+        expected = filtered_features(transactions, as_of)
+        columns = ['customer_id', 'recency'] + window_columns()
+        pd.testing.assert_frame_equal(actual[columns], expected[columns], check_dtype=False)
+
+
+def test_customers_appear_from_their_first_purchase():
+    transactions = pd.DataFrame({'customer_id': [1, 2], 'transaction_date': [100, 200], 'amount': [5, 7]})
+    features = WindowedRFM(transactions).features([150, 250])
+    assert list(zip(features['customer_id'], features['as_of_date'])) == [(1, 150), (1, 250), (2, 250)]
+
+
+def test_tied_values_share_a_score():
+    values = np.array([5, 1, 5, 3, 5, 1, 9, 9, 5, 2])
+    scores = score(values)
+    for value in np.unique(values):
+        assert len(set(scores[values == value])) == 1
+    assert scores[values == 1][0] == 1
+    assert scores[values == 9][0] == 5
+    assert (np.diff(scores[np.argsort(values, kind='stable')]) >= 0).all()
+
+
+def test_scores_are_ranked_within_each_as_of_date():
+    values = np.array([1, 2, 3, 4, 5, 100, 200, 300, 400, 500])
+    groups = np.repeat([10, 20], 5)
+    assert score(values, groups).tolist() == [1, 2, 3, 4, 5] * 2
+
+
+def test_customers_without_purchases_count_as_inactive():
+    transactions = pd.DataFrame({'customer_id': [1, 1, 3], 'transaction_date': [100, 190, 150],
+                                 'amount': [500, 700, 900]})
+    scored = quantile_scores(WindowedRFM(transactions).features([200]))
+    columns = window_columns() + ['r_score', 'f_score', 'm_score', 'rfm_score']
+    customers = pd.DataFrame({'customer_id': [1, 2, 3, 4]})
+
+    joined = fill_inactive(merge_join(customers, scored[['customer_id'] + columns], how='left'))
+    assert not joined[columns].isna().any().any()
+    inactive = joined[joined['customer_id'].isin([2, 4])]
+    assert (inactive[window_columns()] == 0).all().all()
+    assert inactive['rfm_score'].tolist() == [111, 111]
+    assert joined['frequency_30d'].dtype == np.int16
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.rollups import DIMENSIONS, MEASURES, RollupStore, period_start
+
+
+def make_events(days, seed=0, rows=400):
+    rng = np.random.default_rng(seed)
+    day_numbers = pd.to_datetime(days).to_numpy().astype('datetime64[D]').astype(np.int32)
+    return pd.DataFrame({
+        'send_date': rng.choice(day_numbers, rows),
+        'segment_name': rng.choice(['Champions', 'At Risk'], rows),
+        'test_group': rng.choice(['A', 'B'], rows),
+        'campaign_version': rng.choice(['control', 'test'], rows),
+        'clicked': rng.integers(0, 2, rows),
+        'converted': rng.integers(0, 2, rows),
+        'purchase_amount': rng.integers(0, 10_000, rows, dtype=np.int32),
+    })
+
+
+def expected_rollup(events, grain):
+    """Straight groupby of the events, in dollars."""
+    dates = pd.to_datetime(events['send_date'].astype('int64'), unit='D')
+    key = dates if grain == 'daily' else period_start(dates, grain)
+    frame = events.assign(period=key, sends=1, revenue=events['purchase_amount'] / 100)
+    frame = frame.rename(columns={'clicked': 'clicks', 'converted': 'conversions'})
+    return frame.groupby(['period'] + DIMENSIONS, as_index=False)[MEASURES].sum()
+
+
+def assert_rollups_match(store, events):
+    for grain in ['daily', 'weekly', 'monthly']:
+        rollup = store.load(grain)
+        if grain == 'daily':
+            rollup = rollup.rename(columns={'date': 'period'})
+        rollup = rollup.sort_values(['period'] + DIMENSIONS, ignore_index=True)
+        expected = expected_rollup(events, grain)
+        pd.testing.assert_frame_equal(rollup[expected.columns], expected, check_dtype=False, atol=0.005)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return RollupStore(str(tmp_path / 'rollups'))
+
+
+def test_append_matches_groupby(store):
+    events = make_events(pd.date_range('2024-01-25', '2024-02-10'))
+    written = store.append(events)
+    assert len(written) == 17
+    assert_rollups_match(store, events)
+
+
+def test_append_adds_new_days_only(store):
+    january = make_events(pd.date_range('2024-01-20', '2024-01-31'), seed=1)
+    february = make_events(pd.date_range('2024-02-01', '2024-02-05'), seed=2)
+    store.append(january)
+    written = store.append(pd.concat([january, february]))
+    assert written == list(pd.date_range('2024-02-01', '2024-02-05'))
+    assert_rollups_match(store, pd.concat([january, february], ignore_index=True))
+
+
+def test_rerun_with_changed_results_rewrites_those_days(store):
+    events = make_events(pd.date_range('2024-03-01', '2024-03-20'))
+    store.append(events)
+    assert store.append(events) == []
+
+    changed = events.copy()
+    march_10 = changed['send_date'] == (pd.Timestamp('2024-03-10') - pd.Timestamp(0)).days
+    changed.loc[march_10, 'clicked'] = 1 - changed.loc[march_10, 'clicked']
+    assert store.append(changed) == [pd.Timestamp('2024-03-10')]
+    assert_rollups_match(store, changed)
+
+
+def test_sync_removes_days_missing_from_history(store):
+    events = make_events(pd.date_range('2024-05-25', '2024-06-05'))
+    store.append(events)
+    shorter = events[events['send_date'] < events['send_date'].max() - 7]
+    written, removed = store.sync(shorter)
+    assert written == []
+    assert len(removed) == 8
+    assert_rollups_match(store, shorter)
+
+
+def test_rebuild_matches_append(store, tmp_path):
+    events = make_events(pd.date_range('2024-01-01', '2024-03-31'), rows=2_000)
+    store.rebuild(events)
+    other = RollupStore(str(tmp_path / 'other'))
+    for month in [1, 2, 3]:
+        other.append(events[pd.to_datetime(events['send_date'], unit='D').dt.month <= month])
+    for grain in ['daily', 'weekly', 'monthly']:
+        pd.testing.assert_frame_equal(store.load(grain), other.load(grain))
+
+
+def test_missing_period_table_is_rebuilt(store, tmp_path):
+    events = make_events(pd.date_range('2024-01-01', '2024-02-15'))
+    store.append(events)
+    (tmp_path / 'rollups' / 'monthly.csv').unlink()
+    assert store.append(events) == []
+    assert_rollups_match(store, events)
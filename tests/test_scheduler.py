@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.scheduler import SendScheduler, parse_channels
+
+START_DAY = 20_089  # 2025-01-01
+
+
+def make_assignments(n=3_000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'customer_id': rng.permutation(np.arange(1, n + 1)),
+        'send_frequency': rng.choice(['Weekly', 'Bi-weekly', 'Monthly'], n),
+        'channel_priority': rng.choice(['Email + SMS + Push', 'SMS + Email', 'Push', 'Email + Push'], n),
+    }), rng.integers(0, 100_000, n)
+
+
+def plan(scheduler, days=28):
+    frames = [batch.assign(day=day) for day, batch in scheduler.batches(START_DAY, days)]
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_parse_channels_keeps_priority_order():
+    channels, positions = parse_channels(['Email + SMS', 'Push', 'Email + SMS'])
+    assert channels == ['Email', 'SMS', 'Push']
+    assert [list(p) for p in positions] == [[0, 2, 0], [1, -1, 1]]
+
+
+def test_caps_hold_and_the_highest_priority_customers_are_sent():
+    assignments, priority = make_assignments()
+    caps = {'Email': 400, 'SMS': 60, 'Push': 150}
+    scheduler = SendScheduler(assignments, priority, caps=caps)
+    sends = plan(scheduler)
+
+    per_day = sends.groupby(['day', 'channel'], observed=True).size()
+    for (_, channel), count in per_day.items():
+        assert count <= caps[channel]
+    stats = scheduler.summary()
+    assert (stats['deferred'] > 0).any()
+    assert stats['sent'].sum() == len(sends)
+
+    # On the first day nothing is deferred yet: the SMS cap takes the top of the queue
+    value = dict(zip(assignments['customer_id'], priority))
+    first_day = sends[(sends['day'] == START_DAY) & (sends['channel'] == 'SMS')]
+    due = scheduler.summary().query('day == @START_DAY and channel == "SMS"')['due'].iloc[0]
+    assert len(first_day) == caps['SMS'] < due
+    sent_values = [value[c] for c in first_day['customer_id']]
+    assert sent_values == sorted(sent_values, reverse=True)
+
+
+def test_weekly_contact_limit():
+    assignments, priority = make_assignments()
+    sends = plan(SendScheduler(assignments, priority, max_contacts_per_week=2))
+    week = (sends['day'] - START_DAY) // 7
+    assert sends.groupby([week, 'customer_id']).size().max() <= 2
+
+    unlimited = plan(SendScheduler(assignments, priority, max_contacts_per_week=100))
+    assert len(unlimited) > len(sends)
+
+
+def test_no_duplicate_sends():
+    assignments, priority = make_assignments()
+    sends = plan(SendScheduler(assignments, priority, caps={'Email': 300, 'SMS': 40, 'Push': 100}))
+    assert not sends.duplicated(['day', 'customer_id', 'channel']).any()
+
+
+def test_touch_intervals_without_caps():
+    assignments, priority = make_assignments(n=500)
+    sends = plan(SendScheduler(assignments, priority, max_contacts_per_week=100), days=60)
+    first_channel = assignments.assign(
+        channel=assignments['channel_priority'].str.split(' + ', regex=False).str[0])
+    touches = sends.merge(first_channel, on=['customer_id', 'channel'])
+    gaps = touches.sort_values('day').groupby('customer_id')['day'].diff().dropna()
+    expected = touches.loc[gaps.index, 'send_frequency'].map({'Weekly': 7, 'Bi-weekly': 14, 'Monthly': 30})
+    assert (gaps == expected).all()
+
+
+def test_rejects_unknown_frequencies_and_channels():
+    assignments, priority = make_assignments(n=10)
+    with pytest.raises(ValueError, match='send_frequency'):
+        SendScheduler(assignments.assign(send_frequency='Daily'), priority)
+    with pytest.raises(ValueError, match='No daily cap'):
+        SendScheduler(assignments, priority, caps={'Email': 10})
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.schema import apply_schema, check_key_order, load_table, save_table
+
+
+def test_apply_schema_compacts_registered_columns():
+    df = apply_schema(pd.DataFrame({'customer_id': [1, 2], 'segment_name': ['A', 'B'],
+                                    'monetary_total': [1050, 99], 'note': ['x', 'y']}))
+    assert df.dtypes.astype(str).tolist() == ['int32', 'category', 'int32', 'str']
+
+
+def test_apply_schema_keeps_missing_values_as_nullable_ints():
+    df = pd.DataFrame({'purchase_amount': [1050.0, np.nan], 'next_category': ['Books', None]})
+    with pytest.warns(RuntimeWarning, match='purchase_amount: 1 missing'):
+        df = apply_schema(df)
+    assert str(df['purchase_amount'].dtype) == 'Int32'
+    assert df['purchase_amount'].isna().tolist() == [False, True]
+    assert isinstance(df['next_category'].dtype, pd.CategoricalDtype)
+
+
+def test_apply_schema_refuses_fractional_ints():
+    with pytest.raises(TypeError):
+        with pytest.warns(RuntimeWarning):
+            apply_schema(pd.DataFrame({'age': [30.5, np.nan]}))
+
+
+def test_save_and_load_round_trip(tmp_path):
+    df = apply_schema(pd.DataFrame({'customer_id': [1, 2, 4], 'monetary_total': [1050, 99, 1],
+                                    'send_date': [19723, 19724, 19725], 'test_group': ['A', 'B', 'A']}))
+    path = str(tmp_path / 'ab_test_results.csv')
+    save_table(df, path)
+    assert open(path).read().splitlines()[1] == '1,10.5,2024-01-01,A'
+    pd.testing.assert_frame_equal(load_table('ab_test_results', path), df)
+
+
+def test_key_order_is_checked_on_save():
+    df = pd.DataFrame({'customer_id': [1, 3, 2]})
+    with pytest.raises(ValueError, match='strictly ascending'):
+        check_key_order(df, 'customer_segments')
+    check_key_order(pd.DataFrame({'customer_id': [1, 1, 2]}), 'transactions')
@@ -0,0 +1,121 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx import service
+from insightx.feature_store import FeatureStore
+from insightx.service import LookupService, make_server
+
+
+class StubService:
+    def lookup(self, customer_id):
+        return {'customer_id': customer_id}
+
+    def score(self, values):
+        return {'cluster': int(values['recency'] > 30)}
+
+
+@pytest.fixture
+def url(monkeypatch):
+    monkeypatch.setattr(service, 'MAX_BATCH', 3)
+    server = make_server(StubService(), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode(), method='POST')
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response)
+    except urllib.error.HTTPError as error:
+        return error.code, json.load(error)
+
+
+def test_batches_up_to_the_limit_are_served(url):
+    status, body = post(url + '/customers', {'customer_ids': [1, 2, 3]})
+    assert status == 200 and len(body['customers']) == 3
+    status, body = post(url + '/score', {'customers': [{'recency': 10}, {'recency': 40}, {'recency': 5}]})
+    assert status == 200
+    assert [c['cluster'] for c in body['customers']] == [0, 1, 0]
+
+
+@pytest.mark.parametrize('path, payload', [
+    ('/customers', {'customer_ids': [1, 2, 3, 4]}),
+    ('/score', {'customers': [{'recency': 10}] * 4}),
+])
+def test_oversized_batches_are_rejected(url, path, payload):
+    status, body = post(url + path, payload)
+    assert status == 413
+    assert 'at most 3' in body['error']
+
+
+STRATEGIES = {
+    str(cluster): {'email_subject_generic': 'Check Out Our Latest Offers',
+                   'email_subject_targeted': f'Targeted subject {cluster}', 'discount_percent': 5 * cluster,
+                   'campaign_type': f'Campaign {cluster}', 'send_frequency': 'Weekly',
+                   'channel_priority': 'Email'}
+    for cluster in range(2)
+}
+
+
+@pytest.fixture
+def lookup_service(tmp_path):
+    store = FeatureStore(str(tmp_path / 'features'))
+    store.put(pd.DataFrame({'customer_id': [3, 5, 8], 'cluster': np.array([0, 1, 1], dtype=np.int8),
+                            'segment_name': ['Champions', 'At Risk', 'At Risk'],
+                            'test_group': ['A', 'B', 'B']}))
+    return LookupService(store, STRATEGIES, model=None, cache_size=16)
+
+
+def test_lookup_payload_and_offer(lookup_service):
+    assert lookup_service.lookup(3) == {
+        'customer_id': 3, 'cluster': 0, 'segment_name': 'Champions', 'test_group': 'A',
+        'offer': {'campaign_type': 'Campaign 0', 'discount_percent': 0, 'send_frequency': 'Weekly',
+                  'channel_priority': 'Email', 'email_subject': 'Check Out Our Latest Offers'}}
+    # Test group B gets the segment's targeted subject
+    assert lookup_service.lookup(5)['offer']['email_subject'] == 'Targeted subject 1'
+    assert lookup_service.lookup(4) is None
+    assert lookup_service.lookup(10_000) is None
+
+
+def test_lookup_cache_and_invalidate(lookup_service):
+    lookup_service.lookup(5)
+    lookup_service.lookup(5)
+    assert lookup_service.lookup.cache_info().hits == 1
+
+    lookup_service.store.put(pd.DataFrame({'customer_id': [5], 'segment_name': ['Loyal Customers'],
+                                           'test_group': ['A']}))
+    assert lookup_service.lookup(5)['segment_name'] == 'At Risk'  # cached
+    lookup_service.invalidate()
+    record = lookup_service.lookup(5)
+    assert record['segment_name'] == 'Loyal Customers'
+    assert record['offer']['email_subject'] == 'Check Out Our Latest Offers'
+    assert lookup_service.lookup.cache_info().currsize == 1
+
+
+def test_http_lookup_and_unknown_customer(lookup_service):
+    server = make_server(lookup_service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f'http://127.0.0.1:{server.server_address[1]}'
+    try:
+        with urllib.request.urlopen(base + '/customers/8') as response:
+            assert json.load(response)['segment_name'] == 'At Risk'
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(base + '/customers/4')
+        assert error.value.code == 404
+        assert json.load(error.value) == {'error': 'unknown customer 4'}
+        status, body = post(base + '/customers', {'customer_ids': [3, 4]})
+        assert status == 200 and body['customers'][1] is None
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.simulation import BASE_PERFORMANCE, TEST_GROUPS, simulate_daily_performance
+
+
+def test_rows_are_ordered_by_date_then_segment_then_group():
+    dates = pd.date_range('2024-01-01', periods=3)
+    segments = ['At Risk', 'Champions']
+    df = simulate_daily_performance(dates, segments)
+
+    assert len(df) == 3 * 2 * 2
+    expected = [(d, s, g) for d in dates for s in segments for g in TEST_GROUPS]
+    assert list(zip(df['date'], df['segment_name'], df['test_group'])) == expected
+    assert df['campaign_version'].tolist() == [TEST_GROUPS[g]['campaign_version'] for g in df['test_group']]
+    pd.testing.assert_frame_equal(df, simulate_daily_performance(dates, segments))
+
+
+def test_rates_are_zero_when_nothing_was_sent_or_clicked():
+    base = {**BASE_PERFORMANCE, 'Dormant': {'emails': 0, 'ctr_base': 0.1},
+            'Unresponsive': {'emails': 100, 'ctr_base': 0.0}}
+    with np.errstate(all='raise'):
+        df = simulate_daily_performance(pd.date_range('2024-01-01', periods=5),
+                                        ['Dormant', 'Unresponsive', 'Champions'], base)
+
+    dormant = df[df['segment_name'] == 'Dormant']
+    assert (dormant['emails_sent'] == 0).all()
+    assert (dormant[['clicks', 'conversions', 'revenue', 'ctr', 'conversion_rate']] == 0).all().all()
+    unresponsive = df[df['segment_name'] == 'Unresponsive']
+    assert (unresponsive['clicks'] == 0).all() and (unresponsive['conversion_rate'] == 0).all()
+    assert df[['ctr', 'conversion_rate']].notna().all().all()
+    champions = df[df['segment_name'] == 'Champions']
+    assert (champions['ctr'] > 0).all()
+
+
+def test_group_click_rates_follow_the_ctr_multipliers():
+    # Large volumes keep the integer truncation of clicks negligible
+    base = {'Champions': {'emails': 20000, 'ctr_base': 0.1}}
+    df = simulate_daily_performance(pd.date_range('2024-01-01', periods=60), ['Champions'], base)
+    totals = df.groupby('test_group')[['clicks', 'emails_sent']].sum()
+    ctr = totals['clicks'] / totals['emails_sent']
+
+    for group, spec in TEST_GROUPS.items():
+        assert ctr[group] == pytest.approx(0.1 * spec['ctr_multiplier'], rel=0.02)
+    assert ctr['B'] / ctr['A'] == pytest.approx(
+        TEST_GROUPS['B']['ctr_multiplier'] / TEST_GROUPS['A']['ctr_multiplier'], rel=0.03)
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from insightx.sketches import Counter, HyperLogLog, SegmentMetrics, TDigest
+
+
+def sketch_of(kind, chunks):
+    sketch = kind()
+    for chunk in chunks:
+        sketch.add(chunk)
+    return sketch
+
+
+def test_small_sets_are_counted_exactly():
+    values = np.random.default_rng(0).integers(0, 5_000, 20_000)
+    hll = sketch_of(HyperLogLog, np.array_split(values, 7))
+    assert hll.count() == len(np.unique(values))
+    assert sketch_of(HyperLogLog, [np.arange(10)]).count() == 10
+    assert HyperLogLog().count() == 0
+
+
+@pytest.mark.parametrize('distinct', [20_000, 300_000])
+def test_large_counts_are_within_the_error_bound(distinct):
+    values = np.random.default_rng(1).permutation(distinct * 3) % distinct
+    hll = sketch_of(HyperLogLog, np.array_split(values, 10))
+    assert hll.hashes is None
+    # Four standard errors of 1.04 / sqrt(2**14)
+    assert abs(hll.count() / distinct - 1) < 4 * 1.04 / 128
+
+
+def test_count_never_exceeds_the_values_added():
+    hll = sketch_of(HyperLogLog, [np.arange(12_000)])
+    assert hll.hashes is None
+    assert hll.count() <= 12_000
+
+
+def test_hll_merge_matches_a_single_pass():
+    values = np.random.default_rng(2).integers(0, 50_000, 60_000)
+    parts = [sketch_of(HyperLogLog, [chunk]) for chunk in np.array_split(values, 4)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+    single = sketch_of(HyperLogLog, [values])
+    np.testing.assert_array_equal(merged.registers, single.registers)
+    assert merged.count() == single.count()
+
+    small = sketch_of(HyperLogLog, [np.arange(100)]).merge(sketch_of(HyperLogLog, [np.arange(50, 300)]))
+    assert small.count() == 300
+    with pytest.raises(ValueError):
+        HyperLogLog(p=10).merge(HyperLogLog(p=12))
+
+
+def test_tdigest_rank_error_and_merge():
+    values = np.random.default_rng(3).lognormal(4, 1, 200_000)
+    levels = np.array([0.01, 0.5, 0.9, 0.99])
+    single = sketch_of(TDigest, np.array_split(values, 20))
+    parts = [sketch_of(TDigest, [chunk]) for chunk in np.array_split(values, 5)]
+    merged = parts[0]
+    for part in parts[1:]:
+        merged.merge(part)
+
+    ordered = np.sort(values)
+    for digest in (single, merged):
+        ranks = np.searchsorted(ordered, digest.quantile(levels)) / len(values)
+        assert np.abs(ranks - levels).max() < 0.005
+        assert digest.count == len(values)
+        assert (digest.min, digest.max) == (values.min(), values.max())
+
+
+def test_counter_merge_is_exact():
+    counter = sketch_of(Counter, [[1, 2, 3]]).merge(sketch_of(Counter, [[4, 5]]))
+    assert (counter.count, counter.sum) == (5, 15)
+
+
+def test_segment_metrics_match_pandas_and_merge():
+    rng = np.random.default_rng(4)
+    n = 20_000
+    frame = pd.DataFrame({
+        'segment_name': rng.choice(['At Risk', 'Champions', 'Loyal Customers'], n),
+        'customer_id': np.arange(1, n + 1),
+        'clicked': rng.integers(0, 2, n),
+        'amount': rng.integers(100, 10_000, n),
+    })
+    specs = dict(distinct={'customers': ('customer_id', None), 'clickers': ('customer_id', 'clicked')},
+                 quantiles={'amount': ('amount', None)}, sums={'clicks': 'clicked'})
+    single = SegmentMetrics('segment_name', **specs)
+    for start in range(0, n, 3_500):
+        single.add(frame[start:start + 3_500])
+    merged = SegmentMetrics('segment_name', **specs).add(frame[:7_000])
+    merged.merge(SegmentMetrics('segment_name', **specs).add(frame[7_000:]))
+
+    expected = frame.groupby('segment_name').agg(rows=('customer_id', 'size'), clicks=('clicked', 'sum'))
+    for metrics in (single, merged):
+        table = metrics.table().set_index('segment_name')
+        assert table['rows'].tolist() == expected['rows'].tolist()
+        assert table['customers'].tolist() == expected['rows'].tolist()
+        assert table['clickers'].tolist() == expected['clicks'].tolist()
+        assert table['clicks'].tolist() == expected['clicks'].tolist()
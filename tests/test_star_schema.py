@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from insightx.star_schema import (FACT_TABLE, build_star_schema, read_dimensions, read_fact_partitions,
+                                  write_star_schema)
+
+CAMPAIGNS = {
+    'Win-Back Campaign': ('We Miss You! 20% Off Everything', 20),
+    'Premium Product Launch': ('Exclusive VIP Access', 15),
+    'Cross-Sell Campaign': ('Complete Your Style', 12),
+}
+
+
+def dashboard_tables(campaign_types, months):
+    n = 40
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, n + 1)
+    campaign_type = np.array(campaign_types)[ids % len(campaign_types)]
+    main_data = pd.DataFrame({
+        'customer_id': ids, 'cluster': ids % 2,
+        'segment_name': np.where(ids % 2, 'Champions', 'At Risk'),
+        'segment_description': 'desc', 'segment_strategy': 'strategy',
+        'test_group': np.where(ids % 3, 'A', 'B'),
+        'campaign_version': np.where(ids % 3, 'Generic', 'Targeted'),
+        'age': rng.integers(18, 80, n), 'gender': np.where(ids % 2, 'F', 'M'), 'behavior_type': 'loyal',
+        'recency': rng.integers(1, 300, n), 'frequency': rng.integers(1, 20, n),
+        'monetary_total': rng.uniform(10, 900, n).round(2), 'monetary_avg': 50.0,
+        'clicked': ids % 2, 'converted': ids % 4 == 0, 'purchase_amount': 0.0,
+        'customer_lifetime_value': 100.0, 'engagement_score': 50.0,
+    })
+    ab_results = pd.DataFrame({
+        'customer_id': ids,
+        'send_date': [f'2024-{months[i % len(months)]:02d}-15' for i in range(n)],
+        'campaign_type': campaign_type,
+        'email_subject': [CAMPAIGNS[c][0] for c in campaign_type],
+        'discount_percent': [CAMPAIGNS[c][1] for c in campaign_type],
+    })
+    return main_data, ab_results
+
+
+def campaign_keys(tables):
+    dim_campaign = tables['dim_campaign']
+    return dict(zip(zip(dim_campaign['campaign_type'], dim_campaign['campaign_version']),
+                    dim_campaign['campaign_key']))
+
+
+def test_fact_rows_resolve_through_the_dimensions():
+    main_data, ab_results = dashboard_tables(list(CAMPAIGNS), [1, 2])
+    tables = build_star_schema(main_data, ab_results)
+    fact = tables[FACT_TABLE]
+
+    assert 'gender' not in fact.columns and 'behavior_type' not in fact.columns
+    resolved = (fact.merge(tables['dim_campaign'], on='campaign_key')
+                .merge(tables['dim_customer'], on='customer_id')
+                .sort_values('customer_id', ignore_index=True))
+    expected = main_data.merge(ab_results, on='customer_id')
+    assert resolved['campaign_type'].tolist() == expected['campaign_type'].tolist()
+    assert resolved['gender'].tolist() == expected['gender'].tolist()
+    members = len(expected[['campaign_type', 'campaign_version']].drop_duplicates())
+    assert tables['dim_campaign']['campaign_key'].tolist() == list(range(1, members + 1))
+
+
+def test_keys_are_stable_when_a_campaign_is_added(tmp_path):
+    root = str(tmp_path / 'star')
+    # 'Cross-Sell Campaign' sorts first, so dense sorted keys would shift the others
+    main_data, ab_results = dashboard_tables(['Premium Product Launch', 'Win-Back Campaign'], [1, 2])
+    first = build_star_schema(main_data, ab_results)
+    write_star_schema(first, root)
+    keys = campaign_keys(first)
+
+    # A new month brings a new campaign; January and February are unchanged
+    extra_main, extra_ab = dashboard_tables(['Cross-Sell Campaign'], [3])
+    extra_main['customer_id'] += 100
+    extra_ab['customer_id'] += 100
+    second = build_star_schema(pd.concat([main_data, extra_main], ignore_index=True),
+                               pd.concat([ab_results, extra_ab], ignore_index=True), read_dimensions(root))
+    export = write_star_schema(second, root)
+
+    assert campaign_keys(second) == {**keys, ('Cross-Sell Campaign', 'Generic'): 5,
+                                     ('Cross-Sell Campaign', 'Targeted'): 6}
+    assert export['written'] == ['2024-03']
+    assert export['skipped'] == ['2024-01', '2024-02']
+    assert len(read_fact_partitions(root)) == 80
+
+
+def test_members_missing_from_new_data_keep_their_keys():
+    main_data, ab_results = dashboard_tables(list(CAMPAIGNS), [1])
+    first = build_star_schema(main_data, ab_results)
+    only_win_back = ab_results['campaign_type'] == 'Win-Back Campaign'
+    second = build_star_schema(main_data[only_win_back.values], ab_results[only_win_back],
+                               {'dim_campaign': first['dim_campaign']})
+    pd.testing.assert_frame_equal(second['dim_campaign'], first['dim_campaign'], check_dtype=False)